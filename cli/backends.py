@@ -0,0 +1,303 @@
+"""
+MLX Fine-Tuning Toolkit - Compute Backends
+
+The training loop talks to the model only through a ``TrainingBackend``:
+load the model and tokenizer, compute loss and LoRA gradients for a batch,
+apply an optimizer update, and save or load adapter weights. ``MLXBackend``
+trains the configured model on Apple Silicon; ``NumpyBackend`` is a tiny
+reference model that runs the same pipeline on any CPU.
+"""
+
+import importlib.util
+import logging
+import os
+from typing import Any, Dict, Optional, Tuple
+
+import numpy as np
+
+from .config import MLXConfig
+from .data import Batch, ByteTokenizer, HFTokenizer
+from .safetensors_header import write_safetensors, read_tensors
+
+logger = logging.getLogger(__name__)
+
+MLX_AVAILABLE = importlib.util.find_spec("mlx") is not None
+
+
+class TrainingBackend:
+    """Model, LoRA parameters and optimizer behind the training loop"""
+
+    name = "base"
+
+    def load(self, config: MLXConfig, model_path: str):
+        """Load the model, attach LoRA layers and return the tokenizer"""
+        raise NotImplementedError
+
+    def load_tokenizer(self, config: MLXConfig, model_path: str):
+        """The tokenizer alone, without loading model weights"""
+        raise NotImplementedError
+
+    def loss_and_grad(self, batch: Batch) -> Tuple[float, int, Any]:
+        """Mean token loss, token count and LoRA gradients for one batch"""
+        raise NotImplementedError
+
+    def accumulate_gradients(self, accumulated: Any, grads: Any, weight: float) -> Any:
+        """accumulated + weight * grads, reusing accumulated's storage where
+        the framework allows; accumulated is None for the first micro-batch"""
+        raise NotImplementedError
+
+    def scale_gradients(self, grads: Any, factor: float) -> Any:
+        raise NotImplementedError
+
+    def apply_gradients(self, grads: Any, learning_rate: float):
+        raise NotImplementedError
+
+    def evaluate(self, batch: Batch) -> Tuple[float, int]:
+        """Mean token loss and token count, without gradients"""
+        raise NotImplementedError
+
+    def save_adapter(self, path: str, metadata: Optional[Dict[str, str]] = None):
+        """Write adapter weights atomically to a safetensors file"""
+        raise NotImplementedError
+
+    def load_adapter(self, path: str):
+        raise NotImplementedError
+
+    def peak_memory_gb(self) -> Optional[float]:
+        return None
+
+
+class AdamW:
+    """AdamW over a dict of NumPy arrays, updated in place"""
+
+    def __init__(self, weight_decay: float = 0.0, betas: Tuple[float, float] = (0.9, 0.999), eps: float = 1e-8):
+        self.weight_decay = weight_decay
+        self.betas = betas
+        self.eps = eps
+        self.step = 0
+        self.state: Dict[str, Tuple[np.ndarray, np.ndarray]] = {}
+
+    def update(self, params: Dict[str, np.ndarray], grads: Dict[str, np.ndarray], learning_rate: float):
+        self.step += 1
+        beta1, beta2 = self.betas
+        correction1 = 1 - beta1 ** self.step
+        correction2 = 1 - beta2 ** self.step
+        for name, grad in grads.items():
+            if name not in self.state:
+                self.state[name] = (np.zeros_like(grad), np.zeros_like(grad))
+            m, v = self.state[name]
+            m *= beta1
+            m += (1 - beta1) * grad
+            v *= beta2
+            v += (1 - beta2) * grad * grad
+            param = params[name]
+            param *= 1 - learning_rate * self.weight_decay
+            param -= learning_rate * (m / correction1) / (np.sqrt(v / correction2) + self.eps)
+
+
+class NumpyBackend(TrainingBackend):
+    """Tiny byte-level language model with a LoRA adapter on its output head.
+
+    The frozen base is a seeded random embedding and projection, so the
+    configured model's weights are not used; the adapter learns the data's
+    next-byte statistics, which is enough to exercise loading, batching,
+    evaluation, checkpointing and resume on Linux CPU. Each position is
+    predicted from its own token alone, so packed documents cannot see each
+    other and segment/position ids need no handling.
+    """
+
+    name = "numpy"
+    hidden_size = 64
+
+    def load(self, config: MLXConfig, model_path: str):
+        rng = np.random.default_rng(config.training.seed)
+        tokenizer = ByteTokenizer()
+        vocab, hidden, rank = tokenizer.vocab_size, self.hidden_size, config.training.lora_rank
+        self.embedding = rng.normal(0.0, 1.0, (vocab, hidden)).astype(np.float32)
+        self.projection = (rng.normal(0.0, 1.0, (hidden, vocab)) / np.sqrt(hidden)).astype(np.float32)
+        bound = 1 / np.sqrt(hidden)
+        self.params = {
+            "lm_head.lora_a": rng.uniform(-bound, bound, (hidden, rank)).astype(np.float32),
+            "lm_head.lora_b": np.zeros((rank, vocab), dtype=np.float32),
+        }
+        self.scale = config.training.lora_scale / rank
+        self.optimizer = AdamW(config.training.weight_decay)
+        return tokenizer
+
+    def load_tokenizer(self, config: MLXConfig, model_path: str):
+        return ByteTokenizer()
+
+    def _forward(self, batch: Batch):
+        hidden = self.embedding[batch.inputs]
+        low_rank = hidden @ self.params["lm_head.lora_a"]
+        logits = hidden @ self.projection + self.scale * (low_rank @ self.params["lm_head.lora_b"])
+        logits -= logits.max(axis=-1, keepdims=True)
+        log_probs = logits - np.log(np.exp(logits).sum(axis=-1, keepdims=True))
+        num_tokens = max(batch.num_tokens, 1)
+        nll = -np.take_along_axis(log_probs, batch.targets[..., None], axis=-1)[..., 0]
+        loss = float((nll * batch.mask).sum() / num_tokens)
+        return hidden, low_rank, log_probs, loss, num_tokens
+
+    def loss_and_grad(self, batch: Batch):
+        hidden, low_rank, log_probs, loss, num_tokens = self._forward(batch)
+        # d(mean nll)/d(logits) = softmax - onehot, for unmasked positions
+        d_logits = np.exp(log_probs)
+        np.put_along_axis(d_logits, batch.targets[..., None],
+                          np.take_along_axis(d_logits, batch.targets[..., None], axis=-1) - 1, axis=-1)
+        d_logits *= (batch.mask / num_tokens)[..., None]
+
+        rank = low_rank.shape[-1]
+        flat_logits = d_logits.reshape(-1, d_logits.shape[-1])
+        grads = {
+            "lm_head.lora_b": self.scale * low_rank.reshape(-1, rank).T @ flat_logits,
+            "lm_head.lora_a": self.scale * hidden.reshape(-1, hidden.shape[-1]).T
+            @ (flat_logits @ self.params["lm_head.lora_b"].T),
+        }
+        return loss, batch.num_tokens, grads
+
+    def accumulate_gradients(self, accumulated, grads, weight: float):
+        if accumulated is None:
+            for grad in grads.values():
+                grad *= weight
+            return grads
+        for name, grad in grads.items():
+            accumulated[name] += weight * grad
+        return accumulated
+
+    def scale_gradients(self, grads, factor: float):
+        for grad in grads.values():
+            grad *= factor
+        return grads
+
+    def apply_gradients(self, grads, learning_rate: float):
+        self.optimizer.update(self.params, grads, learning_rate)
+
+    def evaluate(self, batch: Batch):
+        loss = self._forward(batch)[3]
+        return loss, batch.num_tokens
+
+    def save_adapter(self, path: str, metadata: Optional[Dict[str, str]] = None):
+        write_safetensors(path, self.params, metadata)
+
+    def load_adapter(self, path: str):
+        for name, value in read_tensors(path).items():
+            if name not in self.params or self.params[name].shape != value.shape:
+                raise ValueError(f"Adapter {path} does not match this model ({name} {value.shape})")
+            self.params[name] = value.astype(np.float32)
+
+
+class MLXBackend(TrainingBackend):
+    """LoRA fine-tuning of an mlx_lm model on Apple Silicon"""
+
+    name = "mlx"
+
+    def load(self, config: MLXConfig, model_path: str):
+        import mlx.core as mx
+        import mlx.nn as nn
+        import mlx.optimizers as optim
+        from mlx_lm import load as load_model
+        from mlx_lm.tuner.utils import linear_to_lora_layers
+
+        self.mx = mx
+        self.nn = nn
+        model, tokenizer = load_model(model_path)
+        model.freeze()
+        linear_to_lora_layers(model, config.training.lora_layers, {
+            "rank": config.training.lora_rank,
+            "scale": config.training.lora_scale,
+            "dropout": 0.0,
+        })
+        self.model = model
+        self.optimizer = optim.AdamW(learning_rate=config.training.learning_rate,
+                                     weight_decay=config.training.weight_decay)
+        self._value_and_grad = nn.value_and_grad(model, self._loss)
+        return HFTokenizer(tokenizer)
+
+    def load_tokenizer(self, config: MLXConfig, model_path: str):
+        from transformers import AutoTokenizer
+        return HFTokenizer(AutoTokenizer.from_pretrained(model_path, trust_remote_code=config.model.trust_remote_code))
+
+    def _loss(self, model, inputs, targets, mask, attention_mask=None):
+        if attention_mask is None:
+            logits = model(inputs)
+        else:
+            logits = model(inputs, mask=attention_mask)
+        losses = self.nn.losses.cross_entropy(logits, targets) * mask
+        return losses.sum() / mask.sum()
+
+    def _attention_mask(self, segment_ids):
+        """Additive causal mask that also blocks attention across packed
+        documents. RoPE only sees relative offsets, so a document that starts
+        mid-row attends exactly as it would at position 0."""
+        mx = self.mx
+        segments = mx.array(segment_ids)
+        length = segments.shape[1]
+        causal = mx.tril(mx.ones((length, length), dtype=mx.bool_))
+        same_document = segments[:, :, None] == segments[:, None, :]
+        allowed = mx.logical_and(same_document, causal)
+        return mx.where(allowed, 0.0, -1e9)[:, None, :, :]
+
+    def _arrays(self, batch: Batch):
+        arrays = [self.mx.array(batch.inputs), self.mx.array(batch.targets), self.mx.array(batch.mask)]
+        if batch.segment_ids is not None:
+            arrays.append(self._attention_mask(batch.segment_ids))
+        return arrays
+
+    def loss_and_grad(self, batch: Batch):
+        loss, grads = self._value_and_grad(self.model, *self._arrays(batch))
+        return loss.item(), batch.num_tokens, grads
+
+    def accumulate_gradients(self, accumulated, grads, weight: float):
+        from mlx.utils import tree_map
+        if accumulated is None:
+            accumulated = tree_map(lambda g: g * weight, grads)
+        else:
+            accumulated = tree_map(lambda a, g: a + g * weight, accumulated, grads)
+        # MLX arrays are immutable; evaluating the running sum now releases
+        # this micro-batch's graph instead of chaining all of them to the update
+        self.mx.eval(accumulated)
+        return accumulated
+
+    def scale_gradients(self, grads, factor: float):
+        from mlx.utils import tree_map
+        return tree_map(lambda g: g * factor, grads)
+
+    def apply_gradients(self, grads, learning_rate: float):
+        self.optimizer.learning_rate = learning_rate
+        self.optimizer.update(self.model, grads)
+        self.mx.eval(self.model.parameters(), self.optimizer.state)
+
+    def evaluate(self, batch: Batch):
+        loss = self._loss(self.model, *self._arrays(batch))
+        return loss.item(), batch.num_tokens
+
+    def save_adapter(self, path: str, metadata: Optional[Dict[str, str]] = None):
+        from mlx.utils import tree_flatten
+        # mx.save_safetensors insists on the extension, so the temp name keeps it
+        tmp_path = f"{path[:-len('.safetensors')]}.tmp.safetensors"
+        self.mx.save_safetensors(tmp_path, dict(tree_flatten(self.model.trainable_parameters())),
+                                 metadata=metadata or {})
+        os.replace(tmp_path, path)
+
+    def load_adapter(self, path: str):
+        self.model.load_weights(path, strict=False)
+
+    def peak_memory_gb(self) -> Optional[float]:
+        get_peak_memory = getattr(self.mx, "get_peak_memory", None) or self.mx.metal.get_peak_memory
+        return get_peak_memory() / 1e9
+
+
+BACKENDS = {"mlx": MLXBackend, "numpy": NumpyBackend}
+
+
+def resolve_backend_name(name: str) -> str:
+    """Concrete backend for a configured name; "auto" prefers MLX"""
+    if name == "auto":
+        return "mlx" if MLX_AVAILABLE else "numpy"
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown backend '{name}', expected one of: auto, {', '.join(BACKENDS)}")
+    return name
+
+
+def create_backend(name: str = "auto") -> TrainingBackend:
+    return BACKENDS[resolve_backend_name(name)]()
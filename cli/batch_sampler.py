@@ -0,0 +1,87 @@
+"""
+MLX Fine-Tuning Toolkit - Token-Budget Batch Sampler
+
+With a fixed row count, one long example pads every other row of its
+batch up to its length. This sampler instead groups examples of similar
+length (buckets of ``BUCKET_GRANULARITY`` tokens, random order within a
+bucket) and fills each batch up to a budget of padded token positions:
+many rows of short examples, few rows of long ones. Batch order is then
+shuffled with the epoch seed. Every example lands in exactly one batch
+per epoch.
+
+From a token cache the whole epoch is bucketed by the stored lengths and
+each batch's rows are read from the memory map only when it is built.
+A JSONL stream is bucketed within consecutive windows of
+``STREAM_WINDOW`` sequences instead, so memory stays bounded.
+"""
+
+import itertools
+import random
+from typing import Callable, Iterable, Iterator, List, Optional, Sequence
+
+import numpy as np
+
+from .data import Batch, make_batch
+
+# Examples within this many tokens of each other share a bucket
+BUCKET_GRANULARITY = 16
+
+# Sequences held and bucketed together when streaming without a token cache
+STREAM_WINDOW = 8192
+
+
+def bucket_order(lengths: Sequence[int], rng: Optional[random.Random] = None,
+                 granularity: int = BUCKET_GRANULARITY) -> List[int]:
+    """Indices sorted by length bucket, shuffled within each bucket"""
+    indices = list(range(len(lengths)))
+    if rng:
+        rng.shuffle(indices)
+    # Stable sort keeps the shuffled order inside a bucket
+    indices.sort(key=lambda i: -(-lengths[i] // granularity))
+    return indices
+
+
+def token_budget_batches(lengths: Sequence[int], token_budget: int, rng: Optional[random.Random] = None,
+                         granularity: int = BUCKET_GRANULARITY) -> List[List[int]]:
+    """Index batches whose rows x longest row stays within token_budget.
+
+    An example longer than the whole budget gets a batch of its own.
+    """
+    batches: List[List[int]] = []
+    current: List[int] = []
+    width = 0
+    for index in bucket_order(lengths, rng, granularity):
+        new_width = max(width, lengths[index])
+        if current and (len(current) + 1) * new_width > token_budget:
+            batches.append(current)
+            current, new_width = [], lengths[index]
+        current.append(index)
+        width = new_width
+    if current:
+        batches.append(current)
+    if rng:
+        rng.shuffle(batches)
+    return batches
+
+
+def iter_budget_batches(lengths: Sequence[int], fetch: Callable[[int], np.ndarray], token_budget: int,
+                        pad_id: int, rng: Optional[random.Random] = None) -> Iterator[Batch]:
+    """Budget batches over examples known by their input lengths (tokens - 1);
+    ``fetch(i)`` reads example i only when its batch is built"""
+    for indices in token_budget_batches(lengths, token_budget, rng):
+        yield make_batch([fetch(i) for i in indices], pad_id)
+
+
+def iter_windowed_budget_batches(sequences: Iterable[np.ndarray], token_budget: int, pad_id: int,
+                                 rng: Optional[random.Random] = None,
+                                 window: int = STREAM_WINDOW) -> Iterator[Batch]:
+    """Budget batches from a stream, bucketed within windows of ``window``
+    sequences; batches are a little less uniform than bucketing the whole
+    epoch, and every sequence still lands in exactly one batch"""
+    stream = iter(sequences)
+    while True:
+        chunk = list(itertools.islice(stream, window))
+        if not chunk:
+            return
+        yield from iter_budget_batches([len(seq) - 1 for seq in chunk], chunk.__getitem__,
+                                       token_budget, pad_id, rng)
@@ -29,6 +29,7 @@ class TrainingConfig:
     """Training hyperparameters and settings"""
     learning_rate: float = 1e-5
     batch_size: int = 1
+    batch_tokens: Optional[int] = None  # token budget per batch; replaces batch_size when set
     max_iters: int = 1000
     save_every: int = 100
     validate_every: int = 50
@@ -39,6 +40,10 @@ class TrainingConfig:
     gradient_checkpointing: bool = True
     resume_adapter_file: Optional[str] = None
     early_stopping_patience: int = 3
+    seed: int = 42
+    lora_rank: int = 8
+    lora_scale: float = 20.0
+    lora_layers: int = 16
     
 @dataclass
 class DataConfig:
@@ -48,6 +53,8 @@ class DataConfig:
     max_length: int = 1024
     truncation: bool = True
     padding: str = "max_length"
+    cache_tokens: bool = True
+    packing: str = "none"  # none, ffd, greedy
     
 @dataclass
 class HardwareConfig:
@@ -57,6 +64,7 @@ class HardwareConfig:
     compile_model: bool = False
     use_metal: bool = True
     max_memory_mb: Optional[int] = None
+    backend: str = "auto"  # auto, mlx, numpy
     
 @dataclass
 class LoggingConfig:
@@ -258,6 +266,12 @@ class ConfigManager:
         if config.training.batch_size <= 0:
             errors.append("Batch size must be positive")
             
+        if config.training.batch_tokens is not None and config.training.batch_tokens <= 0:
+            errors.append("Batch token budget must be positive if specified")
+            
+        if config.training.gradient_accumulation_steps <= 0:
+            errors.append("Gradient accumulation steps must be positive")
+            
         if config.training.max_iters <= 0:
             errors.append("Max iterations must be positive")
             
@@ -268,6 +282,9 @@ class ConfigManager:
         if not 0 < config.data.validation_split < 1:
             errors.append("Validation split must be between 0 and 1")
             
+        if config.data.packing not in ["none", "ffd", "greedy"]:
+            errors.append("Packing must be one of: none, ffd, greedy")
+            
         # Validate paths
         model_cache_dir = Path(config.model.cache_dir)
         if not model_cache_dir.parent.exists():
@@ -281,6 +298,12 @@ class ConfigManager:
         if config.hardware.device not in ["cpu", "mps", "cuda"]:
             errors.append("Device must be one of: cpu, mps, cuda")
             
+        if config.hardware.backend not in ["auto", "mlx", "numpy"]:
+            errors.append("Backend must be one of: auto, mlx, numpy")
+            
+        if config.training.lora_rank <= 0:
+            errors.append("LoRA rank must be positive")
+            
         if config.hardware.max_memory_mb is not None and config.hardware.max_memory_mb <= 0:
             errors.append("Max memory must be positive if specified")
         
@@ -0,0 +1,207 @@
+"""
+MLX Fine-Tuning Toolkit - Streaming Data Pipeline
+
+Training data is read from JSONL one line at a time and flows through
+generators (records -> token sequences -> padded batches), so memory use
+does not grow with the size of the dataset. Each epoch simply re-opens the
+file.
+"""
+
+import hashlib
+import json
+import logging
+import random
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Examples held in memory to shuffle a stream without loading the whole file
+SHUFFLE_BUFFER_SIZE = 1024
+
+
+@dataclass
+class Batch:
+    """Padded next-token prediction batch"""
+    inputs: np.ndarray   # (rows, length) int32 token ids
+    targets: np.ndarray  # (rows, length) int32, inputs shifted left by one
+    mask: np.ndarray     # (rows, length) float32, 1 where a target counts toward the loss
+    # Packed batches only: position within each document, and which
+    # document (1, 2, ...; 0 for padding) each position belongs to
+    position_ids: Optional[np.ndarray] = None
+    segment_ids: Optional[np.ndarray] = None
+
+    @property
+    def num_tokens(self) -> int:
+        return int(self.mask.sum())
+
+    @property
+    def efficiency(self) -> float:
+        """Share of batch positions holding real tokens rather than padding"""
+        return self.num_tokens / self.mask.size if self.mask.size else 0.0
+
+
+class ByteTokenizer:
+    """UTF-8 byte tokenizer used by the NumPy reference backend"""
+
+    vocab_size = 259
+    pad_id = 256
+    bos_id = 257
+    eos_id = 258
+    chat_template = "<bos>{% for m in messages %}<|{{ m.role }}|>\n{{ m.content }}\n{% endfor %}<eos>"
+
+    def encode(self, text: str) -> List[int]:
+        return list(text.encode("utf-8"))
+
+    def encode_chat(self, messages: List[Dict[str, str]]) -> List[int]:
+        text = "".join(f"<|{m.get('role', 'user')}|>\n{m.get('content', '')}\n" for m in messages)
+        return [self.bos_id] + self.encode(text) + [self.eos_id]
+
+    def fingerprint(self) -> str:
+        return "byte-utf8-v1"
+
+
+class HFTokenizer:
+    """Adapter giving a Hugging Face (or mlx_lm) tokenizer the pipeline's interface"""
+
+    # Used when the tokenizer has no chat template of its own
+    fallback_chat_template = "{% for m in messages %}{{ m.role }}: {{ m.content }}\n{% endfor %}<eos>"
+
+    def __init__(self, tokenizer: Any):
+        self._tokenizer = tokenizer
+        self.eos_id = tokenizer.eos_token_id
+        pad_id = getattr(tokenizer, "pad_token_id", None)
+        self.pad_id = pad_id if pad_id is not None else self.eos_id
+        self.vocab_size = getattr(tokenizer, "vocab_size", None)
+        self.chat_template = getattr(tokenizer, "chat_template", None) or self.fallback_chat_template
+
+    def encode(self, text: str) -> List[int]:
+        return list(self._tokenizer.encode(text))
+
+    def encode_chat(self, messages: List[Dict[str, str]]) -> List[int]:
+        if getattr(self._tokenizer, "chat_template", None):
+            return list(self._tokenizer.apply_chat_template(messages, tokenize=True))
+        text = "\n".join(f"{m.get('role', 'user')}: {m.get('content', '')}" for m in messages)
+        return self.encode(text) + [self.eos_id]
+
+    def fingerprint(self) -> str:
+        """Hash of everything that decides token ids: vocabulary and special tokens"""
+        vocab = self._tokenizer.get_vocab()
+        digest = hashlib.sha256(json.dumps(sorted(vocab.items()), separators=(",", ":")).encode("utf-8"))
+        digest.update(json.dumps([self.eos_id, self.pad_id, getattr(self._tokenizer, "bos_token_id", None)]).encode("utf-8"))
+        return digest.hexdigest()
+
+
+def iter_jsonl(path: str) -> Iterator[Dict[str, Any]]:
+    """Yield one record per non-blank line of a JSONL file"""
+    with open(path, 'r', encoding='utf-8') as f:
+        for line_number, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError as e:
+                raise ValueError(f"{path}:{line_number}: invalid JSON: {e}")
+            if not isinstance(record, dict):
+                raise ValueError(f"{path}:{line_number}: expected a JSON object")
+            yield record
+
+
+def is_validation_index(index: int, validation_split: float) -> bool:
+    """Every k-th example (k = 1 / validation_split) is held out for validation"""
+    if validation_split <= 0:
+        return False
+    return index % max(2, round(1 / validation_split)) == 0
+
+
+def split_records(records: Iterable[Dict[str, Any]], validation_split: float,
+                  validation: bool) -> Iterator[Dict[str, Any]]:
+    """Deterministic train/validation split of a record stream; both sides
+    can be streamed independently and always agree"""
+    for index, record in enumerate(records):
+        if is_validation_index(index, validation_split) == validation:
+            yield record
+
+
+def encode_example(record: Dict[str, Any], tokenizer) -> List[int]:
+    """Token ids of one record in chat, prompt/completion or plain text form"""
+    if "messages" in record:
+        return tokenizer.encode_chat(record["messages"])
+    if "prompt" in record and "completion" in record:
+        return tokenizer.encode_chat([
+            {"role": "user", "content": record["prompt"]},
+            {"role": "assistant", "content": record["completion"]},
+        ])
+    if "text" in record:
+        return tokenizer.encode(record["text"]) + [tokenizer.eos_id]
+    raise ValueError(f"Unsupported record format with keys {sorted(record)}")
+
+
+def fit_sequences(sequences: Iterable[np.ndarray], max_seq_length: int,
+                  truncation: bool = True) -> Iterator[np.ndarray]:
+    """Truncate or skip over-long sequences and drop ones too short to train on"""
+    skipped = 0
+    for tokens in sequences:
+        if len(tokens) > max_seq_length:
+            if not truncation:
+                skipped += 1
+                continue
+            tokens = tokens[:max_seq_length]
+        if len(tokens) < 2:
+            continue
+        yield tokens
+    if skipped:
+        logger.warning(f"Skipped {skipped} examples longer than {max_seq_length} tokens")
+
+
+def iter_sequences(records: Iterable[Dict[str, Any]], tokenizer, max_seq_length: int,
+                   truncation: bool = True) -> Iterator[np.ndarray]:
+    """Tokenize a record stream; over-long examples are truncated or skipped"""
+    encoded = (np.asarray(encode_example(record, tokenizer), dtype=np.int32) for record in records)
+    yield from fit_sequences(encoded, max_seq_length, truncation)
+
+
+def shuffle_stream(items: Iterable[Any], rng: random.Random,
+                   buffer_size: int = SHUFFLE_BUFFER_SIZE) -> Iterator[Any]:
+    """Approximate shuffle of a stream through a fixed-size buffer"""
+    buffer: List[Any] = []
+    for item in items:
+        if len(buffer) < buffer_size:
+            buffer.append(item)
+            continue
+        index = rng.randrange(buffer_size)
+        yield buffer[index]
+        buffer[index] = item
+    rng.shuffle(buffer)
+    yield from buffer
+
+
+def make_batch(sequences: List[np.ndarray], pad_id: int, length: Optional[int] = None) -> Batch:
+    """Pad sequences into one batch; length defaults to the longest sequence"""
+    width = (length or max(len(seq) for seq in sequences)) - 1
+    inputs = np.full((len(sequences), width), pad_id, dtype=np.int32)
+    targets = np.full((len(sequences), width), pad_id, dtype=np.int32)
+    mask = np.zeros((len(sequences), width), dtype=np.float32)
+    for row, seq in enumerate(sequences):
+        n = min(len(seq), width + 1) - 1
+        inputs[row, :n] = seq[:n]
+        targets[row, :n] = seq[1:n + 1]
+        mask[row, :n] = 1.0
+    return Batch(inputs, targets, mask)
+
+
+def iter_batches(sequences: Iterable[np.ndarray], batch_size: int, pad_id: int,
+                 padding: str = "max_length", max_seq_length: Optional[int] = None) -> Iterator[Batch]:
+    """Group sequences into fixed-row batches padded to max_seq_length
+    (``padding="max_length"``) or to the longest row (``"longest"``)"""
+    length = max_seq_length if padding == "max_length" else None
+    pending: List[np.ndarray] = []
+    for seq in sequences:
+        pending.append(seq)
+        if len(pending) == batch_size:
+            yield make_batch(pending, pad_id, length)
+            pending = []
+    if pending:
+        yield make_batch(pending, pad_id, length)
@@ -0,0 +1,176 @@
+"""
+MLX Fine-Tuning Toolkit - Pre-tokenized Dataset Cache
+
+Tokenizes a JSONL file once into two flat arrays written next to it: every
+example's token ids back to back (uint32) and an index of where each one
+starts (int64, one more entry than there are examples). Later runs,
+evaluation passes and the ``prepare`` command memory-map both files, so
+opening even a large corpus is instant and examples are read zero-copy.
+
+A cache is keyed by the data file's content hash, the tokenizer
+fingerprint and its chat template; changing any of them builds a new one.
+Sequences are stored untruncated so one cache serves every max_seq_length.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import time
+from datetime import datetime
+from typing import Any, Dict, Iterator, Optional, Sequence
+
+import numpy as np
+
+from .data import encode_example, iter_jsonl
+
+logger = logging.getLogger(__name__)
+
+# Bump when the on-disk layout changes
+CACHE_VERSION = 1
+
+TOKENS_SUFFIX = "tokens.u32"
+OFFSETS_SUFFIX = "offsets.i64"
+META_SUFFIX = "meta.json"
+
+# Tokenized examples buffered before each write to the token file
+WRITE_BATCH_EXAMPLES = 4096
+
+HASH_CHUNK_BYTES = 1024 * 1024
+
+
+def file_digest(path: str) -> str:
+    """sha256 of a file's contents, read in chunks"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_BYTES), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def cache_key(data_digest: str, tokenizer) -> str:
+    """Key over everything that decides the cached token ids"""
+    template_digest = hashlib.sha256((tokenizer.chat_template or "").encode("utf-8")).hexdigest()
+    parts = [str(CACHE_VERSION), data_digest, tokenizer.fingerprint(), template_digest]
+    return hashlib.sha256("\n".join(parts).encode("utf-8")).hexdigest()
+
+
+def cache_prefix(data_path: str, key: str) -> str:
+    return f"{data_path}.{key[:16]}"
+
+
+class TokenizedDataset:
+    """Read-only view of a cache; examples are slices of one memory map"""
+
+    def __init__(self, prefix: str, meta: Dict[str, Any]):
+        self.prefix = prefix
+        self.meta = meta
+        self.offsets = np.memmap(f"{prefix}.{OFFSETS_SUFFIX}", dtype=np.int64, mode="r")
+        if meta["tokens"]:
+            self.tokens = np.memmap(f"{prefix}.{TOKENS_SUFFIX}", dtype=np.uint32, mode="r")
+        else:
+            # numpy cannot map an empty file
+            self.tokens = np.empty(0, dtype=np.uint32)
+
+    @classmethod
+    def open(cls, prefix: str) -> Optional["TokenizedDataset"]:
+        """Open a complete cache, or None if it is missing or stale"""
+        try:
+            with open(f"{prefix}.{META_SUFFIX}", 'r') as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if meta.get("version") != CACHE_VERSION:
+            return None
+        dataset = cls(prefix, meta)
+        if len(dataset.offsets) != meta["examples"] + 1 or len(dataset.tokens) != meta["tokens"]:
+            logger.warning(f"Ignoring inconsistent token cache {prefix}")
+            return None
+        return dataset
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def __getitem__(self, index: int) -> np.ndarray:
+        return self.tokens[self.offsets[index]:self.offsets[index + 1]]
+
+    @property
+    def lengths(self) -> np.ndarray:
+        return np.diff(self.offsets)
+
+    def iter_sequences(self, indices: Optional[Sequence[int]] = None) -> Iterator[np.ndarray]:
+        for index in (range(len(self)) if indices is None else indices):
+            yield self[index]
+
+    def stats(self) -> Dict[str, Any]:
+        lengths = self.lengths
+        summary: Dict[str, Any] = {"examples": len(self), "tokens": int(lengths.sum())}
+        if len(lengths):
+            summary.update({
+                "min_length": int(lengths.min()),
+                "mean_length": round(float(lengths.mean()), 1),
+                "p95_length": int(np.percentile(lengths, 95)),
+                "max_length": int(lengths.max()),
+            })
+        return summary
+
+
+def build_cache(data_path: str, tokenizer, prefix: str, meta: Dict[str, Any]) -> TokenizedDataset:
+    """Tokenize a JSONL file into the cache files at prefix"""
+    tokens_tmp = f"{prefix}.{TOKENS_SUFFIX}.tmp"
+    offsets = [0]
+    pending = []
+    with open(tokens_tmp, 'wb') as f:
+        for record in iter_jsonl(data_path):
+            ids = np.asarray(encode_example(record, tokenizer), dtype=np.uint32)
+            pending.append(ids)
+            offsets.append(offsets[-1] + len(ids))
+            if len(pending) >= WRITE_BATCH_EXAMPLES:
+                f.write(np.concatenate(pending).tobytes())
+                pending = []
+        if pending:
+            f.write(np.concatenate(pending).tobytes())
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tokens_tmp, f"{prefix}.{TOKENS_SUFFIX}")
+
+    offsets_tmp = f"{prefix}.{OFFSETS_SUFFIX}.tmp"
+    with open(offsets_tmp, 'wb') as f:
+        f.write(np.asarray(offsets, dtype=np.int64).tobytes())
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(offsets_tmp, f"{prefix}.{OFFSETS_SUFFIX}")
+
+    # The metadata file goes last: its presence marks the cache complete
+    meta = {**meta, "examples": len(offsets) - 1, "tokens": offsets[-1], "created": datetime.now().isoformat()}
+    meta_tmp = f"{prefix}.{META_SUFFIX}.tmp"
+    with open(meta_tmp, 'w') as f:
+        json.dump(meta, f, indent=2)
+    os.replace(meta_tmp, f"{prefix}.{META_SUFFIX}")
+    return TokenizedDataset(prefix, meta)
+
+
+def prepare_dataset(data_path: str, tokenizer, force: bool = False) -> TokenizedDataset:
+    """Open the token cache of a JSONL file, building it first if needed"""
+    data_digest = file_digest(data_path)
+    key = cache_key(data_digest, tokenizer)
+    prefix = cache_prefix(data_path, key)
+    if not force:
+        dataset = TokenizedDataset.open(prefix)
+        if dataset is not None:
+            logger.info(f"Using token cache {prefix} ({len(dataset)} examples)")
+            return dataset
+
+    start = time.perf_counter()
+    meta = {
+        "version": CACHE_VERSION,
+        "key": key,
+        "data_path": os.path.abspath(data_path),
+        "data_sha256": data_digest,
+        "tokenizer": tokenizer.fingerprint(),
+        "chat_template_sha256": hashlib.sha256((tokenizer.chat_template or "").encode("utf-8")).hexdigest(),
+    }
+    dataset = build_cache(data_path, tokenizer, prefix, meta)
+    logger.info(f"Built token cache {prefix}: {len(dataset)} examples, "
+                f"{dataset.meta['tokens']} tokens in {time.perf_counter() - start:.1f}s")
+    return dataset
@@ -20,14 +20,22 @@ sys.path.insert(0, str(Path(__file__).parent.parent))
 
 try:
     from .config import MLXConfig, ConfigManager
-    from .training import TrainingManager
+    from .training import TrainingManager, resolve_model_path
+    from .backends import resolve_backend_name, create_backend
+    from .dataset_cache import prepare_dataset
+    from .packing import packing_stats
     from .utils import check_system_requirements, get_hardware_info
+    from .safetensors_header import inspect_path, SafetensorsHeaderError
 except ImportError as e:
     try:
         # Fallback to absolute imports
         from cli.config import MLXConfig, ConfigManager
-        from cli.training import TrainingManager
+        from cli.training import TrainingManager, resolve_model_path
+        from cli.backends import resolve_backend_name, create_backend
+        from cli.dataset_cache import prepare_dataset
+        from cli.packing import packing_stats
         from cli.utils import check_system_requirements, get_hardware_info
+        from cli.safetensors_header import inspect_path, SafetensorsHeaderError
     except ImportError as e2:
         rprint(f"[red]Error importing modules: {e2}[/red]")
         rprint("[yellow]Make sure you're running from the correct directory and have installed dependencies[/yellow]")
@@ -68,13 +76,16 @@ def cli(ctx, version):
 @click.option('--output', type=click.Path(), help='Output directory for adapters')
 @click.option('--learning-rate', type=float, default=1e-5, help='Learning rate')
 @click.option('--batch-size', type=int, default=1, help='Batch size')
+@click.option('--batch-tokens', type=int, help='Token budget per batch (length-bucketed batches, replaces --batch-size)')
+@click.option('--grad-accumulation', type=int, help='Micro-batches summed into each optimizer update')
 @click.option('--max-iters', type=int, default=1000, help='Maximum training iterations')
 @click.option('--save-every', type=int, default=100, help='Save frequency (iterations)')
 @click.option('--validate-every', type=int, default=50, help='Validation frequency (iterations)')
 @click.option('--resume', type=click.Path(), help='Resume from adapter checkpoint')
+@click.option('--backend', type=click.Choice(['auto', 'mlx', 'numpy']), help='Compute backend (numpy is a CPU reference model)')
 @click.option('--dry-run', is_flag=True, help='Validate configuration without training')
-def train(model, data, validation, config, output, learning_rate, batch_size, 
-          max_iters, save_every, validate_every, resume, dry_run):
+def train(model, data, validation, config, output, learning_rate, batch_size, batch_tokens,
+          grad_accumulation, max_iters, save_every, validate_every, resume, backend, dry_run):
     """
     🏋️ Fine-tune a model with the given parameters
     
@@ -102,12 +113,21 @@ def train(model, data, validation, config, output, learning_rate, batch_size,
                 cfg.model.adapter_path = Path(output)
             if resume:
                 cfg.training.resume_adapter_file = Path(resume)
+            if backend:
+                cfg.hardware.backend = backend
+            if batch_tokens:
+                cfg.training.batch_tokens = batch_tokens
+            if grad_accumulation:
+                cfg.training.gradient_accumulation_steps = grad_accumulation
                 
             status.update("[bold blue]Validating configuration...[/bold blue]")
             config_manager.validate_config(cfg)
             
             status.update("[bold blue]Checking system requirements...[/bold blue]")
+            # The NumPy reference backend runs anywhere
             system_ok, issues = check_system_requirements()
+            if resolve_backend_name(cfg.hardware.backend) == "numpy":
+                system_ok, issues = True, []
             if not system_ok:
                 for issue in issues:
                     rprint(f"[red]❌ {issue}[/red]")
@@ -122,12 +142,79 @@ def train(model, data, validation, config, output, learning_rate, batch_size,
         trainer = TrainingManager(cfg)
         
         rprint("[bold green]🚀 Starting fine-tuning...[/bold green]")
-        trainer.train(data_path=data, validation_path=validation)
+        summary = trainer.train(data_path=data, validation_path=validation)
+        
+        best = summary["best_val_loss"]
+        rprint(f"[green]✅ Training {summary['status'].replace('_', ' ')} at iteration {summary['steps']}[/green]"
+               + (f" [dim](best val loss {best:.3f})[/dim]" if best is not None else ""))
+        rprint(f"Adapter saved to [bold]{summary['adapter_path']}[/bold]")
         
     except Exception as e:
         rprint(f"[red]❌ Training failed: {e}[/red]")
         raise click.ClickException(str(e))
 
+@cli.command()
+@click.option('--data', 'data_paths', required=True, multiple=True, type=click.Path(exists=True, dir_okay=False),
+              help='JSONL file to tokenize (repeatable)')
+@click.option('--model', help='Model whose tokenizer to use')
+@click.option('--config', type=click.Path(), help='Configuration file (YAML)')
+@click.option('--backend', type=click.Choice(['auto', 'mlx', 'numpy']), help='Compute backend whose tokenizer to use')
+@click.option('--force', is_flag=True, help='Rebuild the cache even if it is current')
+@click.option('--json', 'as_json', is_flag=True, help='Print dataset statistics as JSON')
+def prepare(data_paths, model, config, backend, force, as_json):
+    """
+    📦 Pre-tokenize training data
+    
+    Tokenize JSONL files once into memory-mapped token caches next to them.
+    Training and evaluation reuse a cache as long as the data, tokenizer and
+    chat template are unchanged.
+    """
+    config_manager = ConfigManager()
+    cfg = config_manager.load_config(config) if config else config_manager.create_default_config()
+    if model:
+        cfg.model.name = model
+    if backend:
+        cfg.hardware.backend = backend
+    
+    try:
+        with console.status("[bold blue]Loading tokenizer...[/bold blue]") as status:
+            tokenizer = create_backend(cfg.hardware.backend).load_tokenizer(cfg, resolve_model_path(cfg.model))
+            results = {}
+            for path in data_paths:
+                status.update(f"[bold blue]Tokenizing {path}...[/bold blue]")
+                dataset = prepare_dataset(path, tokenizer, force=force)
+                results[path] = {
+                    "cache": dataset.prefix,
+                    **dataset.stats(),
+                    **packing_stats(dataset.lengths, cfg.training.max_seq_length, cfg.data.truncation),
+                }
+    except (OSError, ValueError, ImportError) as e:
+        raise click.ClickException(str(e))
+    
+    if as_json:
+        import json
+        click.echo(json.dumps(results, indent=2))
+        return
+    
+    table = Table(title=f"Token caches (max_seq_length {cfg.training.max_seq_length})")
+    table.add_column("Data", style="cyan")
+    table.add_column("Examples", style="magenta", justify="right")
+    table.add_column("Tokens", style="green", justify="right")
+    table.add_column("Length mean/p95/max", justify="right")
+    table.add_column("Rows padded→packed", justify="right")
+    table.add_column("Fill padded→packed", justify="right")
+    for path, stats in results.items():
+        if not stats["examples"] or not stats["packed_rows"]:
+            table.add_row(path, f"{stats['examples']:,}", f"{stats['tokens']:,}", "-", "-", "-")
+            continue
+        table.add_row(
+            path, f"{stats['examples']:,}", f"{stats['tokens']:,}",
+            f"{stats['mean_length']} / {stats['p95_length']} / {stats['max_length']}",
+            f"{stats['padded_rows']:,}→{stats['packed_rows']:,}",
+            f"{stats['padded_efficiency']:.0%}→{stats['packed_efficiency']:.0%}",
+        )
+    console.print(table)
+
 @cli.command()
 @click.argument('model', required=False)
 @click.option('--list', 'list_models', is_flag=True, help='List available models')
@@ -225,6 +312,48 @@ def generate(model, prompt, max_tokens, temperature, interactive):
         
     rprint(f"[green]Generated text:[/green] This is a simulated response to: {prompt}")
 
+@cli.command()
+@click.argument('path', type=click.Path(exists=True))
+@click.option('--json', 'as_json', is_flag=True, help='Print the summary as JSON')
+def inspect(path, as_json):
+    """
+    🔍 Inspect model or adapter weights
+    
+    Show parameter counts, dtypes and LoRA layout of a model directory or
+    safetensors file. Only file headers are read, so this is instant even
+    for large sharded models.
+    """
+    try:
+        summary = inspect_path(path)
+    except (OSError, SafetensorsHeaderError) as e:
+        raise click.ClickException(str(e))
+    
+    if as_json:
+        import json
+        click.echo(json.dumps(summary, indent=2))
+        return
+    
+    rprint(f"[bold blue]🔍 {path}[/bold blue]")
+    rprint(f"  [cyan]Files:[/cyan] {summary['files']}")
+    rprint(f"  [cyan]Tensors:[/cyan] {summary['tensors']:,}")
+    rprint(f"  [cyan]Parameters:[/cyan] {summary['params']:,}")
+    rprint(f"  [cyan]Size:[/cyan] {summary['total_bytes'] / 1024 / 1024:,.1f} MB")
+    
+    table = Table(title="Tensors by dtype")
+    table.add_column("dtype", style="cyan")
+    table.add_column("Parameters", style="magenta", justify="right")
+    table.add_column("Size (MB)", style="green", justify="right")
+    for dtype, size in sorted(summary["bytes_by_dtype"].items()):
+        table.add_row(dtype, f"{summary['params_by_dtype'][dtype]:,}", f"{size / 1024 / 1024:,.1f}")
+    console.print(table)
+    
+    lora = summary["lora"]
+    if lora:
+        rprint(f"\n[bold green]LoRA adapter[/bold green]")
+        rprint(f"  [cyan]Rank:[/cyan] {lora['rank']}")
+        rprint(f"  [cyan]Target modules:[/cyan] {', '.join(lora['target_modules'])}")
+        rprint(f"  [cyan]Adapted layers:[/cyan] {lora['adapted_layers']}")
+
 @cli.command()
 @click.option('--port', default=8080, help='Port for web interface')
 @click.option('--host', default='127.0.0.1', help='Host for web interface')
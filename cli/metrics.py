@@ -0,0 +1,71 @@
+"""
+MLX Fine-Tuning Toolkit - Structured Metrics Channel
+
+Machine-readable progress reporting from a training process to the GUI backend.
+"""
+
+import os
+import json
+import time
+import logging
+from typing import Optional, Any
+
+logger = logging.getLogger(__name__)
+
+# Environment variable carrying the inherited pipe fd the backend reads from
+METRICS_FD_ENV = "MLX_FINETUNE_METRICS_FD"
+
+# Record types understood by the backend
+EVENT_REPORT = "report"
+EVENT_EVAL = "eval"
+EVENT_CHECKPOINT = "checkpoint"
+
+
+class MetricsEmitter:
+    """
+    Writes one compact JSON record per line to the metrics channel.
+
+    Records carry an ``event`` type (report, eval, checkpoint) plus any of
+    ``step``, ``train_loss``, ``val_loss``, ``learning_rate``,
+    ``tokens_per_sec``, ``peak_memory_gb``, ``packing_efficiency`` (share of
+    batch positions holding real tokens) and ``checkpoint_path``.
+    When no channel is configured every call is a no-op, so training
+    code can emit unconditionally.
+    """
+
+    def __init__(self, fd: Optional[int] = None):
+        if fd is None:
+            env_fd = os.environ.get(METRICS_FD_ENV)
+            fd = int(env_fd) if env_fd and env_fd.isdigit() else None
+
+        self._stream = None
+        if fd is not None:
+            try:
+                self._stream = os.fdopen(fd, "w", buffering=1, encoding="utf-8")
+            except OSError as e:
+                logger.warning(f"Metrics channel fd {fd} unavailable: {e}")
+
+    @property
+    def enabled(self) -> bool:
+        return self._stream is not None
+
+    def emit(self, event: str, **fields: Any):
+        """Write a single record; drop the channel if the reader went away"""
+        if self._stream is None:
+            return
+
+        record = {"event": event, "time": round(time.time(), 3)}
+        record.update({k: v for k, v in fields.items() if v is not None})
+        try:
+            self._stream.write(json.dumps(record, separators=(",", ":")) + "\n")
+        except (BrokenPipeError, OSError, ValueError):
+            logger.warning("Metrics channel closed by reader, disabling")
+            self._stream = None
+
+    def close(self):
+        if self._stream is not None:
+            try:
+                self._stream.close()
+            except OSError:
+                pass
+            self._stream = None
@@ -0,0 +1,161 @@
+"""
+MLX Fine-Tuning Toolkit - Sequence Packing
+
+Packs several short examples into each ``max_seq_length`` row instead of
+padding every example to the full length. Each packed row carries segment
+ids (which document a position belongs to, 0 for padding) and position ids
+that restart at every document, so backends can keep attention inside a
+document. Targets never cross a boundary: the last token of one document
+is not trained to predict the first token of the next.
+
+Two strategies: ``ffd`` (first-fit-decreasing over a whole epoch, the
+tightest packing) and ``greedy`` (streaming first-fit over a few open rows,
+for data that should not be materialized).
+"""
+
+import random
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence
+
+import numpy as np
+
+from .data import Batch
+
+PACKING_STRATEGIES = ("none", "ffd", "greedy")
+
+# Rows kept open by the greedy packer before the fullest one is emitted
+GREEDY_OPEN_ROWS = 8
+
+
+def first_fit_decreasing(sizes: Sequence[int], capacity: int) -> List[List[int]]:
+    """Bin indices of sizes packed first-fit-decreasing into bins of capacity.
+
+    A max segment tree over bin remaining capacity finds the leftmost bin
+    with room in O(log n), so packing is O(n log n) overall.
+    """
+    count = len(sizes)
+    leaves = 1
+    while leaves < max(count, 1):
+        leaves *= 2
+    tree = [capacity] * (2 * leaves)
+    bins: List[List[int]] = []
+    for index in sorted(range(count), key=lambda i: -sizes[i]):
+        size = sizes[index]
+        if size > capacity:
+            raise ValueError(f"Item of size {size} does not fit in capacity {capacity}")
+        node = 1
+        while node < leaves:
+            node = 2 * node if tree[2 * node] >= size else 2 * node + 1
+        bin_index = node - leaves
+        if bin_index == len(bins):
+            bins.append([])
+        bins[bin_index].append(index)
+        tree[node] -= size
+        node //= 2
+        while node:
+            tree[node] = max(tree[2 * node], tree[2 * node + 1])
+            node //= 2
+    return bins
+
+
+def greedy_pack(sequences: Iterable[np.ndarray], capacity: int,
+                open_rows: int = GREEDY_OPEN_ROWS) -> Iterator[List[np.ndarray]]:
+    """Streaming first-fit over a bounded set of open rows"""
+    rows: List[List[np.ndarray]] = []
+    remaining: List[int] = []
+    for seq in sequences:
+        size = len(seq) - 1
+        for i, space in enumerate(remaining):
+            if size <= space:
+                rows[i].append(seq)
+                remaining[i] -= size
+                if remaining[i] == 0:
+                    yield rows.pop(i)
+                    remaining.pop(i)
+                break
+        else:
+            if len(rows) == open_rows:
+                fullest = remaining.index(min(remaining))
+                yield rows.pop(fullest)
+                remaining.pop(fullest)
+            rows.append([seq])
+            remaining.append(capacity - size)
+    yield from rows
+
+
+def pack_sequences(sequences: Iterable[np.ndarray], capacity: int, strategy: str = "ffd",
+                   rng: Optional[random.Random] = None) -> Iterator[List[np.ndarray]]:
+    """Group sequences into rows of at most capacity positions (a sequence
+    of n tokens fills n - 1). FFD reads the whole epoch first and shuffles
+    the packed rows with rng; greedy keeps the incoming order."""
+    if strategy == "greedy":
+        yield from greedy_pack(sequences, capacity)
+        return
+    if strategy != "ffd":
+        raise ValueError(f"Unknown packing strategy '{strategy}'")
+    items = list(sequences)
+    rows = first_fit_decreasing([len(seq) - 1 for seq in items], capacity)
+    if rng:
+        rng.shuffle(rows)
+    for row in rows:
+        yield [items[i] for i in row]
+
+
+def make_packed_batch(rows: List[List[np.ndarray]], pad_id: int, width: Optional[int] = None) -> Batch:
+    """Lay packed rows out as a batch with segment and position ids"""
+    width = width or max(sum(len(seq) - 1 for seq in row) for row in rows)
+    shape = (len(rows), width)
+    inputs = np.full(shape, pad_id, dtype=np.int32)
+    targets = np.full(shape, pad_id, dtype=np.int32)
+    mask = np.zeros(shape, dtype=np.float32)
+    position_ids = np.zeros(shape, dtype=np.int32)
+    segment_ids = np.zeros(shape, dtype=np.int32)
+    for r, row in enumerate(rows):
+        start = 0
+        for document, seq in enumerate(row, 1):
+            n = len(seq) - 1
+            end = start + n
+            inputs[r, start:end] = seq[:-1]
+            targets[r, start:end] = seq[1:]
+            mask[r, start:end] = 1.0
+            position_ids[r, start:end] = np.arange(n)
+            segment_ids[r, start:end] = document
+            start = end
+    return Batch(inputs, targets, mask, position_ids, segment_ids)
+
+
+def iter_packed_batches(rows: Iterable[List[np.ndarray]], batch_size: int, pad_id: int,
+                        padding: str = "max_length", max_seq_length: Optional[int] = None) -> Iterator[Batch]:
+    """Group packed rows into batches, padded like unpacked batches"""
+    width = max_seq_length - 1 if padding == "max_length" and max_seq_length else None
+    pending: List[List[np.ndarray]] = []
+    for row in rows:
+        pending.append(row)
+        if len(pending) == batch_size:
+            yield make_packed_batch(pending, pad_id, width)
+            pending = []
+    if pending:
+        yield make_packed_batch(pending, pad_id, width)
+
+
+def packing_stats(lengths: Sequence[int], max_seq_length: int, truncation: bool = True) -> Dict[str, Any]:
+    """Share of row positions holding real tokens, padded vs. FFD-packed"""
+    capacity = max_seq_length - 1
+    sizes = []
+    for length in lengths:
+        length = int(length)
+        if length > max_seq_length:
+            if not truncation:
+                continue
+            length = max_seq_length
+        if length >= 2:
+            sizes.append(length - 1)
+    if not sizes:
+        return {"padded_rows": 0, "packed_rows": 0, "padded_efficiency": None, "packed_efficiency": None}
+    rows = len(first_fit_decreasing(sizes, capacity))
+    tokens = sum(sizes)
+    return {
+        "padded_rows": len(sizes),
+        "packed_rows": rows,
+        "padded_efficiency": round(tokens / (len(sizes) * capacity), 4),
+        "packed_efficiency": round(tokens / (rows * capacity), 4),
+    }
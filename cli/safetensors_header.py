@@ -0,0 +1,219 @@
+"""
+MLX Fine-Tuning Toolkit - Safetensors Header Inspector
+
+Reads parameter counts, dtypes and LoRA layout from safetensors files without
+loading weights. A safetensors file starts with an 8-byte little-endian header
+length followed by a JSON table of tensor names, dtypes, shapes and byte
+offsets; only that prefix is read, so inspecting a sharded model costs a
+handful of small reads no matter how large the tensors are.
+
+A minimal NumPy writer and reader are included for backends that save
+adapters without a framework of their own.
+"""
+
+import json
+import mmap
+import os
+import re
+import struct
+from typing import Any, Dict, List, Optional, Tuple
+
+# Refuse headers larger than this; real headers are a few hundred KB at most
+MAX_HEADER_BYTES = 100 * 1024 * 1024
+
+# Bytes per element of each safetensors dtype
+DTYPE_SIZES = {
+    "BOOL": 1, "U8": 1, "I8": 1, "F8_E4M3": 1, "F8_E5M2": 1,
+    "U16": 2, "I16": 2, "F16": 2, "BF16": 2,
+    "U32": 4, "I32": 4, "F32": 4,
+    "U64": 8, "I64": 8, "F64": 8,
+}
+
+# NumPy dtype of each safetensors dtype the writer and reader handle
+NUMPY_DTYPES = {
+    "BOOL": "?", "U8": "u1", "I8": "i1", "U16": "<u2", "I16": "<i2", "F16": "<f2",
+    "U32": "<u4", "I32": "<i4", "F32": "<f4", "U64": "<u8", "I64": "<i8", "F64": "<f8",
+}
+
+SHARD_INDEX_FILENAME = "model.safetensors.index.json"
+
+# mlx_lm names LoRA tensors "<module>.lora_a"/"lora_b"; PEFT uses
+# "<module>.lora_A.weight"/"lora_B.weight"
+LORA_A_PATTERN = re.compile(r"^(?P<module>.+)\.lora_(?:a|A)(?:\.weight)?$")
+LAYER_INDEX_PATTERN = re.compile(r"\.(\d+)\.")
+
+
+class SafetensorsHeaderError(ValueError):
+    """The file is not a well-formed safetensors file"""
+
+
+def read_header(path: str) -> Tuple[Dict[str, Any], int]:
+    """Parse the JSON header of one safetensors file.
+
+    Returns the header table and the file offset where tensor data starts.
+    The file is memory-mapped, so tensor data is never paged in.
+    """
+    with open(path, 'rb') as f:
+        file_size = os.fstat(f.fileno()).st_size
+        if file_size < 8:
+            raise SafetensorsHeaderError(f"{path}: file too small for a safetensors header")
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            (header_size,) = struct.unpack("<Q", mapped[:8])
+            if header_size > min(MAX_HEADER_BYTES, file_size - 8):
+                raise SafetensorsHeaderError(f"{path}: invalid header length {header_size}")
+            try:
+                header = json.loads(mapped[8:8 + header_size])
+            except ValueError as e:
+                raise SafetensorsHeaderError(f"{path}: header is not valid JSON: {e}")
+    if not isinstance(header, dict):
+        raise SafetensorsHeaderError(f"{path}: header is not a JSON object")
+    return header, 8 + header_size
+
+
+def model_shards(model_dir: str) -> List[str]:
+    """Weight files of a model directory, using the shard index when present"""
+    index_path = os.path.join(model_dir, SHARD_INDEX_FILENAME)
+    if os.path.exists(index_path):
+        try:
+            with open(index_path, 'r') as f:
+                weight_map = json.load(f).get("weight_map", {})
+            return [os.path.join(model_dir, name) for name in sorted(set(weight_map.values()))]
+        except (OSError, ValueError):
+            pass
+    try:
+        names = os.listdir(model_dir)
+    except OSError:
+        return []
+    return [os.path.join(model_dir, name) for name in sorted(names) if name.endswith(".safetensors")]
+
+
+def _lora_summary(lora_shapes: Dict[str, List[int]]) -> Optional[Dict[str, Any]]:
+    if not lora_shapes:
+        return None
+    ranks = set()
+    target_modules = set()
+    layers = set()
+    for module, shape in lora_shapes.items():
+        # lora_a maps the input features down to the rank, in either layout
+        if shape:
+            ranks.add(min(shape))
+        target_modules.add(module.rsplit(".", 1)[-1])
+        layer = LAYER_INDEX_PATTERN.search(f".{module}.")
+        if layer:
+            layers.add(int(layer.group(1)))
+    return {
+        "rank": ranks.pop() if len(ranks) == 1 else sorted(ranks),
+        "target_modules": sorted(target_modules),
+        "adapted_layers": len(layers),
+        "adapted_modules": len(lora_shapes),
+    }
+
+
+def inspect_safetensors(paths: List[str]) -> Dict[str, Any]:
+    """Aggregate tensor statistics over one or more safetensors files"""
+    params = 0
+    tensors = 0
+    total_bytes = 0
+    bytes_by_dtype: Dict[str, int] = {}
+    params_by_dtype: Dict[str, int] = {}
+    lora_shapes: Dict[str, List[int]] = {}
+    metadata: Dict[str, Any] = {}
+
+    for path in paths:
+        header, _ = read_header(path)
+        for name, info in header.items():
+            if name == "__metadata__":
+                metadata.update(info or {})
+                continue
+            dtype = info.get("dtype", "unknown")
+            shape = info.get("shape", [])
+            start, end = info.get("data_offsets", (0, 0))
+            count = 1
+            for dim in shape:
+                count *= dim
+            if dtype in DTYPE_SIZES and end - start != count * DTYPE_SIZES[dtype]:
+                raise SafetensorsHeaderError(f"{path}: offsets of {name} don't match its shape and dtype")
+            params += count
+            tensors += 1
+            total_bytes += end - start
+            bytes_by_dtype[dtype] = bytes_by_dtype.get(dtype, 0) + (end - start)
+            params_by_dtype[dtype] = params_by_dtype.get(dtype, 0) + count
+            lora = LORA_A_PATTERN.match(name)
+            if lora:
+                lora_shapes[lora.group("module")] = shape
+
+    return {
+        "files": len(paths),
+        "tensors": tensors,
+        "params": params,
+        "total_bytes": total_bytes,
+        "bytes_by_dtype": bytes_by_dtype,
+        "params_by_dtype": params_by_dtype,
+        "lora": _lora_summary(lora_shapes),
+        "metadata": metadata,
+    }
+
+
+def inspect_path(path: str) -> Dict[str, Any]:
+    """Inspect a safetensors file, or every weight shard of a model directory"""
+    paths = model_shards(path) if os.path.isdir(path) else [path]
+    if not paths:
+        raise SafetensorsHeaderError(f"{path}: no safetensors files found")
+    return inspect_safetensors(paths)
+
+
+def write_safetensors(path: str, tensors: Dict[str, Any], metadata: Optional[Dict[str, str]] = None):
+    """Write NumPy arrays as a safetensors file, via temp file + rename"""
+    import numpy as np
+
+    dtype_names = {np.dtype(dtype): name for name, dtype in NUMPY_DTYPES.items()}
+    header: Dict[str, Any] = {}
+    if metadata:
+        header["__metadata__"] = {key: str(value) for key, value in metadata.items()}
+    arrays = []
+    offset = 0
+    for name in sorted(tensors):
+        array = np.ascontiguousarray(tensors[name])
+        if array.dtype not in dtype_names:
+            raise SafetensorsHeaderError(f"{name}: unsupported dtype {array.dtype}")
+        header[name] = {
+            "dtype": dtype_names[array.dtype],
+            "shape": list(array.shape),
+            "data_offsets": [offset, offset + array.nbytes],
+        }
+        arrays.append(array)
+        offset += array.nbytes
+    header_bytes = json.dumps(header, separators=(",", ":")).encode("utf-8")
+    # Tensor data starts 8-byte aligned
+    header_bytes += b" " * (-len(header_bytes) % 8)
+
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(struct.pack("<Q", len(header_bytes)))
+        f.write(header_bytes)
+        for array in arrays:
+            f.write(array.tobytes())
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def read_tensors(path: str) -> Dict[str, Any]:
+    """Load every tensor of a safetensors file as a NumPy array"""
+    import numpy as np
+
+    header, data_start = read_header(path)
+    tensors = {}
+    with open(path, 'rb') as f:
+        for name, info in header.items():
+            if name == "__metadata__":
+                continue
+            if info.get("dtype") not in NUMPY_DTYPES:
+                raise SafetensorsHeaderError(f"{path}: unsupported dtype {info.get('dtype')} for {name}")
+            start, end = info["data_offsets"]
+            f.seek(data_start + start)
+            data = f.read(end - start)
+            if len(data) != end - start:
+                raise SafetensorsHeaderError(f"{path}: data of {name} is truncated")
+            tensors[name] = np.frombuffer(data, dtype=NUMPY_DTYPES[info["dtype"]]).reshape(info["shape"]).copy()
+    return tensors
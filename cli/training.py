@@ -2,51 +2,379 @@
 MLX Fine-Tuning Toolkit - Training Manager
 
 Handles the training orchestration and monitoring.
+
+Data is read from the pre-tokenized cache in ``dataset_cache`` or, with
+``data.cache_tokens`` off, streamed from JSONL through the generator
+pipeline in ``data``, then batched by row count, by token budget
+(``batch_sampler``) or packed several examples per row (``packing``). The
+model work is delegated to a ``TrainingBackend``. Progress goes to
+stdout in the ``Iter N: ...`` format the GUI backend scrapes, and to the
+structured metrics channel when one is configured.
 """
 
+import json
 import logging
+import os
+import random
+import re
+import time
 from pathlib import Path
-from typing import Optional
-from .config import MLXConfig
+from typing import Any, Dict, Iterator, List, Optional
+
+import numpy as np
+
+from .backends import TrainingBackend, create_backend
+from .config import MLXConfig, ModelConfig
+from .data import (
+    Batch, fit_sequences, is_validation_index, iter_batches, iter_jsonl, iter_sequences,
+    shuffle_stream, split_records
+)
+from .batch_sampler import iter_budget_batches, iter_windowed_budget_batches
+from .dataset_cache import TokenizedDataset, prepare_dataset
+from .packing import iter_packed_batches, pack_sequences, packing_stats
+from .metrics import MetricsEmitter, EVENT_REPORT, EVENT_EVAL, EVENT_CHECKPOINT
+from .safetensors_header import read_header, SafetensorsHeaderError
 
 logger = logging.getLogger(__name__)
 
+# Adapter output directory when the config names none
+DEFAULT_ADAPTER_DIR = "adapters"
+
+LATEST_ADAPTER_FILE = "adapters.safetensors"
+ADAPTER_CONFIG_FILE = "adapter_config.json"
+STEP_CHECKPOINT_PATTERN = re.compile(r"^(\d{7})_adapters\.safetensors$")
+
+
+def resolve_model_path(model: ModelConfig) -> str:
+    """Local model directory for a model name or path, else the name itself
+    (a hub id the backend can download)"""
+    path = Path(model.name).expanduser()
+    if path.is_dir():
+        return str(path)
+    cached = Path(model.cache_dir).expanduser() / model.name
+    return str(cached) if cached.is_dir() else model.name
+
+
+def checkpoint_step(path: str) -> int:
+    """Training step an adapter file was saved at, from its metadata or name"""
+    try:
+        header, _ = read_header(path)
+        step = (header.get("__metadata__") or {}).get("step")
+        if step is not None:
+            return int(step)
+    except (OSError, SafetensorsHeaderError, ValueError):
+        pass
+    match = STEP_CHECKPOINT_PATTERN.match(os.path.basename(path))
+    return int(match.group(1)) if match else 0
+
+
 class TrainingManager:
     """Manages fine-tuning training process"""
-    
-    def __init__(self, config: MLXConfig):
+
+    def __init__(self, config: MLXConfig, backend: Optional[TrainingBackend] = None,
+                 emitter: Optional[MetricsEmitter] = None):
         self.config = config
-        
-    def train(self, data_path: str, validation_path: Optional[str] = None):
+        self.backend = backend or create_backend(config.hardware.backend)
+        self.emitter = emitter or MetricsEmitter()
+        self.adapter_dir = Path(config.model.adapter_path or DEFAULT_ADAPTER_DIR)
+        self.tokenizer = None
+        self.data_path: Optional[str] = None
+        self.validation_path: Optional[str] = None
+        self.datasets: Dict[str, TokenizedDataset] = {}
+        self.step = 0
+        self.best_val_loss: Optional[float] = None
+
+    def train(self, data_path: str, validation_path: Optional[str] = None) -> Dict[str, Any]:
         """
         Start training process with given data.
-        
+
         Args:
             data_path: Path to training data (JSONL)
-            validation_path: Optional path to validation data
+            validation_path: Optional path to validation data; without it
+                ``data.validation_split`` of the training file is held out
+
+        Returns:
+            Summary with the final step, losses and adapter path
         """
         logger.info("Starting training process...")
-        
-        # TODO: Implement actual training logic using MLX
-        print(f"Training with data: {data_path}")
-        print(f"Model: {self.config.model.name}")
-        print(f"Learning rate: {self.config.training.learning_rate}")
-        print(f"Batch size: {self.config.training.batch_size}")
-        
-        if validation_path:
-            print(f"Validation data: {validation_path}")
-        
-        # Simulate training progress
-        print("Training simulation - replace with actual MLX training code")
-        
-    def validate(self):
-        """Run validation on current model"""
+        training = self.config.training
+        self.data_path = data_path
+        self.validation_path = validation_path
+
+        model_path = resolve_model_path(self.config.model)
+        self.tokenizer = self.backend.load(self.config, model_path)
+        self.adapter_dir.mkdir(parents=True, exist_ok=True)
+        self._write_adapter_config(model_path)
+
+        if self.config.data.cache_tokens:
+            for path in filter(None, (data_path, validation_path)):
+                start = time.perf_counter()
+                self.datasets[path] = prepare_dataset(path, self.tokenizer)
+                stats = self.datasets[path].stats()
+                print(f"Token cache for {path}: {stats['examples']} examples, {stats['tokens']} tokens "
+                      f"({time.perf_counter() - start:.2f}s)", flush=True)
+                if self.config.data.packing != "none":
+                    packing = packing_stats(self.datasets[path].lengths, training.max_seq_length,
+                                            self.config.data.truncation)
+                    print(f"Packing {path}: {packing['padded_rows']} rows -> {packing['packed_rows']} rows, "
+                          f"efficiency {packing['padded_efficiency']} -> {packing['packed_efficiency']}", flush=True)
+
+        start_step = 0
+        if training.resume_adapter_file:
+            resume_file = str(training.resume_adapter_file)
+            self.backend.load_adapter(resume_file)
+            start_step = checkpoint_step(resume_file)
+            print(f"Resuming from {resume_file} at iteration {start_step}", flush=True)
+
+        print(f"Training {model_path} on {data_path} with the {self.backend.name} backend", flush=True)
+        micro_steps = max(1, training.gradient_accumulation_steps)
+        if micro_steps > 1:
+            print(f"Gradient accumulation: {micro_steps} micro-batches per update", flush=True)
+        batches = self._training_batches(start_step)
+        report_every = max(1, self.config.logging.logging_steps)
+        window_loss = 0.0
+        window_steps = 0
+        window_tokens = 0
+        window_slots = 0
+        window_start = time.perf_counter()
+        trained_tokens = 0
+        evals_without_improvement = 0
+        last_saved = start_step
+        stop_reason = "completed"
+
+        for step in range(start_step + 1, training.max_iters + 1):
+            self.step = step
+            learning_rate = self.learning_rate(step)
+            loss, num_tokens, slots, grads = self._accumulate_gradients(batches, micro_steps)
+            self.backend.apply_gradients(grads, learning_rate)
+            del grads
+
+            window_loss += loss
+            window_steps += 1
+            window_tokens += num_tokens
+            window_slots += slots
+            trained_tokens += num_tokens
+
+            if step % report_every == 0 or step == training.max_iters:
+                elapsed = max(time.perf_counter() - window_start, 1e-9)
+                train_loss = window_loss / window_steps
+                tokens_per_sec = window_tokens / elapsed
+                # Share of batch positions that held real tokens, not padding
+                efficiency = window_tokens / window_slots if window_slots else 0.0
+                peak_memory = self.backend.peak_memory_gb()
+                print(
+                    f"Iter {step}: Train loss {train_loss:.3f}, Learning Rate {learning_rate:.3e}, "
+                    f"It/sec {window_steps / elapsed:.3f}, Tokens/sec {tokens_per_sec:.3f}, "
+                    f"Trained Tokens {trained_tokens}, Packing efficiency {efficiency:.3f}", flush=True
+                )
+                self.emitter.emit(EVENT_REPORT, step=step, train_loss=round(train_loss, 6),
+                                  learning_rate=learning_rate, tokens_per_sec=round(tokens_per_sec, 3),
+                                  peak_memory_gb=peak_memory, packing_efficiency=round(efficiency, 4))
+                window_loss, window_steps, window_tokens, window_slots = 0.0, 0, 0, 0
+                window_start = time.perf_counter()
+
+            if training.validate_every and step % training.validate_every == 0:
+                val_loss = self.validate()
+                if val_loss is not None:
+                    if self.best_val_loss is None or val_loss < self.best_val_loss:
+                        self.best_val_loss = val_loss
+                        evals_without_improvement = 0
+                    else:
+                        evals_without_improvement += 1
+
+            if training.save_every and step % training.save_every == 0:
+                self.save_checkpoint(step)
+                last_saved = step
+
+            if training.early_stopping_patience and evals_without_improvement >= training.early_stopping_patience:
+                print(f"Early stop: val loss has not improved for {evals_without_improvement} evaluations", flush=True)
+                stop_reason = "early_stop"
+                break
+
+        if self.step > last_saved:
+            self.save_checkpoint(self.step)
+
+        return {
+            "status": stop_reason,
+            "steps": self.step,
+            "trained_from_step": start_step,
+            "best_val_loss": self.best_val_loss,
+            "adapter_path": str(self.adapter_dir / LATEST_ADAPTER_FILE),
+        }
+
+    def _accumulate_gradients(self, batches: Iterator[Batch], micro_steps: int):
+        """Loss and gradients for one optimizer update over micro_steps batches.
+
+        Each micro-batch's mean gradient is weighted by its token count and
+        summed into one buffer, then divided by the total, so the update
+        equals a single batch holding every token. Returns the token-weighted
+        mean loss, tokens, batch positions and the gradients.
+        """
+        total_loss = 0.0
+        total_tokens = 0
+        slots = 0
+        accumulated = None
+        for _ in range(micro_steps):
+            batch = next(batches)
+            loss, num_tokens, grads = self.backend.loss_and_grad(batch)
+            if micro_steps == 1:
+                return loss, num_tokens, batch.mask.size, grads
+            accumulated = self.backend.accumulate_gradients(accumulated, grads, num_tokens)
+            del grads
+            total_loss += loss * num_tokens
+            total_tokens += num_tokens
+            slots += batch.mask.size
+        if total_tokens:
+            accumulated = self.backend.scale_gradients(accumulated, 1.0 / total_tokens)
+        return total_loss / max(total_tokens, 1), total_tokens, slots, accumulated
+
+    def learning_rate(self, step: int) -> float:
+        """Linear warmup to the configured rate, then constant"""
+        training = self.config.training
+        if training.warmup_steps and step <= training.warmup_steps:
+            return training.learning_rate * step / training.warmup_steps
+        return training.learning_rate
+
+    def _sequences(self, path: str, split: Optional[bool], rng: Optional[random.Random] = None) -> Iterator:
+        """Token sequences of a data file, from its token cache when one is open.
+
+        ``split`` selects the training (False) or validation (True) side of
+        ``data.validation_split``, or None for the whole file. With ``rng``
+        the order is shuffled: exactly when reading the cache, through a
+        bounded buffer when streaming the JSONL.
+        """
+        data = self.config.data
+        max_seq_length = self.config.training.max_seq_length
+        dataset = self.datasets.get(path)
+        if dataset is not None:
+            indices = self._split_indices(dataset, split)
+            if rng:
+                rng.shuffle(indices)
+            return fit_sequences(dataset.iter_sequences(indices), max_seq_length, data.truncation)
+
+        records = iter_jsonl(path)
+        if split is not None:
+            records = split_records(records, data.validation_split, validation=split)
+        sequences = iter_sequences(records, self.tokenizer, max_seq_length, data.truncation)
+        return shuffle_stream(sequences, rng) if rng else sequences
+
+    def _split_indices(self, dataset: TokenizedDataset, split: Optional[bool]) -> List[int]:
+        data = self.config.data
+        return [i for i in range(len(dataset))
+                if split is None or is_validation_index(i, data.validation_split) == split]
+
+    def _epoch_batches(self, path: str, split: Optional[bool],
+                       rng: Optional[random.Random] = None) -> Iterator[Batch]:
+        """One pass of batches over a data file (``split`` and ``rng`` as in
+        ``_sequences``). Token-budget batches over a token cache are planned
+        from the stored lengths, so no sequence is read before its batch."""
+        dataset = self.datasets.get(path)
+        if self.config.training.batch_tokens and self.config.data.packing == "none" and dataset is not None:
+            return self._cached_budget_batches(dataset, split, rng)
+        return self._batches(self._sequences(path, split, rng), rng)
+
+    def _cached_budget_batches(self, dataset: TokenizedDataset, split: Optional[bool],
+                               rng: Optional[random.Random] = None) -> Iterator[Batch]:
+        """Length-bucketed token-budget batches of a token cache, with the
+        same truncation and filtering as ``fit_sequences``"""
+        data = self.config.data
+        max_seq_length = self.config.training.max_seq_length
+        indices = np.asarray(self._split_indices(dataset, split), dtype=np.int64)
+        lengths = dataset.lengths[indices]
+        if not data.truncation:
+            fits = lengths <= max_seq_length
+            if not fits.all():
+                logger.warning(f"Skipped {int((~fits).sum())} examples longer than {max_seq_length} tokens")
+            indices, lengths = indices[fits], lengths[fits]
+        lengths = np.minimum(lengths, max_seq_length)
+        usable = lengths >= 2
+        indices, lengths = indices[usable], lengths[usable]
+        return iter_budget_batches((lengths - 1).tolist(), lambda i: dataset[indices[i]][:max_seq_length],
+                                   self.config.training.batch_tokens, self.tokenizer.pad_id, rng)
+
+    def _batches(self, sequences: Iterator, rng: Optional[random.Random] = None) -> Iterator[Batch]:
+        """Batch sequences one per row, or packed several per row when enabled.
+
+        With ``training.batch_tokens`` set, batches are sized by padded token
+        positions instead of ``batch_size``: as many full packed rows as fit
+        the budget, or length-bucketed batches of unpacked sequences. A
+        stream is bucketed within bounded windows (``STREAM_WINDOW``); a
+        token cache is bucketed over the whole epoch by ``_epoch_batches``.
+        """
+        data = self.config.data
+        training = self.config.training
+        if data.packing != "none":
+            rows = pack_sequences(sequences, training.max_seq_length - 1, data.packing, rng)
+            batch_size = training.batch_size
+            if training.batch_tokens:
+                batch_size = max(1, training.batch_tokens // (training.max_seq_length - 1))
+            return iter_packed_batches(rows, batch_size, self.tokenizer.pad_id,
+                                       data.padding, training.max_seq_length)
+        if training.batch_tokens:
+            return iter_windowed_budget_batches(sequences, training.batch_tokens, self.tokenizer.pad_id, rng)
+        return iter_batches(sequences, training.batch_size, self.tokenizer.pad_id,
+                            data.padding, training.max_seq_length)
+
+    def _training_batches(self, start_step: int) -> Iterator[Batch]:
+        """Endless stream of training batches, one pass over the data per epoch"""
+        data = self.config.data
+        epoch = 0
+        while True:
+            rng = random.Random(self.config.training.seed + start_step + epoch) if data.shuffle else None
+            produced = False
+            for batch in self._epoch_batches(self.data_path, None if self.validation_path else False, rng):
+                produced = True
+                yield batch
+            if not produced:
+                raise ValueError(f"No usable training examples in {self.data_path}")
+            epoch += 1
+
+    def _validation_batches(self) -> Iterator[Batch]:
+        if self.validation_path:
+            yield from self._epoch_batches(self.validation_path, None)
+        elif self.config.data.validation_split > 0:
+            yield from self._epoch_batches(self.data_path, True)
+
+    def validate(self) -> Optional[float]:
+        """Run validation on current model; returns the token-weighted mean loss"""
         logger.info("Running validation...")
-        # TODO: Implement validation logic
-        pass
-        
-    def save_checkpoint(self, iteration: int):
-        """Save model checkpoint"""
+        start = time.perf_counter()
+        total_loss = 0.0
+        total_tokens = 0
+        for batch in self._validation_batches():
+            loss, num_tokens = self.backend.evaluate(batch)
+            total_loss += loss * num_tokens
+            total_tokens += num_tokens
+        if total_tokens == 0:
+            return None
+        val_loss = total_loss / total_tokens
+        print(f"Iter {self.step}: Val loss {val_loss:.3f}, Val took {time.perf_counter() - start:.3f}s", flush=True)
+        self.emitter.emit(EVENT_EVAL, step=self.step, val_loss=round(val_loss, 6))
+        return val_loss
+
+    def save_checkpoint(self, iteration: int) -> str:
+        """Save model checkpoint as a numbered step file plus the latest adapter"""
         logger.info(f"Saving checkpoint at iteration {iteration}")
-        # TODO: Implement checkpoint saving
-        pass
\ No newline at end of file
+        metadata = {"step": str(iteration), "backend": self.backend.name}
+        step_file = self.adapter_dir / f"{iteration:07d}_adapters.safetensors"
+        self.backend.save_adapter(str(step_file), metadata)
+        self.backend.save_adapter(str(self.adapter_dir / LATEST_ADAPTER_FILE), metadata)
+        print(f"Iter {iteration}: Saved adapter weights to {self.adapter_dir / LATEST_ADAPTER_FILE} and {step_file}.", flush=True)
+        self.emitter.emit(EVENT_CHECKPOINT, step=iteration, checkpoint_path=str(step_file))
+        return str(step_file)
+
+    def _write_adapter_config(self, model_path: str):
+        """adapter_config.json in the layout mlx_lm expects when loading adapters"""
+        training = self.config.training
+        adapter_config = {
+            "model": model_path,
+            "backend": self.backend.name,
+            "fine_tune_type": "lora",
+            "num_layers": training.lora_layers,
+            "lora_parameters": {"rank": training.lora_rank, "scale": training.lora_scale, "dropout": 0.0},
+            "max_seq_length": training.max_seq_length,
+            "learning_rate": training.learning_rate,
+            "gradient_accumulation_steps": training.gradient_accumulation_steps,
+        }
+        with open(self.adapter_dir / ADAPTER_CONFIG_FILE, 'w') as f:
+            json.dump(adapter_config, f, indent=2)
@@ -0,0 +1,106 @@
+"""
+Best/latest checkpoint pointers for an adapter directory
+
+The trainer writes numbered step checkpoints (``NNNNNNN_adapters.safetensors``)
+and keeps ``adapters.safetensors`` as the latest weights. Instead of copying
+a step file on every val-loss improvement, a small manifest
+(``checkpoints.json``) names the best step file, and
+``best_adapters.safetensors`` is kept as a hardlink to it for tools that
+expect that name. Inference loads whichever file the pointer names, so
+nothing is copied on the hot path.
+"""
+
+import json
+import logging
+import os
+import re
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from session_journal import atomic_write_json
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_FILENAME = "checkpoints.json"
+BEST_ADAPTER_FILE = "best_adapters.safetensors"
+LATEST_ADAPTER_FILE = "adapters.safetensors"
+
+CHECKPOINT_KINDS = ("best", "latest")
+
+STEP_CHECKPOINT_PATTERN = re.compile(r"^(\d{7})_adapters\.safetensors$")
+
+
+def step_checkpoint_name(step: int) -> str:
+    return f"{step:07d}_adapters.safetensors"
+
+
+def list_step_checkpoints(adapter_dir: str) -> List[Tuple[int, str]]:
+    """(step, path) of every numbered checkpoint, oldest first"""
+    checkpoints = []
+    try:
+        names = os.listdir(adapter_dir)
+    except OSError:
+        return []
+    for name in names:
+        match = STEP_CHECKPOINT_PATTERN.match(name)
+        if match:
+            checkpoints.append((int(match.group(1)), os.path.join(adapter_dir, name)))
+    return sorted(checkpoints)
+
+
+def best_checkpoint_step(adapter_dir: str) -> Optional[int]:
+    best = read_manifest(adapter_dir).get("best") or {}
+    return best.get("step")
+
+
+def read_manifest(adapter_dir: str) -> Dict[str, Any]:
+    try:
+        with open(os.path.join(adapter_dir, MANIFEST_FILENAME), 'r') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def set_best_checkpoint(adapter_dir: str, step: int, val_loss: Optional[float]) -> Optional[str]:
+    """Point "best" at a step checkpoint; returns its path, or None if it doesn't exist"""
+    step_file = os.path.join(adapter_dir, step_checkpoint_name(step))
+    if not os.path.exists(step_file):
+        return None
+
+    manifest = read_manifest(adapter_dir)
+    manifest["best"] = {
+        "step": step,
+        "file": os.path.basename(step_file),
+        "val_loss": val_loss,
+        "updated": datetime.now().isoformat()
+    }
+    atomic_write_json(os.path.join(adapter_dir, MANIFEST_FILENAME), manifest)
+
+    # Hardlink swapped in by rename: no data copy, and readers never see a
+    # partial file. It also keeps the best weights if the step file is pruned.
+    best_file = os.path.join(adapter_dir, BEST_ADAPTER_FILE)
+    tmp_link = f"{best_file}.tmp"
+    try:
+        if os.path.lexists(tmp_link):
+            os.remove(tmp_link)
+        os.link(step_file, tmp_link)
+        os.replace(tmp_link, best_file)
+    except OSError as e:
+        logger.debug(f"Could not link {BEST_ADAPTER_FILE} in {adapter_dir}: {e}")
+    return step_file
+
+
+def resolve_checkpoint(adapter_dir: str, kind: str = "best") -> Optional[str]:
+    """Weights file for the best or latest checkpoint of an adapter, if any"""
+    if kind == "latest":
+        latest = os.path.join(adapter_dir, LATEST_ADAPTER_FILE)
+        return latest if os.path.exists(latest) else None
+
+    best = read_manifest(adapter_dir).get("best") or {}
+    if best.get("file"):
+        step_file = os.path.join(adapter_dir, best["file"])
+        if os.path.exists(step_file):
+            return step_file
+    # Step file pruned, or an adapter trained before the manifest existed
+    legacy = os.path.join(adapter_dir, BEST_ADAPTER_FILE)
+    return legacy if os.path.exists(legacy) else None
@@ -0,0 +1,147 @@
+"""
+Checkpoint retention for adapter directories
+
+A long run with a small save interval leaves hundreds of numbered step
+checkpoints behind. The retention policy decides which to keep:
+
+- the newest K checkpoints
+- the best checkpoint named by the manifest
+- exponentially spaced history (1st, 2nd, 4th, 8th, ... newest)
+- everything else is deleted, and the oldest survivors are trimmed further
+  while the directory is over its size budget
+
+``adapters.safetensors``, ``best_adapters.safetensors`` and config files are
+never touched. ``collect_checkpoints`` does blocking file I/O and is meant
+to run in a worker thread.
+"""
+
+import logging
+import os
+from dataclasses import dataclass, asdict
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from checkpoint_manifest import list_step_checkpoints, best_checkpoint_step
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class RetentionPolicy:
+    """Which step checkpoints to keep in an adapter directory"""
+    keep_last: int = 5
+    keep_best: bool = True
+    keep_exponential: bool = True
+    max_total_mb: Optional[float] = None  # None = no size budget
+
+    @classmethod
+    def from_env(cls) -> "RetentionPolicy":
+        max_mb = os.environ.get("MLX_GUI_CHECKPOINT_MAX_MB")
+        return cls(
+            keep_last=int(os.environ.get("MLX_GUI_CHECKPOINT_KEEP_LAST", "5")),
+            keep_best=os.environ.get("MLX_GUI_CHECKPOINT_KEEP_BEST", "1") != "0",
+            keep_exponential=os.environ.get("MLX_GUI_CHECKPOINT_KEEP_EXPONENTIAL", "1") != "0",
+            max_total_mb=float(max_mb) if max_mb else None,
+        )
+
+
+def directory_usage(adapter_dir: str) -> int:
+    """Bytes used by a directory, counting hardlinked files once"""
+    seen: Set[Tuple[int, int]] = set()
+    total = 0
+    try:
+        entries = list(os.scandir(adapter_dir))
+    except OSError:
+        return 0
+    for entry in entries:
+        try:
+            stat = entry.stat(follow_symlinks=False)
+        except OSError:
+            continue
+        if not entry.is_file(follow_symlinks=False) or (stat.st_dev, stat.st_ino) in seen:
+            continue
+        seen.add((stat.st_dev, stat.st_ino))
+        total += stat.st_size
+    return total
+
+
+def plan_retention(steps: List[int], policy: RetentionPolicy,
+                   best_step: Optional[int]) -> Tuple[Set[int], Set[int]]:
+    """Split checkpoint steps into (protected, optional) sets to keep.
+
+    Protected checkpoints (newest, best) survive the size budget; optional
+    ones (rest of keep-last, exponential history) are trimmed oldest first.
+    """
+    newest_first = sorted(steps, reverse=True)
+    protected: Set[int] = set(newest_first[:1])
+    if policy.keep_best and best_step in steps:
+        protected.add(best_step)
+
+    optional: Set[int] = set(newest_first[:max(policy.keep_last, 0)])
+    if policy.keep_exponential:
+        position = 1
+        while position <= len(newest_first):
+            optional.add(newest_first[position - 1])
+            position *= 2
+    return protected, optional - protected
+
+
+def collect_checkpoints(adapter_dir: str, policy: RetentionPolicy) -> Dict[str, Any]:
+    """Apply the policy to one adapter directory and report what was reclaimed"""
+    checkpoints = dict(list_step_checkpoints(adapter_dir))
+    protected, optional = plan_retention(list(checkpoints), policy, best_checkpoint_step(adapter_dir))
+    doomed = [step for step in sorted(checkpoints) if step not in protected and step not in optional]
+
+    reclaimed = 0
+    deleted = 0
+
+    def delete(step: int):
+        nonlocal reclaimed, deleted
+        path = checkpoints.pop(step)
+        try:
+            stat = os.stat(path)
+            os.remove(path)
+        except OSError as e:
+            logger.warning(f"Could not delete checkpoint {path}: {e}")
+            return
+        # A file still linked elsewhere (best_adapters.safetensors) frees nothing
+        if stat.st_nlink <= 1:
+            reclaimed += stat.st_size
+        deleted += 1
+
+    for step in doomed:
+        delete(step)
+
+    if policy.max_total_mb is not None:
+        budget = policy.max_total_mb * 1024 * 1024
+        for step in sorted(optional):
+            if directory_usage(adapter_dir) <= budget:
+                break
+            delete(step)
+        if directory_usage(adapter_dir) > budget:
+            logger.warning(f"{adapter_dir} exceeds its {policy.max_total_mb}MB budget with only protected checkpoints left")
+
+    if deleted:
+        logger.info(f"Checkpoint retention removed {deleted} files ({reclaimed / 1024 / 1024:.1f}MB) from {adapter_dir}")
+
+    return {
+        "deleted_files": deleted,
+        "reclaimed_bytes": reclaimed,
+        "checkpoint_files": len(checkpoints),
+        "disk_bytes": directory_usage(adapter_dir),
+        "kept_steps": sorted(checkpoints),
+        "time": datetime.now().isoformat(),
+    }
+
+
+def empty_retention_stats(policy: RetentionPolicy) -> Dict[str, Any]:
+    """Per-session retention totals before the first collection"""
+    return {
+        "policy": asdict(policy),
+        "disk_bytes": 0,
+        "checkpoint_files": 0,
+        "reclaimed_bytes": 0,
+        "deleted_files": 0,
+        "runs": 0,
+        "last_run": None,
+    }
@@ -0,0 +1,298 @@
+"""
+Hyperparameter sweeps with asynchronous successive halving (ASHA)
+
+A sweep expands a search space over ``learning_rate``, ``batch_size`` and
+``max_seq_length`` into trials (full grid, or random/log-uniform samples)
+and submits each as a job to the training queue, so trials run side by side
+within the memory budget. Validation losses stream back from the running
+trainers; at each rung (``min_steps * eta**k`` steps) a trial whose loss is
+worse than the best ``1/eta`` fraction recorded at that rung is stopped, so
+most of the compute goes to promising configurations.
+"""
+
+import asyncio
+import itertools
+import json
+import logging
+import math
+import os
+import random
+import uuid
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+from session_journal import atomic_write_json
+
+logger = logging.getLogger(__name__)
+
+SWEEP_DIRNAME = "sweeps"
+
+# Parameters a sweep may vary, and their types
+SWEEP_PARAMETERS = {"learning_rate": float, "batch_size": int, "max_seq_length": int}
+
+DISTRIBUTIONS = ("choice", "uniform", "log_uniform")
+STRATEGIES = ("grid", "random")
+
+# Grid points per continuous range when the spec gives no "num"
+DEFAULT_GRID_POINTS = 3
+
+DEFAULT_ETA = 3
+
+LEADERBOARD_SORT_KEYS = ("best_val_loss", "final_val_loss", "steps", "trial") + tuple(SWEEP_PARAMETERS)
+
+
+def _grid_values(name: str, spec: Dict[str, Any]) -> List[Any]:
+    distribution = spec.get("distribution", "choice" if "values" in spec else "uniform")
+    if distribution == "choice":
+        return list(spec["values"])
+    low, high = float(spec["low"]), float(spec["high"])
+    num = int(spec.get("num", DEFAULT_GRID_POINTS))
+    if num == 1:
+        points = [low]
+    elif distribution == "log_uniform":
+        points = [math.exp(math.log(low) + i * (math.log(high) - math.log(low)) / (num - 1)) for i in range(num)]
+    else:
+        points = [low + i * (high - low) / (num - 1) for i in range(num)]
+    return list(dict.fromkeys(_cast(name, point) for point in points))
+
+
+def _sample(name: str, spec: Dict[str, Any], rng: random.Random) -> Any:
+    distribution = spec.get("distribution", "choice" if "values" in spec else "uniform")
+    if distribution == "choice":
+        return rng.choice(list(spec["values"]))
+    low, high = float(spec["low"]), float(spec["high"])
+    if distribution == "log_uniform":
+        return _cast(name, math.exp(rng.uniform(math.log(low), math.log(high))))
+    return _cast(name, rng.uniform(low, high))
+
+
+def _cast(name: str, value: float) -> Any:
+    return int(round(value)) if SWEEP_PARAMETERS[name] is int else float(f"{value:.6g}")
+
+
+def validate_space(space: Dict[str, Any]):
+    """Raise ValueError for parameters or distributions a sweep can't use"""
+    if not space:
+        raise ValueError("Search space is empty")
+    for name, spec in space.items():
+        if name not in SWEEP_PARAMETERS:
+            raise ValueError(f"Cannot sweep {name}; choose from {', '.join(SWEEP_PARAMETERS)}")
+        distribution = spec.get("distribution", "choice" if "values" in spec else "uniform")
+        if distribution not in DISTRIBUTIONS:
+            raise ValueError(f"{name}: distribution must be one of {', '.join(DISTRIBUTIONS)}")
+        if distribution == "choice":
+            if not spec.get("values"):
+                raise ValueError(f"{name}: choice needs a non-empty values list")
+        elif "low" not in spec or "high" not in spec or float(spec["low"]) > float(spec["high"]):
+            raise ValueError(f"{name}: {distribution} needs low <= high")
+        elif distribution == "log_uniform" and float(spec["low"]) <= 0:
+            raise ValueError(f"{name}: log_uniform needs low > 0")
+
+
+def generate_trials(space: Dict[str, Any], strategy: str = "grid",
+                    num_trials: Optional[int] = None, seed: Optional[int] = None) -> List[Dict[str, Any]]:
+    """Parameter sets for a sweep: the full grid, or ``num_trials`` random samples"""
+    validate_space(space)
+    names = sorted(space)
+    rng = random.Random(seed)
+    if strategy == "grid":
+        grid = [dict(zip(names, values)) for values in itertools.product(*(_grid_values(name, space[name]) for name in names))]
+        # Queue in shuffled order so early rungs compare a spread of configs
+        # rather than one corner of the grid
+        rng.shuffle(grid)
+        return grid[:num_trials] if num_trials else grid
+    if strategy == "random":
+        return [{name: _sample(name, space[name], rng) for name in names} for _ in range(num_trials or 10)]
+    raise ValueError(f"strategy must be one of: {', '.join(STRATEGIES)}")
+
+
+def rung_steps(min_steps: int, eta: int, max_steps: int) -> List[int]:
+    """Steps at which trials are compared: min_steps, min_steps*eta, ..."""
+    rungs = []
+    step = max(1, min_steps)
+    while step < max_steps:
+        rungs.append(step)
+        step *= eta
+    return rungs
+
+
+def asha_cutoff(losses: List[float], eta: int) -> float:
+    """Loss a trial must not exceed to continue past a rung: the best 1/eta"""
+    ordered = sorted(losses)
+    # Losses are lower-is-better: the (1/eta) percentile, linearly interpolated
+    position = (len(ordered) - 1) / eta
+    lower = math.floor(position)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower)
+
+
+class SweepManager:
+    """Creates sweeps, prunes their trials and keeps their leaderboards"""
+
+    def __init__(self, state_dir: str, scheduler, estimate_memory: Callable[[Dict[str, Any]], int]):
+        self.sweep_dir = os.path.join(state_dir, SWEEP_DIRNAME)
+        self.scheduler = scheduler
+        self.estimate_memory = estimate_memory
+        self.sweeps: Dict[str, Dict[str, Any]] = {}
+        os.makedirs(self.sweep_dir, exist_ok=True)
+        self._load()
+
+    def _path(self, sweep_id: str) -> str:
+        return os.path.join(self.sweep_dir, f"{sweep_id}.json")
+
+    def _load(self):
+        for name in os.listdir(self.sweep_dir):
+            if not name.endswith(".json"):
+                continue
+            try:
+                with open(os.path.join(self.sweep_dir, name), 'r') as f:
+                    sweep = json.load(f)
+                self.sweeps[sweep["sweep_id"]] = sweep
+            except (OSError, ValueError, KeyError) as e:
+                logger.error(f"Could not read sweep {name}: {e}")
+
+    def _save(self, sweep: Dict[str, Any]):
+        try:
+            atomic_write_json(self._path(sweep["sweep_id"]), sweep)
+        except OSError as e:
+            logger.error(f"Failed to save sweep {sweep['sweep_id']}: {e}")
+
+    def create(self, base_config: Dict[str, Any], space: Dict[str, Any], strategy: str = "grid",
+               num_trials: Optional[int] = None, seed: Optional[int] = None, eta: int = DEFAULT_ETA,
+               min_steps: Optional[int] = None, priority: int = 0, name: Optional[str] = None) -> Dict[str, Any]:
+        """Expand the search space and queue one training job per trial"""
+        if eta < 2:
+            raise ValueError("eta must be at least 2")
+        params = generate_trials(space, strategy, num_trials, seed)
+        if not params:
+            raise ValueError("Search space produced no trials")
+
+        sweep_id = uuid.uuid4().hex[:8]
+        name = name or f"sweep_{sweep_id}"
+        max_steps = base_config["iterations"]
+        min_steps = min_steps or base_config.get("steps_per_eval") or max(1, max_steps // eta ** 3)
+        sweep = {
+            "sweep_id": sweep_id,
+            "name": name,
+            "created": datetime.now().isoformat(),
+            "strategy": strategy,
+            "space": space,
+            "seed": seed,
+            "eta": eta,
+            "rungs": rung_steps(min_steps, eta, max_steps),
+            "base_config": base_config,
+            # Rung step (as str, for JSON) -> trial id -> val loss on reaching it
+            "rung_losses": {},
+            "trials": [],
+        }
+        for index, trial_params in enumerate(params):
+            config = {**base_config, **trial_params, "adapter_name": f"{name}_t{index:03d}"}
+            job = self.scheduler.submit(config, self.estimate_memory(config), priority, sweep_id=sweep_id)
+            sweep["trials"].append({
+                "trial": index,
+                "params": trial_params,
+                "job_id": job.job_id,
+                "adapter_name": config["adapter_name"],
+                "pruned_at": None,
+                "val_losses": [],
+            })
+        self.sweeps[sweep_id] = sweep
+        self._save(sweep)
+        logger.info(f"Created sweep {name} with {len(params)} trials, rungs at {sweep['rungs']}")
+        return sweep
+
+    def attach(self, job, runner):
+        """Stream a launched trial's validation losses into the sweep"""
+        sweep = self.sweeps.get(job.sweep_id)
+        trial = next((t for t in sweep["trials"] if t["job_id"] == job.job_id), None) if sweep else None
+        if trial is None:
+            return
+
+        async def on_val_loss(step: int, val_loss: float):
+            self._record(sweep, trial, job.job_id, step, val_loss)
+
+        runner.val_loss_listener = on_val_loss
+
+    def _record(self, sweep: Dict[str, Any], trial: Dict[str, Any], job_id: str, step: int, val_loss: float):
+        trial["val_losses"].append([step, val_loss])
+        prune = False
+        for rung in sweep["rungs"]:
+            recorded = sweep["rung_losses"].setdefault(str(rung), {})
+            if step < rung or str(trial["trial"]) in recorded:
+                continue
+            recorded[str(trial["trial"])] = val_loss
+            cutoff = asha_cutoff(list(recorded.values()), sweep["eta"])
+            if val_loss > cutoff:
+                prune = True
+                trial["pruned_at"] = rung
+                logger.info(f"Sweep {sweep['name']}: pruning trial {trial['trial']} at step {step} "
+                            f"(val loss {val_loss:.4f} > cutoff {cutoff:.4f} at rung {rung})")
+                break
+        self._save(sweep)
+        if prune:
+            # Stop from a separate task; the listener runs inside the trial's monitor
+            asyncio.create_task(self.scheduler.cancel(job_id))
+
+    async def cancel(self, sweep_id: str) -> Dict[str, Any]:
+        """Cancel every trial that hasn't finished"""
+        sweep = self.sweeps[sweep_id]
+        for trial in sweep["trials"]:
+            job = self.scheduler.get(trial["job_id"])
+            if job and job.state in ("queued", "running"):
+                await self.scheduler.cancel(job.job_id)
+        return self.summary(sweep)
+
+    def _trial_row(self, trial: Dict[str, Any]) -> Dict[str, Any]:
+        job = self.scheduler.get(trial["job_id"])
+        state = job.state if job else "unknown"
+        if trial["pruned_at"] is not None and state in ("cancelled", "running"):
+            state = "pruned"
+        losses = [loss for _, loss in trial["val_losses"]]
+        return {
+            "trial": trial["trial"],
+            **trial["params"],
+            "params": trial["params"],
+            "state": state,
+            "best_val_loss": min(losses) if losses else None,
+            "final_val_loss": losses[-1] if losses else None,
+            "steps": trial["val_losses"][-1][0] if trial["val_losses"] else 0,
+            "pruned_at": trial["pruned_at"],
+            "adapter_name": trial["adapter_name"],
+            "job_id": trial["job_id"],
+            "session_id": job.session_id if job else None,
+        }
+
+    def leaderboard(self, sweep_id: str, sort_by: str = "best_val_loss", descending: bool = False) -> List[Dict[str, Any]]:
+        """Trial results sorted by a metric or parameter; trials without it last"""
+        if sort_by not in LEADERBOARD_SORT_KEYS:
+            raise ValueError(f"sort_by must be one of: {', '.join(LEADERBOARD_SORT_KEYS)}")
+        rows = [self._trial_row(trial) for trial in self.sweeps[sweep_id]["trials"]]
+        present = sorted((row for row in rows if row.get(sort_by) is not None),
+                         key=lambda row: row[sort_by], reverse=descending)
+        return present + [row for row in rows if row.get(sort_by) is None]
+
+    def summary(self, sweep: Dict[str, Any]) -> Dict[str, Any]:
+        rows = [self._trial_row(trial) for trial in sweep["trials"]]
+        counts: Dict[str, int] = {}
+        for row in rows:
+            counts[row["state"]] = counts.get(row["state"], 0) + 1
+        best = min((row for row in rows if row["best_val_loss"] is not None),
+                   key=lambda row: row["best_val_loss"], default=None)
+        total_steps = len(rows) * sweep["base_config"]["iterations"]
+        return {
+            "sweep_id": sweep["sweep_id"],
+            "name": sweep["name"],
+            "created": sweep["created"],
+            "strategy": sweep["strategy"],
+            "eta": sweep["eta"],
+            "rungs": sweep["rungs"],
+            "trials": len(rows),
+            "states": counts,
+            "best": best,
+            # Share of the unpruned budget the sweep actually trained
+            "compute_fraction": sum(row["steps"] for row in rows) / total_steps if total_steps else None,
+        }
+
+    def list(self) -> List[Dict[str, Any]]:
+        return sorted((self.summary(sweep) for sweep in self.sweeps.values()),
+                      key=lambda summary: summary["created"], reverse=True)
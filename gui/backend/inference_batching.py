@@ -0,0 +1,146 @@
+"""
+Dynamic micro-batching of inference requests
+
+Concurrent generate requests for the same model are collected for a short
+window and run as one batched generation, then the results are handed back
+to each caller. Queue depth and batch sizes are recorded as histograms so
+max wait and max batch size can be tuned against latency.
+"""
+
+import asyncio
+import os
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+# Defaults, overridable through the environment
+DEFAULT_MAX_BATCH_SIZE = int(os.environ.get("MLX_GUI_BATCH_MAX_SIZE", "8"))
+DEFAULT_MAX_WAIT_MS = float(os.environ.get("MLX_GUI_BATCH_MAX_WAIT_MS", "10"))
+
+# Upper bounds of the queue depth histogram buckets; the last bucket is open
+QUEUE_DEPTH_BUCKETS = (1, 2, 4, 8, 16, 32, 64)
+
+BatchRunner = Callable[[List[Dict[str, Any]]], Awaitable[List[Dict[str, Any]]]]
+
+
+class Histogram:
+    """Counts of observed values in fixed upper-bound buckets"""
+
+    def __init__(self, bounds):
+        self.bounds = tuple(bounds)
+        self.counts = [0] * (len(self.bounds) + 1)
+        self.total = 0
+        self.count = 0
+
+    def observe(self, value: float):
+        for i, bound in enumerate(self.bounds):
+            if value <= bound:
+                self.counts[i] += 1
+                break
+        else:
+            self.counts[-1] += 1
+        self.total += value
+        self.count += 1
+
+    def to_dict(self) -> Dict[str, Any]:
+        labels = [f"<={bound}" for bound in self.bounds] + [f">{self.bounds[-1]}"]
+        return {
+            "buckets": dict(zip(labels, self.counts)),
+            "count": self.count,
+            "mean": self.total / self.count if self.count else None,
+        }
+
+
+class PendingRequest:
+    """One caller waiting for its slot in a batch"""
+
+    def __init__(self, params: Dict[str, Any]):
+        self.params = params
+        self.future: asyncio.Future = asyncio.get_running_loop().create_future()
+        self.enqueued_at = time.perf_counter()
+
+
+class MicroBatcher:
+    """Per-model request queue that dispatches batches to a runner"""
+
+    def __init__(self, run_batch: BatchRunner, max_batch_size: int = DEFAULT_MAX_BATCH_SIZE,
+                 max_wait_ms: float = DEFAULT_MAX_WAIT_MS):
+        self.run_batch = run_batch
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max(0.0, max_wait_ms) / 1000.0
+        self.pending: List[PendingRequest] = []
+        self.arrived = asyncio.Event()
+        self.task: Optional[asyncio.Task] = None
+        self.batch_sizes = Histogram(range(1, self.max_batch_size + 1))
+        self.queue_depths = Histogram(QUEUE_DEPTH_BUCKETS)
+        self.queue_wait_ms = Histogram((1, 5, 10, 25, 50, 100, 250, 1000))
+
+    @property
+    def depth(self) -> int:
+        return len(self.pending)
+
+    async def submit(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        """Queue one request and wait for its result"""
+        request = PendingRequest(params)
+        self.pending.append(request)
+        self.arrived.set()
+        if self.task is None or self.task.done():
+            self.task = asyncio.create_task(self._dispatch())
+        return await request.future
+
+    async def _dispatch(self):
+        while self.pending:
+            # Give concurrent callers a short window, counted from the oldest
+            # queued request, to join the batch
+            deadline = self.pending[0].enqueued_at + self.max_wait
+            while len(self.pending) < self.max_batch_size:
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    break
+                self.arrived.clear()
+                try:
+                    await asyncio.wait_for(self.arrived.wait(), timeout=remaining)
+                except asyncio.TimeoutError:
+                    break
+
+            self.queue_depths.observe(len(self.pending))
+            batch = self.pending[:self.max_batch_size]
+            del self.pending[:self.max_batch_size]
+            # Callers that gave up while queued don't take a slot
+            batch = [request for request in batch if not request.future.done()]
+            if not batch:
+                continue
+
+            dispatched_at = time.perf_counter()
+            for request in batch:
+                self.queue_wait_ms.observe((dispatched_at - request.enqueued_at) * 1000)
+            self.batch_sizes.observe(len(batch))
+
+            try:
+                results = await self.run_batch([request.params for request in batch])
+            except Exception as e:
+                for request in batch:
+                    if not request.future.done():
+                        request.future.set_exception(e)
+                continue
+
+            for request, result in zip(batch, results):
+                if not request.future.done():
+                    request.future.set_result(result)
+
+    def cancel(self):
+        if self.task:
+            self.task.cancel()
+        for request in self.pending:
+            if not request.future.done():
+                request.future.cancel()
+        self.pending.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "queue_depth": self.depth,
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait * 1000,
+            "batch_sizes": self.batch_sizes.to_dict(),
+            "queue_depths": self.queue_depths.to_dict(),
+            "queue_wait_ms": self.queue_wait_ms.to_dict(),
+        }
@@ -0,0 +1,469 @@
+"""
+Persistent inference worker pool
+
+Keeps long-lived inference_worker.py processes keyed by base model path
+so a model is loaded once and reused across requests; LoRA adapters are
+hot-swapped inside the worker per request. Residency is bounded by a
+memory budget with LRU eviction; idle workers are stopped after a timeout
+and dead ones are detected by health checks.
+"""
+
+import asyncio
+import itertools
+import json
+import logging
+import os
+import sys
+import time
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from pathlib import Path
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+from inference_batching import MicroBatcher, DEFAULT_MAX_BATCH_SIZE, DEFAULT_MAX_WAIT_MS
+from inference_worker import adapter_files
+
+logger = logging.getLogger(__name__)
+
+WORKER_SCRIPT = str(Path(__file__).parent / "inference_worker.py")
+
+# Defaults, overridable through the environment
+DEFAULT_BACKEND = os.environ.get("MLX_GUI_INFERENCE_BACKEND", "mlx")
+DEFAULT_MEMORY_BUDGET_MB = int(os.environ.get("MLX_GUI_INFERENCE_MEMORY_MB", "16384"))
+DEFAULT_IDLE_TIMEOUT = float(os.environ.get("MLX_GUI_INFERENCE_IDLE_TIMEOUT", "600"))
+HEALTH_CHECK_INTERVAL = 30.0
+
+# Worker replies can carry long completions
+WORKER_STREAM_LIMIT = 16 * 1024 * 1024
+
+WEIGHT_SUFFIXES = (".safetensors", ".npz", ".bin", ".gguf")
+
+
+class InferenceError(Exception):
+    """Raised when a worker fails to load or to serve a request"""
+
+
+def estimate_memory_mb(model_path: str) -> int:
+    """Estimate resident memory from weight file sizes plus runtime overhead"""
+    total = 0
+    try:
+        for entry in os.scandir(model_path):
+            if entry.is_file() and entry.name.endswith(WEIGHT_SUFFIXES):
+                total += entry.stat().st_size
+    except OSError:
+        pass
+    return max(64, int(total * 1.2 / (1024 * 1024)))
+
+
+def adapter_fingerprint(adapter_path: Optional[str]) -> Optional[Tuple[int, int]]:
+    """Identity of an adapter's weights, so workers reload it when replaced"""
+    weights_file, _ = adapter_files(adapter_path)
+    if not weights_file:
+        return None
+    try:
+        stat = os.stat(weights_file)
+        return (stat.st_mtime_ns, stat.st_size)
+    except OSError:
+        return None
+
+
+def adapter_fields(adapter_path: Optional[str]) -> Dict[str, Any]:
+    """Request fields telling a worker which adapter to attach"""
+    return {"adapter_path": adapter_path, "adapter_fingerprint": adapter_fingerprint(adapter_path)}
+
+
+class WorkerHandle:
+    """One resident worker process and its request channel"""
+
+    def __init__(self, model_path: str, memory_mb: int):
+        self.key = model_path
+        self.model_path = model_path
+        self.memory_mb = memory_mb
+        # Adapter currently attached in the worker
+        self.adapter_path: Optional[str] = None
+        self.adapter_swaps = 0
+        self.last_swap_ms: Optional[float] = None
+        self.process: Optional[asyncio.subprocess.Process] = None
+        self.lock = asyncio.Lock()
+        # Requests handed this worker by the pool, counted from before they
+        # take the lock, so eviction never stops a worker about to be used
+        self.users = 0
+        self.started_at = time.time()
+        self.last_used = time.monotonic()
+        self.load_time: Optional[float] = None
+        self.requests = 0
+        self._ids = itertools.count(1)
+
+    @property
+    def alive(self) -> bool:
+        return self.process is not None and self.process.returncode is None
+
+    @property
+    def busy(self) -> bool:
+        return self.users > 0 or self.lock.locked()
+
+    async def start(self, python_path: str, backend: str, load_timeout: float):
+        cmd = [python_path, WORKER_SCRIPT, "--model-path", self.model_path, "--backend", backend]
+        self.process = await asyncio.create_subprocess_exec(
+            *cmd,
+            stdin=asyncio.subprocess.PIPE,
+            stdout=asyncio.subprocess.PIPE,
+            limit=WORKER_STREAM_LIMIT
+        )
+        try:
+            ready = await self._read(load_timeout)
+        except Exception:
+            await self.stop()
+            raise
+        if not ready.get("ready"):
+            await self.stop()
+            raise InferenceError(f"Model load failed: {ready.get('error', 'unknown error')}")
+        self.load_time = ready.get("load_time")
+
+    async def _read(self, timeout: float) -> Dict[str, Any]:
+        line = await asyncio.wait_for(self.process.stdout.readline(), timeout=timeout)
+        if not line:
+            raise InferenceError(f"Inference worker exited (code {self.process.returncode})")
+        return json.loads(line)
+
+    async def _send(self, message: Dict[str, Any]):
+        self.process.stdin.write((json.dumps(message) + "\n").encode("utf-8"))
+        await self.process.stdin.drain()
+
+    async def send_request(self, message: Dict[str, Any]) -> int:
+        """Send a request and return its id (caller holds self.lock)"""
+        if not self.alive:
+            raise InferenceError("Inference worker is not running")
+        request_id = next(self._ids)
+        await self._send({**message, "id": request_id})
+        return request_id
+
+    async def read_reply(self, request_id: int, timeout: float) -> Dict[str, Any]:
+        """Next frame for request_id, skipping leftovers from abandoned requests"""
+        while True:
+            reply = await self._read(timeout)
+            if reply.get("id") == request_id:
+                return reply
+
+    async def request(self, message: Dict[str, Any], timeout: float) -> Dict[str, Any]:
+        """Send one request and wait for its reply (caller holds self.lock)"""
+        request_id = await self.send_request(message)
+        return await self.read_reply(request_id, timeout)
+
+    def note_adapter(self, adapter_path: Optional[str], reply: Dict[str, Any]):
+        """Track which adapter the worker has attached after a reply"""
+        if adapter_path != self.adapter_path:
+            self.adapter_swaps += 1
+            self.last_swap_ms = reply.get("adapter_swap_ms")
+        self.adapter_path = adapter_path
+
+    async def stop(self):
+        if not self.process:
+            return
+        if self.process.returncode is None:
+            try:
+                self.process.stdin.close()
+                await asyncio.wait_for(self.process.wait(), timeout=5)
+            except Exception:
+                self.process.kill()
+                await self.process.wait()
+
+    def info(self) -> Dict[str, Any]:
+        return {
+            "model_path": self.model_path,
+            "adapter_path": self.adapter_path,
+            "pid": self.process.pid if self.process else None,
+            "alive": self.alive,
+            "busy": self.busy,
+            "memory_mb": self.memory_mb,
+            "load_time": self.load_time,
+            "adapter_swaps": self.adapter_swaps,
+            "last_swap_ms": self.last_swap_ms,
+            "requests": self.requests,
+            "idle_seconds": round(time.monotonic() - self.last_used, 1),
+        }
+
+
+class InferencePool:
+    """LRU pool of resident inference workers under a memory budget"""
+
+    def __init__(
+        self,
+        python_path: Optional[str] = None,
+        backend: str = DEFAULT_BACKEND,
+        memory_budget_mb: int = DEFAULT_MEMORY_BUDGET_MB,
+        idle_timeout: float = DEFAULT_IDLE_TIMEOUT,
+        request_timeout: float = 300.0,
+        load_timeout: float = 300.0,
+        max_batch_size: int = DEFAULT_MAX_BATCH_SIZE,
+        max_wait_ms: float = DEFAULT_MAX_WAIT_MS,
+    ):
+        if not python_path or not os.path.exists(python_path):
+            python_path = sys.executable
+        self.python_path = python_path
+        self.backend = backend
+        self.memory_budget_mb = memory_budget_mb
+        self.idle_timeout = idle_timeout
+        self.request_timeout = request_timeout
+        self.load_timeout = load_timeout
+        self.max_batch_size = max_batch_size
+        self.max_wait_ms = max_wait_ms
+        self.workers: "OrderedDict[str, WorkerHandle]" = OrderedDict()
+        self._key_locks: Dict[str, asyncio.Lock] = {}
+        self.batchers: Dict[Tuple[str, Optional[str]], MicroBatcher] = {}
+        self._monitor_task: Optional[asyncio.Task] = None
+        self.loads = 0
+        self.evictions = 0
+
+    @property
+    def resident_mb(self) -> int:
+        return sum(worker.memory_mb for worker in self.workers.values())
+
+    async def generate(self, model_path: str, adapter_path: Optional[str], prompt: str,
+                       max_tokens: int = 100, temperature: float = 0.7) -> Dict[str, Any]:
+        """Run one generation, batched with concurrent requests for the same model/adapter"""
+        key = (model_path, adapter_path)
+        batcher = self.batchers.get(key)
+        if batcher is None:
+            batcher = MicroBatcher(
+                lambda batch: self._run_batch(key, batch),
+                max_batch_size=self.max_batch_size,
+                max_wait_ms=self.max_wait_ms
+            )
+            self.batchers[key] = batcher
+        reply = await batcher.submit({
+            "prompt": prompt,
+            "max_tokens": max_tokens,
+            "temperature": temperature
+        })
+        if not reply.get("ok"):
+            raise InferenceError(reply.get("error", "Generation failed"))
+        return reply
+
+    async def _run_batch(self, key: Tuple[str, Optional[str]],
+                         batch: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Run a batch of generate requests for one model/adapter, one reply per request"""
+        model_path, adapter_path = key
+        if len(batch) == 1:
+            message = {"op": "generate", **batch[0]}
+        else:
+            message = {"op": "generate_batch", "requests": batch}
+        message.update(adapter_fields(adapter_path))
+        async with self._lease(model_path) as worker, worker.lock:
+            try:
+                reply = await worker.request(message, self.request_timeout)
+            except asyncio.TimeoutError:
+                # Worker is still busy with the abandoned request; replace it
+                await self._remove(worker)
+                raise
+            if reply.get("ok"):
+                worker.note_adapter(adapter_path, reply)
+            worker.last_used = time.monotonic()
+            worker.requests += len(batch)
+        if len(batch) == 1 or not reply.get("ok"):
+            return [reply] * len(batch)
+        return reply["results"]
+
+    async def stream(self, model_path: str, adapter_path: Optional[str], prompt: str,
+                     max_tokens: int = 100, temperature: float = 0.7) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Yield {"token": text} frames as the worker produces them, then one
+        final frame with the full text, TTFT and tokens/sec.
+
+        Closing the generator early (client disconnect) cancels generation
+        on the worker; the worker is drained in the background before it
+        takes another request.
+        """
+        received = time.perf_counter()
+        worker = await self._acquire(model_path)
+        try:
+            await worker.lock.acquire()
+        except BaseException:
+            worker.users -= 1
+            raise
+        request_id = None
+        finished = False
+        try:
+            request_id = await worker.send_request({
+                "op": "stream",
+                "prompt": prompt,
+                "max_tokens": max_tokens,
+                "temperature": temperature,
+                **adapter_fields(adapter_path)
+            })
+            first_token_at = None
+            while True:
+                reply = await worker.read_reply(request_id, self.request_timeout)
+                if "token" in reply:
+                    if first_token_at is None:
+                        first_token_at = time.perf_counter()
+                    yield {"token": reply["token"]}
+                    continue
+
+                finished = True
+                if not reply.get("ok"):
+                    raise InferenceError(reply.get("error", "Generation failed"))
+                worker.note_adapter(adapter_path, reply)
+                worker.last_used = time.monotonic()
+                worker.requests += 1
+                generation_time = reply.get("generation_time") or 0.0
+                tokens = reply.get("tokens", 0)
+                yield {
+                    "done": True,
+                    "text": reply.get("text", ""),
+                    "tokens": tokens,
+                    # Measured from request receipt, so includes queueing and model load
+                    "ttft": first_token_at - received if first_token_at is not None else None,
+                    "generation_time": generation_time,
+                    "tokens_per_sec": tokens / generation_time if generation_time > 0 else None,
+                }
+                return
+        finally:
+            if finished or request_id is None:
+                worker.lock.release()
+                worker.users -= 1
+            else:
+                asyncio.create_task(self._abandon_stream(worker, request_id))
+
+    async def _abandon_stream(self, worker: WorkerHandle, request_id: int):
+        """Cancel an unfinished stream and wait for the worker to wind it down"""
+        try:
+            await worker._send({"op": "cancel", "target": request_id})
+            while True:
+                reply = await worker.read_reply(request_id, timeout=30)
+                if "token" not in reply:
+                    break
+            worker.last_used = time.monotonic()
+        except Exception as e:
+            logger.warning(f"Inference worker {worker.model_path} did not stop cleanly after cancel: {e}")
+            await self._remove(worker)
+        finally:
+            worker.lock.release()
+            worker.users -= 1
+
+    async def compare(self, model_path: str, adapter_paths: List[Optional[str]], prompt: str,
+                      max_tokens: int = 100, temperature: float = 0.7) -> List[Dict[str, Any]]:
+        """Run one prompt across several adapters on one resident base model"""
+        async with self._lease(model_path) as worker, worker.lock:
+            try:
+                reply = await worker.request({
+                    "op": "compare",
+                    "prompt": prompt,
+                    "max_tokens": max_tokens,
+                    "temperature": temperature,
+                    "variants": [adapter_fields(adapter_path) for adapter_path in adapter_paths]
+                }, self.request_timeout * max(1, len(adapter_paths)))
+            except asyncio.TimeoutError:
+                await self._remove(worker)
+                raise
+            worker.last_used = time.monotonic()
+            worker.requests += len(adapter_paths)
+            results = reply.get("results", [])
+            for adapter_path, result in zip(adapter_paths, results):
+                if result.get("ok"):
+                    worker.note_adapter(adapter_path, result)
+        if not reply.get("ok"):
+            raise InferenceError(reply.get("error", "Comparison failed"))
+        return results
+
+    async def _acquire(self, model_path: str) -> WorkerHandle:
+        """Resident worker for model_path, started if needed and marked in use
+        before the pool lock is released; the caller must decrement
+        ``worker.users`` when done (see ``_lease``)"""
+        self._ensure_monitor()
+        lock = self._key_locks.setdefault(model_path, asyncio.Lock())
+        async with lock:
+            worker = self.workers.get(model_path)
+            if worker and not worker.alive:
+                await self._remove(worker)
+                worker = None
+
+            if worker is None:
+                memory_mb = estimate_memory_mb(model_path)
+                await self._make_room(memory_mb)
+                worker = WorkerHandle(model_path, memory_mb)
+                logger.info(f"Starting inference worker for {model_path}")
+                await worker.start(self.python_path, self.backend, self.load_timeout)
+                self.workers[model_path] = worker
+                self.loads += 1
+
+            self.workers.move_to_end(model_path)
+            worker.last_used = time.monotonic()
+            worker.users += 1
+            return worker
+
+    @asynccontextmanager
+    async def _lease(self, model_path: str) -> AsyncIterator[WorkerHandle]:
+        """A worker for model_path that eviction skips until the block exits"""
+        worker = await self._acquire(model_path)
+        try:
+            yield worker
+        finally:
+            worker.users -= 1
+
+    async def _make_room(self, memory_mb: int):
+        """Evict least recently used idle workers until memory_mb fits the budget"""
+        for worker in list(self.workers.values()):
+            if self.resident_mb + memory_mb <= self.memory_budget_mb:
+                return
+            if worker.busy:
+                continue
+            logger.info(f"Evicting inference worker {worker.model_path} to stay within memory budget")
+            await self._remove(worker)
+            self.evictions += 1
+        if self.resident_mb + memory_mb > self.memory_budget_mb:
+            logger.warning(
+                f"Loading {memory_mb}MB model exceeds inference memory budget "
+                f"({self.resident_mb}MB resident of {self.memory_budget_mb}MB)"
+            )
+
+    async def _remove(self, worker: WorkerHandle):
+        if self.workers.get(worker.key) is worker:
+            del self.workers[worker.key]
+        await worker.stop()
+
+    def _ensure_monitor(self):
+        if self._monitor_task is None or self._monitor_task.done():
+            self._monitor_task = asyncio.create_task(self._monitor())
+
+    async def _monitor(self):
+        """Stop idle workers and drop ones that fail a health check"""
+        while True:
+            await asyncio.sleep(HEALTH_CHECK_INTERVAL)
+            for worker in list(self.workers.values()):
+                if worker.busy:
+                    continue
+                if time.monotonic() - worker.last_used > self.idle_timeout:
+                    logger.info(f"Stopping idle inference worker {worker.model_path}")
+                    await self._remove(worker)
+                    continue
+                try:
+                    async with worker.lock:
+                        await worker.request({"op": "ping"}, timeout=10)
+                except Exception as e:
+                    logger.warning(f"Inference worker {worker.model_path} failed health check: {e}")
+                    await self._remove(worker)
+
+    async def close(self):
+        if self._monitor_task:
+            self._monitor_task.cancel()
+            self._monitor_task = None
+        for batcher in self.batchers.values():
+            batcher.cancel()
+        self.batchers.clear()
+        for worker in list(self.workers.values()):
+            await self._remove(worker)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "backend": self.backend,
+            "workers": [worker.info() for worker in self.workers.values()],
+            "resident_mb": self.resident_mb,
+            "memory_budget_mb": self.memory_budget_mb,
+            "loads": self.loads,
+            "evictions": self.evictions,
+            "batching": [
+                {"model_path": model_path, "adapter_path": adapter_path, **batcher.stats()}
+                for (model_path, adapter_path), batcher in self.batchers.items()
+            ],
+        }
@@ -0,0 +1,383 @@
+#!/usr/bin/env python3
+"""
+Long-lived inference worker
+
+Loads one base model once and serves generation requests as JSON lines on
+stdin/stdout until told to exit. LoRA adapters are hot-swapped on the
+resident base weights per request, so base-only, best and latest
+checkpoints are all served by one loaded model. Spawned and managed by
+inference_pool.InferencePool.
+
+Generation requests carry "adapter_path" (an adapter directory, a
+.safetensors file inside one, or null for the base model) and an
+"adapter_fingerprint" that changes whenever the weights file does.
+
+Ops:
+    generate        - one reply with the full completion
+    generate_batch  - one reply with a result per request in "requests"
+    stream          - {"id", "token"} frames, then a final {"id", "done": true} reply
+    compare         - one prompt across every adapter in "variants"
+    cancel          - stop the stream whose id is "target" after its current token
+    ping/exit
+
+Backends:
+    mlx   - mlx_lm on Apple Silicon
+    stub  - deterministic echo generator with no ML dependencies, for
+            exercising the pool on Linux/CI
+"""
+
+import argparse
+import json
+import os
+import queue
+import sys
+import threading
+import time
+from collections import OrderedDict
+from typing import Iterator, List, Optional, Tuple
+
+ADAPTER_WEIGHTS_FILE = "adapters.safetensors"
+ADAPTER_CONFIG_FILE = "adapter_config.json"
+
+# Adapter weight sets kept in memory for instant switching
+MAX_CACHED_ADAPTERS = 8
+
+
+def adapter_files(adapter_path: Optional[str]) -> Tuple[Optional[str], Optional[str]]:
+    """(weights file, config file) for an adapter directory or weights file"""
+    if not adapter_path:
+        return None, None
+    if adapter_path.endswith(".safetensors"):
+        return adapter_path, os.path.join(os.path.dirname(adapter_path), ADAPTER_CONFIG_FILE)
+    return (os.path.join(adapter_path, ADAPTER_WEIGHTS_FILE),
+            os.path.join(adapter_path, ADAPTER_CONFIG_FILE))
+
+
+class StubBackend:
+    """Echoes the prompt back word by word; load and token delays are configurable"""
+
+    def __init__(self, model_path: str):
+        self.model_path = model_path
+        self.adapter_path: Optional[str] = None
+        self.token_delay = float(os.environ.get("MLX_GUI_STUB_TOKEN_DELAY", "0"))
+        time.sleep(float(os.environ.get("MLX_GUI_STUB_LOAD_DELAY", "0")))
+
+    def set_adapter(self, adapter_path: Optional[str], fingerprint):
+        if adapter_path and not os.path.exists(adapter_files(adapter_path)[0]):
+            raise FileNotFoundError(f"Adapter weights not found: {adapter_path}")
+        self.adapter_path = adapter_path
+
+    def stream(self, prompt: str, max_tokens: int, temperature: float) -> Iterator[str]:
+        tag = os.path.basename(self.model_path.rstrip("/"))
+        if self.adapter_path:
+            tag += "+" + os.path.basename(self.adapter_path.rstrip("/"))
+        words = [f"[{tag}]"] + prompt.split()
+        for i, word in enumerate(words[:max_tokens]):
+            if self.token_delay:
+                time.sleep(self.token_delay)
+            yield word if i == 0 else " " + word
+
+    def generate_batch(self, requests: List[dict]) -> List[str]:
+        """Decode all requests in lockstep: one token delay per step for the whole batch"""
+        streams = [self.stream(r["prompt"], r["max_tokens"], 0.0) for r in requests]
+        delay, self.token_delay = self.token_delay, 0.0
+        try:
+            texts = [""] * len(streams)
+            active = list(range(len(streams)))
+            while active:
+                if delay:
+                    time.sleep(delay)
+                for i in list(active):
+                    piece = next(streams[i], None)
+                    if piece is None:
+                        active.remove(i)
+                    else:
+                        texts[i] += piece
+            return texts
+        finally:
+            self.token_delay = delay
+
+
+class MLXBackend:
+    """mlx_lm base model with hot-swappable LoRA adapters"""
+
+    def __init__(self, model_path: str):
+        self.model_path = model_path
+        self._load_base()
+        # Weight sets by (weights file, fingerprint), most recently used last
+        self._adapter_weights: "OrderedDict[tuple, list]" = OrderedDict()
+
+    def _load_base(self):
+        from mlx_lm import load
+
+        self.model, self.tokenizer = load(self.model_path)
+        # LoRA layer layout currently patched into the model, and the
+        # adapter whose weights are loaded into it
+        self.lora_layout: Optional[str] = None
+        self.adapter: Optional[tuple] = None
+        self._detach_weights: Optional[list] = None
+
+    def _apply_lora_layers(self, config: dict, layout: str):
+        import mlx.core as mx
+        from mlx.utils import tree_flatten
+        from mlx_lm.tuner.utils import linear_to_lora_layers
+
+        num_layers = config.get("num_layers", config.get("lora_layers"))
+        use_dora = config.get("fine_tune_type") == "dora"
+        try:
+            linear_to_lora_layers(self.model, num_layers, config["lora_parameters"], use_dora=use_dora)
+        except TypeError:
+            # Older mlx_lm without DoRA support
+            linear_to_lora_layers(self.model, num_layers, config["lora_parameters"])
+        self.model.eval()
+        self.lora_layout = layout
+
+        # Zeroed lora_b makes every LoRA layer an identity on the base output
+        self._detach_weights = None if use_dora else [
+            (name, mx.zeros_like(value))
+            for name, value in tree_flatten(self.model.parameters())
+            if name.endswith("lora_b")
+        ]
+
+    def set_adapter(self, adapter_path: Optional[str], fingerprint):
+        import mlx.core as mx
+
+        weights_file, config_file = adapter_files(adapter_path)
+        wanted = (weights_file, tuple(fingerprint or ())) if weights_file else None
+        if wanted == self.adapter:
+            return
+
+        if wanted is None:
+            if self.lora_layout is not None:
+                if self._detach_weights is None:
+                    # DoRA magnitudes can't be neutralised in place
+                    self._load_base()
+                else:
+                    self.model.load_weights(self._detach_weights, strict=False)
+                    mx.eval(self.model.parameters())
+            self.adapter = None
+            return
+
+        with open(config_file, 'r') as f:
+            config = json.load(f)
+        layout = json.dumps({
+            key: config.get(key)
+            for key in ("fine_tune_type", "num_layers", "lora_layers", "lora_parameters")
+        }, sort_keys=True)
+        if self.lora_layout is not None and layout != self.lora_layout:
+            # Different rank/targets: start again from clean base weights
+            self._load_base()
+        if self.lora_layout is None:
+            self._apply_lora_layers(config, layout)
+
+        weights = self._adapter_weights.get(wanted)
+        if weights is None:
+            weights = list(mx.load(weights_file).items())
+            self._adapter_weights[wanted] = weights
+            while len(self._adapter_weights) > MAX_CACHED_ADAPTERS:
+                self._adapter_weights.popitem(last=False)
+        self._adapter_weights.move_to_end(wanted)
+
+        self.model.load_weights(weights, strict=False)
+        mx.eval(self.model.parameters())
+        self.adapter = wanted
+
+    def _sampler_kwargs(self, temperature: float):
+        try:
+            from mlx_lm.sample_utils import make_sampler
+            return {"sampler": make_sampler(temp=temperature)}
+        except ImportError:
+            return {"temp": temperature}
+
+    def stream(self, prompt: str, max_tokens: int, temperature: float) -> Iterator[str]:
+        try:
+            from mlx_lm import stream_generate
+        except ImportError:
+            stream_generate = None
+
+        if stream_generate is None:
+            from mlx_lm import generate
+            yield generate(self.model, self.tokenizer, prompt=prompt, max_tokens=max_tokens)
+            return
+
+        try:
+            chunks = stream_generate(self.model, self.tokenizer, prompt, max_tokens=max_tokens,
+                                     **self._sampler_kwargs(temperature))
+        except TypeError:
+            # Older mlx_lm without sampler/temp keywords
+            chunks = stream_generate(self.model, self.tokenizer, prompt, max_tokens=max_tokens)
+        for chunk in chunks:
+            # Newer versions yield response objects, older ones plain strings
+            yield getattr(chunk, "text", chunk)
+
+    def generate_batch(self, requests: List[dict]) -> List[str]:
+        """One batched decode via mlx_lm.batch_generate when available and applicable"""
+        try:
+            from mlx_lm import batch_generate
+        except ImportError:
+            batch_generate = None
+
+        temperatures = {r["temperature"] for r in requests}
+        if batch_generate is None or len(temperatures) != 1:
+            # Mixed sampling settings can't share one batch; run them in turn
+            return ["".join(self.stream(r["prompt"], r["max_tokens"], r["temperature"])) for r in requests]
+
+        prompts = [self.tokenizer.encode(r["prompt"]) for r in requests]
+        response = batch_generate(
+            self.model, self.tokenizer, prompts,
+            max_tokens=[r["max_tokens"] for r in requests],
+            **self._sampler_kwargs(temperatures.pop())
+        )
+        return list(response.texts)
+
+
+BACKENDS = {
+    "mlx": MLXBackend,
+    "stub": StubBackend,
+}
+
+
+def read_requests(requests: "queue.Queue", cancelled: set):
+    """Read stdin on a thread so cancel ops arrive while a stream is running"""
+    for line in sys.stdin:
+        try:
+            request = json.loads(line)
+        except json.JSONDecodeError:
+            continue
+        if request.get("op") == "cancel":
+            cancelled.add(request.get("target"))
+        else:
+            requests.put(request)
+    requests.put(None)
+
+
+def switch_adapter(backend, adapter_path: Optional[str], fingerprint) -> float:
+    """Attach the requested adapter (or none); returns the swap time in ms"""
+    started = time.perf_counter()
+    backend.set_adapter(adapter_path, fingerprint)
+    return (time.perf_counter() - started) * 1000
+
+
+def run_generation(backend, request, send, cancelled: set, stream: bool):
+    """Generate for one request, optionally forwarding each token as it arrives"""
+    request_id = request.get("id")
+    started = time.perf_counter()
+    first_token = None
+    pieces = []
+    was_cancelled = False
+    for piece in backend.stream(
+        request.get("prompt", ""),
+        int(request.get("max_tokens", 100)),
+        float(request.get("temperature", 0.7))
+    ):
+        if first_token is None:
+            first_token = time.perf_counter()
+        pieces.append(piece)
+        if stream:
+            send({"id": request_id, "token": piece})
+        if request_id in cancelled:
+            was_cancelled = True
+            break
+    cancelled.discard(request_id)
+
+    return {
+        "id": request_id,
+        "ok": True,
+        "done": True,
+        "text": "".join(pieces),
+        "tokens": len(pieces),
+        "cancelled": was_cancelled,
+        "ttft": first_token - started if first_token is not None else None,
+        "generation_time": time.perf_counter() - started
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="MLX GUI inference worker")
+    parser.add_argument("--model-path", required=True)
+    parser.add_argument("--backend", choices=sorted(BACKENDS), default="mlx")
+    args = parser.parse_args()
+
+    # Protocol goes to the real stdout; anything libraries print goes to stderr
+    protocol = os.fdopen(os.dup(sys.stdout.fileno()), "w", buffering=1)
+    sys.stdout = sys.stderr
+
+    def send(message):
+        protocol.write(json.dumps(message) + "\n")
+
+    start = time.perf_counter()
+    try:
+        backend = BACKENDS[args.backend](args.model_path)
+    except Exception as e:
+        send({"ready": False, "error": f"{type(e).__name__}: {e}"})
+        return 1
+    send({"ready": True, "load_time": time.perf_counter() - start, "pid": os.getpid()})
+
+    requests: "queue.Queue" = queue.Queue()
+    cancelled: set = set()
+    threading.Thread(target=read_requests, args=(requests, cancelled), daemon=True).start()
+
+    while True:
+        request = requests.get()
+        if request is None:
+            break
+
+        request_id = request.get("id")
+        op = request.get("op")
+        if op == "ping":
+            send({"id": request_id, "ok": True})
+        elif op == "exit":
+            send({"id": request_id, "ok": True})
+            break
+        elif op == "generate_batch":
+            started = time.perf_counter()
+            try:
+                swap_ms = switch_adapter(backend, request.get("adapter_path"), request.get("adapter_fingerprint"))
+                batch = [{
+                    "prompt": r.get("prompt", ""),
+                    "max_tokens": int(r.get("max_tokens", 100)),
+                    "temperature": float(r.get("temperature", 0.7))
+                } for r in request.get("requests", [])]
+                texts = backend.generate_batch(batch)
+                generation_time = time.perf_counter() - started
+                send({
+                    "id": request_id,
+                    "ok": True,
+                    "adapter_swap_ms": swap_ms,
+                    "results": [
+                        {"ok": True, "text": text, "generation_time": generation_time, "batch_size": len(batch)}
+                        for text in texts
+                    ]
+                })
+            except Exception as e:
+                send({"id": request_id, "ok": False, "error": f"{type(e).__name__}: {e}"})
+        elif op in ("generate", "stream"):
+            try:
+                swap_ms = switch_adapter(backend, request.get("adapter_path"), request.get("adapter_fingerprint"))
+                reply = run_generation(backend, request, send, cancelled, stream=op == "stream")
+                send({**reply, "adapter_swap_ms": swap_ms})
+            except Exception as e:
+                send({"id": request_id, "ok": False, "done": True, "error": f"{type(e).__name__}: {e}"})
+        elif op == "compare":
+            results = []
+            for variant in request.get("variants", []):
+                try:
+                    swap_ms = switch_adapter(backend, variant.get("adapter_path"), variant.get("adapter_fingerprint"))
+                    reply = run_generation(backend, request, send, cancelled, stream=False)
+                    reply.pop("id")
+                    results.append({**reply, "adapter_path": variant.get("adapter_path"), "adapter_swap_ms": swap_ms})
+                except Exception as e:
+                    results.append({
+                        "ok": False,
+                        "adapter_path": variant.get("adapter_path"),
+                        "error": f"{type(e).__name__}: {e}"
+                    })
+            send({"id": request_id, "ok": True, "results": results})
+        else:
+            send({"id": request_id, "ok": False, "error": f"Unknown op: {op}"})
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
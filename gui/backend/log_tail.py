@@ -0,0 +1,85 @@
+"""
+Offset-based log tailing
+
+Reads the end of a log file, or the bytes appended since a cursor, without
+scanning the whole file, so a fetch costs the same at 1 MB and at 5 GB.
+"""
+
+import os
+from typing import Dict, Any, List, Optional
+
+# Block size used when seeking backwards from EOF
+TAIL_BLOCK_SIZE = 64 * 1024
+
+# Upper bound on bytes returned by one offset read
+MAX_READ_BYTES = 1024 * 1024
+
+
+def tail_lines(path: str, count: int) -> Dict[str, Any]:
+    """
+    Return the last ``count`` lines of a file and the EOF offset.
+
+    Reads fixed-size blocks backwards from EOF until enough newlines have
+    been seen, so cost depends on ``count``, not on file size.
+    """
+    with open(path, 'rb') as f:
+        f.seek(0, os.SEEK_END)
+        end = f.tell()
+        position = end
+        buffer = b""
+        # One extra newline: the last line usually ends with one
+        while position > 0 and buffer.count(b"\n") <= count:
+            read_size = min(TAIL_BLOCK_SIZE, position)
+            position -= read_size
+            f.seek(position)
+            buffer = f.read(read_size) + buffer
+
+    lines = buffer.decode("utf-8", errors="replace").splitlines(keepends=True)
+    if position > 0 and lines:
+        # First line may be partial when we stopped mid-file
+        lines = lines[1:]
+    # Cursor stops after the last complete line so a line still being
+    # written is re-read whole by the next offset call
+    partial = len(buffer) - (buffer.rfind(b"\n") + 1)
+    return {"logs": lines[-count:] if count > 0 else [], "offset": end - partial}
+
+
+def read_from_offset(path: str, offset: int, max_bytes: int = MAX_READ_BYTES) -> Dict[str, Any]:
+    """
+    Return complete lines appended since ``offset`` and the next cursor.
+
+    A trailing partial line is left for the next read. If the file shrank
+    below the cursor (rotated or truncated) reading restarts from 0 and
+    ``reset`` is set.
+    """
+    size = os.path.getsize(path)
+    reset = False
+    if offset < 0 or offset > size:
+        offset = 0
+        reset = True
+
+    with open(path, 'rb') as f:
+        f.seek(offset)
+        data = f.read(max_bytes)
+
+    complete = data.rfind(b"\n") + 1
+    if complete == 0 and len(data) == max_bytes:
+        # A single line longer than max_bytes: hand it over in pieces
+        complete = len(data)
+    data = data[:complete]
+
+    next_offset = offset + len(data)
+    lines: List[str] = data.decode("utf-8", errors="replace").splitlines(keepends=True)
+    return {
+        "logs": lines,
+        "offset": next_offset,
+        "reset": reset,
+        "more": next_offset < size,
+    }
+
+
+def file_size(path: str) -> Optional[int]:
+    try:
+        return os.path.getsize(path)
+    except OSError:
+        return None
@@ -5,23 +5,47 @@ This FastAPI server provides REST endpoints and WebSocket connections
 for the MLX fine-tuning GUI application.
 """
 
-from fastapi import FastAPI, WebSocket, WebSocketDisconnect, HTTPException, BackgroundTasks
+from fastapi import FastAPI, WebSocket, WebSocketDisconnect, HTTPException, BackgroundTasks, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse, JSONResponse, Response
 from fastapi.staticfiles import StaticFiles
 import asyncio
 import json
 import os
 import sys
-import subprocess
 import signal
 import time
-from typing import Dict, List, Optional, Any
+from typing import Awaitable, Callable, Dict, List, Optional, Any, Set, Tuple
 from pathlib import Path
 from dataclasses import dataclass, asdict
 from datetime import datetime
 import logging
+import re
 import uuid
 
+import repo_root  # noqa: F401  (puts the repository root on sys.path for the cli package)
+from metrics_store import MetricsStore, DOWNSAMPLE_METHODS
+from websocket_hub import WebSocketHub
+from progress_stream import ProgressStream
+from log_tail import tail_lines, read_from_offset, file_size
+from session_catalog import SessionCatalog
+from inference_pool import InferencePool, InferenceError
+from response_cache import ResponseCache, is_deterministic
+from model_registry import ModelRegistry
+from training_queue import TrainingScheduler, TrainingJob, estimate_training_memory_mb
+from hyperparameter_sweep import SweepManager, STRATEGIES, DEFAULT_ETA
+from session_recovery import (
+    ResumePoint, AUTO_RESUME, find_resume_point, restore_best_model, replay_metric_journal
+)
+from checkpoint_manifest import (
+    set_best_checkpoint, resolve_checkpoint, list_step_checkpoints, best_checkpoint_step, CHECKPOINT_KINDS
+)
+from checkpoint_retention import RetentionPolicy, collect_checkpoints, empty_retention_stats
+from session_journal import (
+    SessionJournal, load_session_record, atomic_write_json, journal_path,
+    EVENT_CONFIG, EVENT_METRICS, EVENT_STATE, EVENT_BEST_MODEL, EVENT_CHECKPOINTS
+)
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -29,6 +53,26 @@ logger = logging.getLogger(__name__)
 # Add the parent directory to path to import existing modules
 sys.path.append('/Users/macbook2024/Library/CloudStorage/Dropbox/AAA Backup/A Working/Arjun LLM Writing/local_qwen/one_step_finetune')
 
+# Patterns to extract metrics from training output
+STEP_PATTERN = re.compile(r'Iter (\d+):')
+LOSS_PATTERN = re.compile(r'Train loss ([0-9.]+)')
+VAL_PATTERN = re.compile(r'Val loss\s+([0-9.]+)')
+LR_PATTERN = re.compile(r'Learning Rate ([0-9.e-]+)')
+SAVE_PATTERN = re.compile(r'Saved adapter weights')
+
+# Max bytes pulled from the trainer's stdout per read
+OUTPUT_READ_CHUNK_SIZE = 64 * 1024
+
+# Interpreter with mlx_lm installed, used for inference workers
+INFERENCE_PYTHON = '/Users/macbook2024/Library/CloudStorage/Dropbox/AAA Backup/A Working/Arjun LLM Writing/local_qwen/.venv/bin/python'
+
+# Seconds between checks for new log data in follow mode
+LOG_FOLLOW_INTERVAL = 0.5
+
+# Env var naming the inherited fd the trainer writes JSON-lines metrics to.
+# Must match cli.metrics.METRICS_FD_ENV.
+METRICS_FD_ENV = "MLX_FINETUNE_METRICS_FD"
+
 app = FastAPI(title="MLX Fine-Tuning GUI API", version="1.0.0")
 
 # CORS middleware for development
@@ -48,6 +92,7 @@ class TrainingConfig:
     val_data_path: str
     learning_rate: float = 1e-5
     batch_size: int = 1
+    gradient_accumulation_steps: int = 1
     max_seq_length: int = 1024
     iterations: int = 7329
     steps_per_report: int = 25
@@ -60,28 +105,76 @@ class TrainingConfig:
 class TrainingManager:
     """Manages training processes and state"""
     
-    def __init__(self):
-        self.current_process: Optional[subprocess.Popen] = None
-        self.training_state = "idle"  # idle, running, paused, completed, error
+    def __init__(self, run_name: Optional[str] = None, shared: Optional["TrainingManager"] = None):
+        """With ``run_name``, a background runner for a queued job: it writes
+        its own log and trainer config, shares the session catalog, metric
+        history and WebSocket hub of the ``shared`` (primary) manager, and
+        tags everything it broadcasts with the job id."""
+        self.current_process: Optional[asyncio.subprocess.Process] = None
+        self.training_state = "idle"  # idle, running, paused, completed, error, interrupted
         self.current_config: Optional[TrainingConfig] = None
         self.training_metrics: Dict[str, Any] = {}
-        self.websocket_clients: List[WebSocket] = []
+        self.job_id = run_name
+        self.websocket_hub = shared.websocket_hub if shared else WebSocketHub()
+        self.progress_stream = ProgressStream(self._publish)
         self.output_dir = "/Users/macbook2024/Library/CloudStorage/Dropbox/AAA Backup/A Working/Arjun LLM Writing/local_qwen/artifacts/lora_adapters"
         self.log_file = "/Users/macbook2024/Library/CloudStorage/Dropbox/AAA Backup/A Working/Arjun LLM Writing/local_qwen/logs/gui_training.log"
+        self.config_path = "/tmp/gui_training_config.yaml"
+        if run_name:
+            self.log_file = self.log_file.replace(".log", f"_{run_name}.log")
+            self.config_path = f"/tmp/gui_training_config_{run_name}.yaml"
         self.sessions_dir = "/Users/macbook2024/Library/CloudStorage/Dropbox/AAA Backup/A Working/Arjun LLM Writing/local_qwen/sessions"
         self.current_session_id: Optional[str] = None
+        self.journal: Optional[SessionJournal] = None
+        
+        # Structured metrics channel; once a record arrives, log regexes are skipped
+        self.metrics_task: Optional[asyncio.Task] = None
+        self.structured_metrics = False
+        
+        # Runs until output, metrics and final retention are all handled
+        self.monitor_task: Optional[asyncio.Task] = None
+        
+        # Set by stop_training so the monitor reports a stop, not a crash
+        self.stop_requested = False
+        
+        # Called with (step, val_loss) on every evaluation, e.g. by a sweep
+        self.val_loss_listener: Optional[Callable[[int, float], Awaitable[None]]] = None
+        
+        # Set when the latest session was cut short and can resume from a checkpoint
+        self.resume_point: Optional[ResumePoint] = None
         
         # Best model tracking
         self.best_val_loss: Optional[float] = None
         self.best_model_step: Optional[int] = None
         self.best_model_path: Optional[str] = None
         
+        # Checkpoint retention, run in the background after each save
+        self.retention_policy = RetentionPolicy.from_env()
+        self.retention_task: Optional[asyncio.Task] = None
+        self.retention_pending = False
+        self.checkpoint_stats: Dict[str, Any] = empty_retention_stats(self.retention_policy)
+        
         # Ensure sessions directory exists
         os.makedirs(self.sessions_dir, exist_ok=True)
         
+        if shared:
+            self.metrics_store = shared.metrics_store
+            self.session_catalog = shared.session_catalog
+            return
+        
+        # Per-session metric history for charts
+        self.metrics_store = MetricsStore(self.sessions_dir)
+        
+        # Indexed session summaries, migrated from the JSON files on first run
+        self.session_catalog = SessionCatalog(self.sessions_dir)
+        
         # Load the most recent session on startup
         self.load_latest_session()
     
+    def is_active(self) -> bool:
+        """True from process start until its monitoring has finished"""
+        return self.monitor_task is not None and not self.monitor_task.done()
+    
     async def _save_best_model(self, step: int):
         """Save the current checkpoint as the best model"""
         try:
@@ -89,16 +182,16 @@ class TrainingManager:
                 return
                 
             adapter_dir = os.path.join(self.output_dir, self.current_config.adapter_name)
-            step_file = os.path.join(adapter_dir, f"{step:07d}_adapters.safetensors")
-            best_file = os.path.join(adapter_dir, "best_adapters.safetensors")
             
-            # Copy the current step checkpoint as the best model
-            if os.path.exists(step_file):
-                import shutil
-                shutil.copy2(step_file, best_file)
+            # Point the manifest at the current step checkpoint; no data copy
+            best_file = set_best_checkpoint(adapter_dir, step, self.best_val_loss)
+            if best_file:
                 self.best_model_path = best_file
                 logger.info(f"Saved best model from step {step} with val_loss {self.best_val_loss:.4f}")
                 
+                # Responses generated with the previous best adapter are stale
+                response_cache.invalidate_adapter(adapter_dir)
+                
                 # Broadcast best model update
                 await self.broadcast({
                     "type": "best_model_updated",
@@ -111,8 +204,58 @@ class TrainingManager:
         except Exception as e:
             logger.error(f"Failed to save best model: {e}")
     
+    def _schedule_retention(self):
+        """Run checkpoint retention in the background, coalescing requests"""
+        if self.retention_task and not self.retention_task.done():
+            self.retention_pending = True
+            return
+        self.retention_task = asyncio.create_task(self._run_retention())
+    
+    async def _run_retention(self):
+        """Apply the retention policy to the current adapter directory"""
+        while True:
+            self.retention_pending = False
+            if not self.current_config:
+                return
+            adapter_dir = os.path.join(self.output_dir, self.current_config.adapter_name)
+            try:
+                # The best val loss can be reported before its step file is
+                # written; pin it now so retention never deletes it
+                if self.best_model_step is not None and best_checkpoint_step(adapter_dir) != self.best_model_step:
+                    best_file = set_best_checkpoint(adapter_dir, self.best_model_step, self.best_val_loss)
+                    if best_file:
+                        self.best_model_path = best_file
+                
+                report = await asyncio.to_thread(collect_checkpoints, adapter_dir, self.retention_policy)
+            except Exception as e:
+                logger.error(f"Checkpoint retention failed: {e}")
+                return
+            
+            stats = self.checkpoint_stats
+            stats["disk_bytes"] = report["disk_bytes"]
+            stats["checkpoint_files"] = report["checkpoint_files"]
+            stats["reclaimed_bytes"] += report["reclaimed_bytes"]
+            stats["deleted_files"] += report["deleted_files"]
+            stats["runs"] += 1
+            stats["last_run"] = report["time"]
+            if report["deleted_files"]:
+                self._journal(EVENT_CHECKPOINTS, stats)
+            
+            if not self.retention_pending:
+                return
+    
+    def _journal(self, event_type: str, data: Dict[str, Any]):
+        """Append an event to the current session journal, compacting when due"""
+        if not self.journal:
+            return
+        try:
+            if self.journal.append(event_type, data):
+                self.save_session()
+        except Exception as e:
+            logger.error(f"Failed to append to session journal: {e}")
+    
     def save_session(self):
-        """Save current training session to persistent storage"""
+        """Write a compacted snapshot of the current session"""
         if not self.current_config or not self.training_metrics:
             return
             
@@ -120,6 +263,10 @@ class TrainingManager:
             # Generate session ID if not already set
             if not self.current_session_id:
                 self.current_session_id = str(uuid.uuid4())
+            if not self.journal or self.journal.session_id != self.current_session_id:
+                if self.journal:
+                    self.journal.close()
+                self.journal = SessionJournal(self.sessions_dir, self.current_session_id)
             
             session_data = {
                 "session_id": self.current_session_id,
@@ -132,17 +279,22 @@ class TrainingManager:
                     "val_loss": self.best_val_loss,
                     "step": self.best_model_step,
                     "path": self.best_model_path
-                } if self.best_val_loss is not None else None
+                } if self.best_val_loss is not None else None,
+                "checkpoints": self.checkpoint_stats
             }
             
-            session_file = os.path.join(self.sessions_dir, f"session_{self.current_session_id}.json")
-            with open(session_file, 'w') as f:
-                json.dump(session_data, f, indent=2)
+            self.metrics_store.save(self.current_session_id)
             
-            # Update latest session pointer
-            latest_file = os.path.join(self.sessions_dir, "latest.json")
-            with open(latest_file, 'w') as f:
-                json.dump({"latest_session_id": self.current_session_id}, f)
+            # Snapshot via temp file + rename, then start a fresh journal
+            self.journal.snapshot(session_data)
+            
+            # Update latest session pointer; background jobs never take over
+            # the run the Training page shows
+            if not self.job_id:
+                latest_file = os.path.join(self.sessions_dir, "latest.json")
+                atomic_write_json(latest_file, {"latest_session_id": self.current_session_id})
+            
+            self.session_catalog.upsert(session_data)
                 
             logger.info(f"Saved training session: {self.current_session_id}")
             
@@ -152,14 +304,12 @@ class TrainingManager:
     def load_session(self, session_id: str) -> bool:
         """Load a specific training session"""
         try:
-            session_file = os.path.join(self.sessions_dir, f"session_{session_id}.json")
-            if not os.path.exists(session_file):
-                logger.warning(f"Session file not found: {session_file}")
+            # Snapshot plus any journal events written after it
+            session_data = load_session_record(self.sessions_dir, session_id)
+            if not session_data:
+                logger.warning(f"Session not found: {session_id}")
                 return False
             
-            with open(session_file, 'r') as f:
-                session_data = json.load(f)
-            
             # Restore training configuration
             config_data = session_data["config"]
             self.current_config = TrainingConfig(**config_data)
@@ -168,6 +318,11 @@ class TrainingManager:
             self.training_metrics = session_data["metrics"]
             self.training_state = session_data["training_state"]
             self.current_session_id = session_data["session_id"]
+            self.checkpoint_stats = session_data.get("checkpoints") or empty_retention_stats(self.retention_policy)
+            best_model = session_data.get("best_model") or {}
+            self.best_val_loss = best_model.get("val_loss")
+            self.best_model_step = best_model.get("step")
+            self.best_model_path = best_model.get("path")
             
             logger.info(f"Loaded training session: {session_id}")
             return True
@@ -194,52 +349,84 @@ class TrainingManager:
                     logger.info(f"Restored previous training session: {session_id}")
                     # Only restore if training was completed
                     if self.training_state not in ["completed", "error", "stopped"]:
-                        self.training_state = "idle"
-                        logger.info("Previous session was not completed, reset to idle state")
+                        self._detect_interrupted_session()
                 else:
                     logger.warning("Failed to restore previous session")
             
         except Exception as e:
             logger.error(f"Failed to load latest session: {e}")
     
+    def _detect_interrupted_session(self):
+        """Offer a resume for a latest session that never finished"""
+        session_data = load_session_record(self.sessions_dir, self.current_session_id)
+        self.resume_point = find_resume_point(session_data) if session_data else None
+        if not self.resume_point:
+            self.training_state = "idle"
+            logger.info("Previous session was not completed, reset to idle state")
+            return
+        
+        # Fold journaled metric points into the history before the snapshot
+        # below starts a fresh journal
+        replay_metric_journal(self.metrics_store.get(self.current_session_id), self.sessions_dir, self.current_session_id)
+        self.training_state = "interrupted"
+        self.save_session()
+        logger.info(
+            f"Previous session was interrupted; it can resume from step {self.resume_point.step} "
+            f"({os.path.basename(self.resume_point.checkpoint)})"
+        )
+    
+    def recovery_point(self, session_id: Optional[str] = None) -> Optional[ResumePoint]:
+        """Resume point of an interrupted session (default: the latest one)"""
+        if session_id is None or (self.resume_point and self.resume_point.session_id == session_id):
+            return self.resume_point
+        session_data = load_session_record(self.sessions_dir, session_id)
+        return find_resume_point(session_data) if session_data else None
+    
+    async def resume_training(self, resume: ResumePoint) -> bool:
+        """Continue an interrupted session from its resume checkpoint"""
+        session_data = load_session_record(self.sessions_dir, resume.session_id)
+        if not session_data:
+            raise HTTPException(status_code=404, detail="Session not found")
+        return await self.start_training(TrainingConfig(**session_data["config"]), resume=resume)
+    
+    def _restore_resumed_session(self, resume: ResumePoint):
+        """Reload metrics, history and best model of a session up to the resume step"""
+        session_data = load_session_record(self.sessions_dir, resume.session_id) or {}
+        self.current_session_id = resume.session_id
+        
+        series = self.metrics_store.get(resume.session_id)
+        replay_metric_journal(series, self.sessions_dir, resume.session_id)
+        series.truncate(resume.step)
+        
+        best_model = restore_best_model(session_data, resume) or {}
+        self.best_val_loss = best_model.get("val_loss")
+        self.best_model_step = best_model.get("step")
+        self.best_model_path = best_model.get("path")
+        self.checkpoint_stats = session_data.get("checkpoints") or empty_retention_stats(self.retention_policy)
+        
+        self.training_metrics.update({
+            "current_step": resume.step,
+            "train_loss": (session_data.get("metrics") or {}).get("train_loss"),
+            "resumed_from_step": resume.step,
+            "last_checkpoint": resume.checkpoint
+        })
+        if self.best_val_loss is not None:
+            self.training_metrics["val_loss"] = self.best_val_loss
+    
     def get_all_sessions(self) -> List[Dict[str, Any]]:
-        """Get list of all saved training sessions"""
-        sessions = []
+        """Get list of all saved training sessions, newest first"""
+        sessions, _ = self.query_sessions()
+        return sessions
+    
+    def query_sessions(self, **filters) -> Tuple[List[Dict[str, Any]], int]:
+        """Get a page of session summaries from the catalog and the total count"""
         try:
-            if not os.path.exists(self.sessions_dir):
-                return sessions
-                
-            for filename in os.listdir(self.sessions_dir):
-                if filename.startswith("session_") and filename.endswith(".json"):
-                    session_file = os.path.join(self.sessions_dir, filename)
-                    try:
-                        with open(session_file, 'r') as f:
-                            session_data = json.load(f)
-                        
-                        session_summary = {
-                            "session_id": session_data["session_id"],
-                            "timestamp": session_data["timestamp"],
-                            "training_state": session_data["training_state"],
-                            "model_name": session_data["config"]["model_path"].split('/')[-1],
-                            "adapter_name": session_data["config"]["adapter_name"],
-                            "final_train_loss": session_data["metrics"].get("train_loss"),
-                            "final_val_loss": session_data["metrics"].get("val_loss"),
-                            "steps_completed": session_data["metrics"].get("current_step", 0),
-                            "total_steps": session_data["metrics"].get("total_steps", 0)
-                        }
-                        sessions.append(session_summary)
-                        
-                    except Exception as e:
-                        logger.error(f"Error reading session file {filename}: {e}")
-                        continue
-            
-            # Sort by timestamp, newest first
-            sessions.sort(key=lambda x: x["timestamp"], reverse=True)
-            
+            return self.session_catalog.query(**filters)
+        except ValueError:
+            raise
         except Exception as e:
             logger.error(f"Failed to get sessions list: {e}")
-        
-        return sessions
+            return [], 0
         
     def delete_session(self, session_id: str) -> bool:
         """Delete a specific training session"""
@@ -249,8 +436,15 @@ class TrainingManager:
                 logger.warning(f"Session file not found: {session_file}")
                 return False
             
-            # Remove the session file
+            # Remove the session snapshot, journal, metric history and catalog entry
+            if self.journal and self.journal.session_id == session_id:
+                self.journal.close()
+                self.journal = None
             os.remove(session_file)
+            if os.path.exists(journal_path(self.sessions_dir, session_id)):
+                os.remove(journal_path(self.sessions_dir, session_id))
+            self.metrics_store.delete(session_id)
+            self.session_catalog.delete(session_id)
             
             # Update latest.json if this was the latest session
             latest_file = os.path.join(self.sessions_dir, "latest.json")
@@ -261,11 +455,10 @@ class TrainingManager:
                     
                     if latest_data.get("latest_session_id") == session_id:
                         # Find the next most recent session
-                        remaining_sessions = self.get_all_sessions()
-                        if remaining_sessions:
+                        next_latest = self.session_catalog.latest_session_id()
+                        if next_latest:
                             # Update to the most recent remaining session
-                            with open(latest_file, 'w') as f:
-                                json.dump({"latest_session_id": remaining_sessions[0]["session_id"]}, f)
+                            atomic_write_json(latest_file, {"latest_session_id": next_latest})
                         else:
                             # No sessions left, remove latest.json
                             os.remove(latest_file)
@@ -281,42 +474,47 @@ class TrainingManager:
         
     async def add_websocket(self, websocket: WebSocket):
         """Add a WebSocket client"""
-        self.websocket_clients.append(websocket)
-        # Send current state
-        await websocket.send_json({
+        # Send current state first through the client's own queue; later
+        # training_delta messages build on this version
+        self.websocket_hub.register(websocket, initial={
             "type": "training_state",
             "data": {
                 "state": self.training_state,
-                "metrics": self.training_metrics
+                **self.progress_stream.snapshot(self.training_metrics)
             }
         })
         
     def remove_websocket(self, websocket: WebSocket):
         """Remove a WebSocket client"""
-        if websocket in self.websocket_clients:
-            self.websocket_clients.remove(websocket)
+        self.websocket_hub.unregister(websocket)
     
     async def broadcast(self, message: Dict[str, Any]):
-        """Broadcast message to all WebSocket clients"""
-        if self.websocket_clients:
-            disconnected = []
-            for client in self.websocket_clients:
-                try:
-                    await client.send_json(message)
-                except:
-                    disconnected.append(client)
-            
-            # Remove disconnected clients
-            for client in disconnected:
-                self.remove_websocket(client)
+        """Broadcast message to all WebSocket clients.
+
+        Messages are queued per client and sent by each client's writer
+        task, so this never waits on a slow connection. Pending progress is
+        flushed first so clients see it before the event.
+        """
+        self.progress_stream.flush()
+        self._publish(message)
     
-    async def start_training(self, config: TrainingConfig) -> bool:
-        """Start training with the given configuration"""
-        if self.current_process and self.current_process.poll() is None:
+    def _publish(self, message: Dict[str, Any]):
+        """Queue a message on the hub, tagged with the job id for a background runner"""
+        if self.job_id:
+            message = {**message, "job_id": self.job_id}
+        self.websocket_hub.publish(message)
+    
+    async def start_training(self, config: TrainingConfig, resume: Optional[ResumePoint] = None) -> bool:
+        """Start training with the given configuration, or continue an
+        interrupted session from a step checkpoint when ``resume`` is given"""
+        if self.current_process and self.current_process.returncode is None:
             raise HTTPException(status_code=400, detail="Training is already running")
         
         self.current_config = config
         self.training_state = "running"
+        # A sweep attaches its listener after the start; never keep a
+        # previous trial's listener on a manager that is reused
+        self.val_loss_listener = None
         self.training_metrics = {
             "current_step": 0,
             "total_steps": config.iterations,
@@ -327,8 +525,31 @@ class TrainingManager:
             "estimated_time_remaining": None
         }
         
-        # Generate new session ID for this training run
-        self.current_session_id = str(uuid.uuid4())
+        self.progress_stream.reset()
+        self.resume_point = None
+        if resume:
+            self._restore_resumed_session(resume)
+        else:
+            # Generate new session ID for this training run
+            self.current_session_id = str(uuid.uuid4())
+            self.metrics_store.reset(self.current_session_id)
+            self.best_val_loss = None
+            self.best_model_step = None
+            self.best_model_path = None
+            self.checkpoint_stats = empty_retention_stats(self.retention_policy)
+        
+        # Journal the run from its first event; the initial snapshot makes it
+        # visible in the catalog while it runs
+        if self.journal:
+            self.journal.close()
+        self.journal = SessionJournal(self.sessions_dir, self.current_session_id)
+        self._journal(EVENT_CONFIG, {
+            "config": asdict(config),
+            "adapter_path": os.path.join(self.output_dir, config.adapter_name, "adapters.safetensors"),
+            "metrics": self.training_metrics
+        })
+        self._journal(EVENT_STATE, {"state": self.training_state})
+        self.save_session()
         
         # Create config file for the training script
         config_data = {
@@ -341,6 +562,7 @@ class TrainingManager:
             "optimizer": "adamw",
             "learning_rate": config.learning_rate,
             "batch_size": config.batch_size,
+            "grad_accumulation_steps": config.gradient_accumulation_steps,
             "iters": config.iterations,
             "steps_per_report": config.steps_per_report,
             "steps_per_eval": config.steps_per_eval,
@@ -349,14 +571,15 @@ class TrainingManager:
             "grad_checkpoint": True,
             "mask_prompt": False,
             "save_every": config.save_every,
-            "resume_adapter_file": None,
+            "resume_adapter_file": resume.checkpoint if resume else None,
+            "start_iteration": resume.step if resume else 0,
             "train_log": self.log_file,
             "enable_early_stop": config.early_stop,
             "no_improve_patience_evals": config.patience
         }
         
         # Write config file
-        config_path = "/tmp/gui_training_config.yaml"
+        config_path = self.config_path
         with open(config_path, 'w') as f:
             import yaml
             yaml.dump(config_data, f, default_flow_style=False)
@@ -368,22 +591,37 @@ class TrainingManager:
                 "--config", config_path
             ]
             
-            self.current_process = subprocess.Popen(
-                cmd,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.STDOUT,
-                text=True,
-                bufsize=1,
-                universal_newlines=True,
-                preexec_fn=os.setsid
-            )
+            # Dedicated pipe for structured metrics; the trainer finds the
+            # write end through METRICS_FD_ENV
+            metrics_read_fd, metrics_write_fd = os.pipe()
+            env = os.environ.copy()
+            env[METRICS_FD_ENV] = str(metrics_write_fd)
+            
+            try:
+                self.current_process = await asyncio.create_subprocess_exec(
+                    *cmd,
+                    stdout=asyncio.subprocess.PIPE,
+                    stderr=asyncio.subprocess.STDOUT,
+                    start_new_session=True,
+                    pass_fds=(metrics_write_fd,),
+                    env=env
+                )
+            except Exception:
+                os.close(metrics_read_fd)
+                raise
+            finally:
+                # Only the child keeps the write end so we see EOF when it exits
+                os.close(metrics_write_fd)
             
             # Start monitoring the process
-            asyncio.create_task(self._monitor_training())
+            self.structured_metrics = False
+            self.stop_requested = False
+            self.metrics_task = asyncio.create_task(self._monitor_metrics_channel(metrics_read_fd))
+            self.monitor_task = asyncio.create_task(self._monitor_training())
             
             await self.broadcast({
                 "type": "training_started",
-                "data": {"config": config_data}
+                "data": {"config": config_data, "resumed_from_step": resume.step if resume else None}
             })
             
             return True
@@ -391,6 +629,7 @@ class TrainingManager:
         except Exception as e:
             self.training_state = "error"
             logger.error(f"Failed to start training: {e}")
+            self.save_session()
             await self.broadcast({
                 "type": "training_error",
                 "data": {"error": str(e)}
@@ -399,15 +638,16 @@ class TrainingManager:
     
     async def stop_training(self):
         """Stop the current training process"""
-        if self.current_process and self.current_process.poll() is None:
+        if self.current_process and self.current_process.returncode is None:
+            self.stop_requested = True
             try:
                 # Send SIGTERM to the process group
                 os.killpg(self.current_process.pid, signal.SIGTERM)
                 
                 # Wait for graceful shutdown
                 try:
-                    self.current_process.wait(timeout=30)
-                except subprocess.TimeoutExpired:
+                    await asyncio.wait_for(self.current_process.wait(), timeout=30)
+                except asyncio.TimeoutError:
                     # Force kill if graceful shutdown fails
                     os.killpg(self.current_process.pid, signal.SIGKILL)
                 
@@ -430,109 +670,205 @@ class TrainingManager:
                     "data": {"message": "Training state reset from error to idle"}
                 })
         
+    def _update_eta(self):
+        """Recalculate estimated time remaining from step progress"""
+        if "current_step" in self.training_metrics and self.training_metrics.get("total_steps"):
+            # A resumed run only timed the steps since its resume point
+            first_step = self.training_metrics.get("resumed_from_step") or 0
+            done = self.training_metrics["current_step"] - first_step
+            if done > 0 and "start_time" in self.training_metrics:
+                start_time = datetime.fromisoformat(self.training_metrics["start_time"])
+                elapsed = (datetime.now() - start_time).total_seconds()
+                remaining_steps = self.training_metrics["total_steps"] - self.training_metrics["current_step"]
+                self.training_metrics["estimated_time_remaining"] = elapsed / done * remaining_steps
+
+    def _record_history(self, point: Dict[str, Any]):
+        """Append the values updated by one report to the session history"""
+        if point and self.current_session_id and "current_step" in self.training_metrics:
+            self.metrics_store.get(self.current_session_id).append(
+                self.training_metrics["current_step"], **point
+            )
+            self._journal(EVENT_METRICS, {"current_step": self.training_metrics["current_step"], **point})
+
+    async def _record_val_loss(self, val_loss: float):
+        """Store a validation loss and track the best model"""
+        self.training_metrics["val_loss"] = val_loss
+
+        if self.val_loss_listener:
+            try:
+                await self.val_loss_listener(self.training_metrics.get("current_step", 0), val_loss)
+            except Exception as e:
+                logger.error(f"Validation loss listener failed: {e}")
+
+        if self.best_val_loss is None or val_loss < self.best_val_loss:
+            current_step = self.training_metrics.get("current_step", 0)
+            self.best_val_loss = val_loss
+            self.best_model_step = current_step
+            # Copy current checkpoint as best model
+            await self._save_best_model(current_step)
+            self._journal(EVENT_BEST_MODEL, {
+                "val_loss": self.best_val_loss,
+                "step": self.best_model_step,
+                "path": self.best_model_path
+            })
+
+    async def _handle_output_line(self, output: str) -> bool:
+        """Parse one line of trainer output, update metrics and broadcast.
+
+        Regex scraping is only a fallback for trainers that do not write to
+        the structured metrics channel. Returns True if the line signals an
+        early stop.
+        """
+        if not output.strip():
+            return False
+
+        if not self.structured_metrics:
+            # Parse metrics from output
+            step_match = STEP_PATTERN.search(output)
+            loss_match = LOSS_PATTERN.search(output)
+            val_match = VAL_PATTERN.search(output)
+            lr_match = LR_PATTERN.search(output)
+
+            # Extract metrics
+            point = {}
+            if step_match:
+                # Use iteration number directly as step (Iter 0 = Step 0, Iter 1 = Step 1, etc.)
+                self.training_metrics["current_step"] = int(step_match.group(1))
+
+            if loss_match:
+                point["train_loss"] = self.training_metrics["train_loss"] = float(loss_match.group(1))
+
+            if val_match:
+                point["val_loss"] = float(val_match.group(1))
+                await self._record_val_loss(point["val_loss"])
+
+            if lr_match:
+                point["learning_rate"] = self.training_metrics["learning_rate"] = float(lr_match.group(1))
+
+            self._record_history(point)
+            self._update_eta()
+
+            if SAVE_PATTERN.search(output):
+                self._schedule_retention()
+
+        # Queue for the next rate-limited delta
+        self.progress_stream.update(self.training_metrics, output.strip())
+
+        return "Early stop:" in output
+
+    async def _apply_metrics_record(self, record: Dict[str, Any]):
+        """Apply one structured record from the metrics channel"""
+        self.structured_metrics = True
+
+        if record.get("step") is not None:
+            self.training_metrics["current_step"] = int(record["step"])
+
+        for field in ("train_loss", "learning_rate", "tokens_per_sec", "peak_memory_gb", "packing_efficiency"):
+            if record.get(field) is not None:
+                self.training_metrics[field] = record[field]
+
+        if record.get("event") == "checkpoint" and record.get("checkpoint_path"):
+            self.training_metrics["last_checkpoint"] = record["checkpoint_path"]
+            self._schedule_retention()
+
+        if record.get("val_loss") is not None:
+            await self._record_val_loss(float(record["val_loss"]))
+
+        self._record_history({
+            field: record[field]
+            for field in ("train_loss", "val_loss", "learning_rate", "tokens_per_sec")
+            if record.get(field) is not None
+        })
+        self._update_eta()
+
+        self.progress_stream.update(self.training_metrics)
+
+    async def _monitor_metrics_channel(self, read_fd: int):
+        """Consume JSON-lines records from the trainer's metrics pipe"""
+        loop = asyncio.get_running_loop()
+        reader = asyncio.StreamReader()
+        pipe = os.fdopen(read_fd, "rb", buffering=0)
+        transport = None
+        try:
+            transport, _ = await loop.connect_read_pipe(
+                lambda: asyncio.StreamReaderProtocol(reader), pipe
+            )
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    logger.warning(f"Ignoring malformed metrics record: {line[:200]!r}")
+                    continue
+                if isinstance(record, dict):
+                    await self._apply_metrics_record(record)
+        except Exception as e:
+            logger.error(f"Metrics channel error: {e}")
+        finally:
+            if transport is not None:
+                transport.close()
+            else:
+                pipe.close()
+
     async def _monitor_training(self):
         """Monitor the training process and broadcast updates"""
-        if not self.current_process:
+        process = self.current_process
+        if not process:
             return
-            
+
         try:
-            import re
-            
-            # Patterns to extract metrics from training output
-            step_pattern = re.compile(r'Iter (\d+):')
-            loss_pattern = re.compile(r'Train loss ([0-9.]+)')
-            val_pattern = re.compile(r'Val loss\s+([0-9.]+)')
-            lr_pattern = re.compile(r'Learning Rate ([0-9.e-]+)')
-            
-            while self.current_process and self.current_process.poll() is None:
+            early_stop_detected = False
+            # Kept as bytes: a multibyte character split across two reads
+            # only decodes correctly once its line is complete
+            pending = b""
+
+            # Consume output in chunks as it arrives. The read is awaited on the
+            # event loop, so a quiet trainer never stalls REST or WebSocket
+            # handlers and a chatty one is drained as fast as it writes.
+            while True:
                 try:
-                    output = self.current_process.stdout.readline()
-                    if output:
-                        # Parse metrics from output
-                        step_match = step_pattern.search(output)
-                        loss_match = loss_pattern.search(output)
-                        val_match = val_pattern.search(output)
-                        lr_match = lr_pattern.search(output)
-                        
-                        # Extract metrics
-                        if step_match:
-                            current_step = int(step_match.group(1))
-                            self.training_metrics["current_step"] = current_step
-                            
-                        if loss_match:
-                            train_loss = float(loss_match.group(1))
-                            self.training_metrics["train_loss"] = train_loss
-                            
-                        if val_match:
-                            val_loss = float(val_match.group(1))
-                            self.training_metrics["val_loss"] = val_loss
-                            
-                            # Track best model based on validation loss
-                            if self.best_val_loss is None or val_loss < self.best_val_loss:
-                                self.best_val_loss = val_loss
-                                self.best_model_step = current_step
-                                # Copy current checkpoint as best model
-                                await self._save_best_model(current_step)
-                            
-                        if lr_match:
-                            learning_rate = float(lr_match.group(1))
-                            self.training_metrics["learning_rate"] = learning_rate
-                        
-                        # Calculate progress and ETA
-                        if "current_step" in self.training_metrics and "total_steps" in self.training_metrics:
-                            progress = self.training_metrics["current_step"] / self.training_metrics["total_steps"]
-                            if progress > 0 and "start_time" in self.training_metrics:
-                                start_time = datetime.fromisoformat(self.training_metrics["start_time"])
-                                elapsed = (datetime.now() - start_time).total_seconds()
-                                estimated_total = elapsed / progress
-                                remaining = estimated_total - elapsed
-                                self.training_metrics["estimated_time_remaining"] = remaining
-                        
-                        # Broadcast update
-                        await self.broadcast({
-                            "type": "training_progress",
-                            "data": {
-                                "metrics": self.training_metrics,
-                                "log_line": output.strip()
-                            }
-                        })
-                
-                    await asyncio.sleep(0.1)
-                    
+                    chunk = await process.stdout.read(OUTPUT_READ_CHUNK_SIZE)
                 except Exception as e:
                     logger.error(f"Error monitoring training: {e}")
                     break
+                if not chunk:
+                    break
+
+                pending += chunk
+                *lines, pending = pending.split(b"\n")
+                for line in lines:
+                    try:
+                        if await self._handle_output_line(line.decode("utf-8", errors="replace").rstrip("\r")):
+                            early_stop_detected = True
+                    except Exception as e:
+                        logger.error(f"Error parsing training output: {e}")
+
+            # Flush a trailing line without newline
+            if pending:
+                try:
+                    if await self._handle_output_line(pending.decode("utf-8", errors="replace")):
+                        early_stop_detected = True
+                except Exception as e:
+                    logger.error(f"Error parsing training output: {e}")
+
+            return_code = await process.wait()
             
-            # Process completed - but read any remaining output first
-            return_code = self.current_process.wait()
+            # Let the metrics channel drain its final records
+            if self.metrics_task:
+                try:
+                    await asyncio.wait_for(self.metrics_task, timeout=5)
+                except asyncio.TimeoutError:
+                    self.metrics_task.cancel()
+                self.metrics_task = None
             
-            # Read any remaining output after process completion
-            early_stop_detected = False
+            # Final retention pass so the saved session reports settled disk usage
+            self._schedule_retention()
             try:
-                while True:
-                    remaining_output = self.current_process.stdout.readline()
-                    if not remaining_output:
-                        break
-                    
-                    # Check for early stopping message
-                    if "Early stop:" in remaining_output:
-                        early_stop_detected = True
-                    
-                    # Parse final metrics from remaining output
-                    step_match = step_pattern.search(remaining_output)
-                    if step_match:
-                        # Use iteration number directly as step (Iter 0 = Step 0, Iter 1 = Step 1, etc.)
-                        self.training_metrics["current_step"] = int(step_match.group(1))
-                    
-                    loss_match = loss_pattern.search(remaining_output)
-                    if loss_match:
-                        self.training_metrics["train_loss"] = float(loss_match.group(1))
-                    
-                    val_match = val_pattern.search(remaining_output)
-                    if val_match:
-                        self.training_metrics["val_loss"] = float(val_match.group(1))
-            except:
-                pass  # Ignore errors when reading final output
+                await self.retention_task
+            except Exception as e:
+                logger.error(f"Final checkpoint retention failed: {e}")
             
             if return_code == 0:
                 self.training_state = "completed"
@@ -542,6 +878,9 @@ class TrainingManager:
                     "type": "training_completed",
                     "data": {"final_metrics": self.training_metrics}
                 })
+            elif self.stop_requested:
+                # stop_training reports the stop once the process has exited
+                self.training_state = "stopped"
             elif early_stop_detected:
                 # Early stopping is a successful completion, not an error
                 self.training_state = "completed"
@@ -575,76 +914,183 @@ class TrainingManager:
 # Global training manager instance
 training_manager = TrainingManager()
 
+# Resident inference workers shared by all inference endpoints
+inference_pool = InferencePool(python_path=INFERENCE_PYTHON)
+
+# Cache of deterministic (temperature 0) responses
+response_cache = ResponseCache()
+
+async def launch_training_job(job: TrainingJob) -> TrainingManager:
+    """Start a queued job on the primary manager when it is free, so the
+    Training page follows it, otherwise on a background runner"""
+    runner = training_manager
+    if training_manager.is_active():
+        runner = TrainingManager(run_name=job.job_id, shared=training_manager)
+    # A job requeued after a crash continues its session from the last checkpoint
+    resume = training_manager.recovery_point(job.session_id) if job.session_id else None
+    if not await runner.start_training(TrainingConfig(**job.config), resume=resume):
+        raise RuntimeError("Training process failed to start")
+    if job.sweep_id:
+        sweep_manager.attach(job, runner)
+    return runner
+
+def manual_training_load() -> Tuple[int, Set[str]]:
+    """Memory and adapter of a run started through /training/start"""
+    if not training_manager.is_active() or training_manager in training_scheduler.runners.values():
+        return 0, set()
+    config = training_manager.current_config
+    return estimate_training_memory_mb(config.model_path, config.batch_size, config.max_seq_length), {config.adapter_name}
+
+# Queue of training jobs, run side by side within the memory budget
+training_scheduler = TrainingScheduler(
+    training_manager.sessions_dir,
+    launch_training_job,
+    external_load=manual_training_load,
+    on_change=lambda snapshot: training_manager.websocket_hub.publish({"type": "queue_updated", "data": snapshot})
+)
+
+# Hyperparameter sweeps, run as queued jobs with ASHA pruning
+sweep_manager = SweepManager(
+    training_manager.sessions_dir,
+    training_scheduler,
+    lambda config: estimate_training_memory_mb(config["model_path"], config["batch_size"], config["max_seq_length"])
+)
+
+async def generate_cached(model_path: str, adapter_path: Optional[str], prompt: str,
+                          max_tokens: int, temperature: float) -> Dict[str, Any]:
+    """Generate on the pool, serving deterministic requests from the response cache"""
+    if not is_deterministic(temperature):
+        return await inference_pool.generate(model_path, adapter_path, prompt, max_tokens, temperature)
+    
+    key = await response_cache.key(model_path, adapter_path, prompt, {"max_tokens": max_tokens, "temperature": 0.0})
+    cached = response_cache.get(key, adapter_path)
+    if cached is not None:
+        return {**cached, "cached": True}
+    result = await inference_pool.generate(model_path, adapter_path, prompt, max_tokens, temperature)
+    response_cache.put(key, adapter_path, {"text": result["text"]})
+    return result
+
+# Model/adapter listings, kept current by watching the artifact directories
+model_registry = ModelRegistry(
+    "/Users/macbook2024/Library/CloudStorage/Dropbox/AAA Backup/A Working/Arjun LLM Writing/local_qwen/artifacts/base_model",
+    "/Users/macbook2024/Library/CloudStorage/Dropbox/AAA Backup/A Working/Arjun LLM Writing/local_qwen/artifacts/lora_adapters"
+)
+
+@app.on_event("startup")
+async def start_model_registry():
+    model_registry.start()
+
+@app.on_event("startup")
+async def start_training_scheduler():
+    training_scheduler.start()
+
+@app.on_event("startup")
+async def auto_resume_training():
+    """Resume an interrupted run without waiting for the user, if enabled"""
+    resume = training_manager.resume_point
+    if not AUTO_RESUME or not resume or training_manager.is_active():
+        return
+    if any(job.session_id == resume.session_id for job in training_scheduler.jobs.values()):
+        # Its queued job resumes it
+        return
+    logger.info(f"Automatically resuming session {resume.session_id} from step {resume.step}")
+    await training_manager.resume_training(resume)
+
+@app.on_event("shutdown")
+async def shutdown_inference_pool():
+    """Stop resident inference workers with the server"""
+    model_registry.stop()
+    await training_scheduler.close()
+    await inference_pool.close()
+
 # REST API endpoints
 @app.get("/health")
 async def health_check():
     """Health check endpoint"""
-    return {"status": "healthy", "timestamp": datetime.now().isoformat()}
+    return {
+        "status": "healthy",
+        "timestamp": datetime.now().isoformat(),
+        "inference": inference_pool.stats(),
+        "response_cache": response_cache.stats(),
+        "model_registry": model_registry.stats()
+    }
+
+def registry_response(request: Request, payload: Dict[str, Any], etag: str):
+    """Listing response with an ETag, or 304 if the client's copy is current"""
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if etag in request.headers.get("if-none-match", ""):
+        return Response(status_code=304, headers=headers)
+    return JSONResponse(payload, headers=headers)
 
 @app.get("/models")
-async def list_models():
+async def list_models(request: Request):
     """List available models"""
-    models_dir = "/Users/macbook2024/Library/CloudStorage/Dropbox/AAA Backup/A Working/Arjun LLM Writing/local_qwen/artifacts/base_model"
-    models = []
-    
-    try:
-        if os.path.exists(models_dir):
-            for item in os.listdir(models_dir):
-                item_path = os.path.join(models_dir, item)
-                if os.path.isdir(item_path):
-                    # Check if it's a valid model directory (contains config.json)
-                    config_path = os.path.join(item_path, "config.json")
-                    if os.path.exists(config_path):
-                        try:
-                            with open(config_path, 'r') as f:
-                                config = json.load(f)
-                                models.append({
-                                    "name": item,
-                                    "path": item_path,
-                                    "model_type": config.get("model_type", "unknown"),
-                                    "vocab_size": config.get("vocab_size", 0)
-                                })
-                        except Exception as e:
-                            logger.warning(f"Could not read config for {item}: {e}")
-                            models.append({
-                                "name": item,
-                                "path": item_path,
-                                "model_type": "unknown",
-                                "vocab_size": 0
-                            })
-    except Exception as e:
-        logger.error(f"Error listing models: {e}")
-    
-    return {"models": models}
+    payload, etag = model_registry.list_models()
+    return registry_response(request, payload, etag)
+
+@app.post("/models/refresh")
+async def refresh_models():
+    """Rescan the model and adapter directories"""
+    await asyncio.to_thread(model_registry.rebuild)
+    return model_registry.stats()
 
 @app.get("/training/status")
 async def get_training_status():
     """Get current training status"""
     return {
         "state": training_manager.training_state,
+        "version": training_manager.progress_stream.version,
+        "recovery": training_manager.resume_point.to_dict() if training_manager.resume_point else None,
         "metrics": training_manager.training_metrics,
         "config": training_manager.current_config.__dict__ if training_manager.current_config else None
     }
 
+@app.get("/training/metrics")
+async def get_training_metrics(
+    since_step: Optional[int] = None,
+    max_points: int = 500,
+    method: str = "lttb",
+    session_id: Optional[str] = None
+):
+    """Get downsampled metric history for the current (or given) session"""
+    if method not in DOWNSAMPLE_METHODS:
+        raise HTTPException(status_code=400, detail=f"method must be one of: {', '.join(DOWNSAMPLE_METHODS)}")
+    if max_points < 3:
+        raise HTTPException(status_code=400, detail="max_points must be at least 3")
+    
+    session_id = session_id or training_manager.current_session_id
+    if not session_id:
+        return {"session_id": None, "total_points": 0, "last_step": None, "series": {}}
+    
+    history = training_manager.metrics_store.get(session_id).query(
+        since_step=since_step, max_points=max_points, method=method
+    )
+    return {"session_id": session_id, **history}
+
+def parse_training_config(config_data: Dict[str, Any]) -> TrainingConfig:
+    """Training configuration from a request body"""
+    return TrainingConfig(
+        model_path=config_data["model_path"],
+        train_data_path=config_data["train_data_path"],
+        val_data_path=config_data.get("val_data_path", ""),
+        learning_rate=config_data.get("learning_rate", 1e-5),
+        batch_size=config_data.get("batch_size", 1),
+        gradient_accumulation_steps=max(1, int(config_data.get("gradient_accumulation_steps", 1))),
+        max_seq_length=config_data.get("max_seq_length", 1024),
+        iterations=config_data.get("iterations", 7329),
+        steps_per_report=config_data.get("steps_per_report", 25),
+        steps_per_eval=config_data.get("steps_per_eval", 25),
+        save_every=25,  # Force save every 25 steps regardless of frontend input
+        early_stop=config_data.get("early_stop", True),
+        patience=config_data.get("patience", 3),
+        adapter_name=config_data.get("adapter_name", "mlx_finetune")
+    )
+
 @app.post("/training/start")
 async def start_training(config_data: Dict[str, Any], background_tasks: BackgroundTasks):
     """Start training with given configuration"""
     try:
-        config = TrainingConfig(
-            model_path=config_data["model_path"],
-            train_data_path=config_data["train_data_path"],
-            val_data_path=config_data.get("val_data_path", ""),
-            learning_rate=config_data.get("learning_rate", 1e-5),
-            batch_size=config_data.get("batch_size", 1),
-            max_seq_length=config_data.get("max_seq_length", 1024),
-            iterations=config_data.get("iterations", 7329),
-            steps_per_report=config_data.get("steps_per_report", 25),
-            steps_per_eval=config_data.get("steps_per_eval", 25),
-            save_every=25,  # Force save every 25 steps regardless of frontend input
-            early_stop=config_data.get("early_stop", True),
-            patience=config_data.get("patience", 3),
-            adapter_name=config_data.get("adapter_name", "mlx_finetune")
-        )
+        config = parse_training_config(config_data)
         
         success = await training_manager.start_training(config)
         if success:
@@ -655,6 +1101,123 @@ async def start_training(config_data: Dict[str, Any], background_tasks: Backgrou
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
+@app.get("/training/recovery")
+async def get_training_recovery():
+    """Interrupted session that can resume from a step checkpoint, if any"""
+    resume = training_manager.resume_point
+    return {"resume": resume.to_dict() if resume else None, "auto_resume": AUTO_RESUME}
+
+@app.post("/training/resume")
+async def resume_training(request_data: Optional[Dict[str, Any]] = None):
+    """Resume an interrupted session (default: the latest) from its newest valid checkpoint"""
+    session_id = (request_data or {}).get("session_id")
+    if training_manager.is_active():
+        raise HTTPException(status_code=400, detail="Training is already running")
+    resume = training_manager.recovery_point(session_id)
+    if not resume:
+        raise HTTPException(status_code=404, detail="No interrupted session with a valid checkpoint to resume")
+    if not await training_manager.resume_training(resume):
+        raise HTTPException(status_code=500, detail="Failed to resume training")
+    return {"status": "resumed", "session_id": resume.session_id, "step": resume.step}
+
+@app.get("/training/queue")
+async def get_training_queue():
+    """Queued, running and recently finished jobs with positions and ETAs"""
+    return training_scheduler.snapshot()
+
+@app.post("/training/queue")
+async def submit_training_job(config_data: Dict[str, Any]):
+    """Queue a training job; ``priority`` and ``memory_mb`` are optional"""
+    try:
+        config = parse_training_config(config_data)
+        priority = int(config_data.get("priority", 0))
+        memory_mb = config_data.get("memory_mb")
+        memory_mb = int(memory_mb) if memory_mb else estimate_training_memory_mb(
+            config.model_path, config.batch_size, config.max_seq_length
+        )
+    except (KeyError, TypeError, ValueError) as e:
+        raise HTTPException(status_code=400, detail=f"Invalid training job: {e}")
+    
+    job = training_scheduler.submit(asdict(config), memory_mb, priority)
+    return {"job_id": job.job_id, "queue": training_scheduler.snapshot()}
+
+@app.patch("/training/queue/{job_id}")
+async def update_training_job(job_id: str, request_data: dict):
+    """Change a queued job's ``priority`` or move it to a 1-based ``position``"""
+    if not training_scheduler.get(job_id):
+        raise HTTPException(status_code=404, detail="Job not found")
+    position = request_data.get("position")
+    try:
+        training_scheduler.update(
+            job_id,
+            priority=request_data.get("priority"),
+            position=int(position) - 1 if position is not None else None
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    return training_scheduler.snapshot()
+
+@app.delete("/training/queue/{job_id}")
+async def cancel_training_job(job_id: str):
+    """Remove a queued job or stop a running one"""
+    if not training_scheduler.get(job_id):
+        raise HTTPException(status_code=404, detail="Job not found")
+    job = await training_scheduler.cancel(job_id)
+    return {"job_id": job_id, "state": job.state}
+
+@app.get("/sweeps")
+async def list_sweeps():
+    """All sweeps with trial counts and their best trial"""
+    return {"sweeps": sweep_manager.list()}
+
+@app.post("/sweeps")
+async def create_sweep(request_data: dict):
+    """Queue a hyperparameter sweep.
+
+    Body: ``config`` (a training configuration, as for /training/start),
+    ``space`` (per-parameter ``values`` or ``distribution``/``low``/``high``/
+    ``num``), ``strategy`` (grid or random), and optional ``num_trials``,
+    ``seed``, ``eta``, ``min_steps``, ``priority`` and ``name``.
+    """
+    strategy = request_data.get("strategy", "grid")
+    if strategy not in STRATEGIES:
+        raise HTTPException(status_code=400, detail=f"strategy must be one of: {', '.join(STRATEGIES)}")
+    try:
+        base_config = asdict(parse_training_config(request_data.get("config") or {}))
+        sweep = sweep_manager.create(
+            base_config,
+            request_data.get("space") or {},
+            strategy=strategy,
+            num_trials=request_data.get("num_trials"),
+            seed=request_data.get("seed"),
+            eta=int(request_data.get("eta", DEFAULT_ETA)),
+            min_steps=request_data.get("min_steps"),
+            priority=int(request_data.get("priority", 0)),
+            name=request_data.get("name")
+        )
+    except (KeyError, TypeError, ValueError) as e:
+        raise HTTPException(status_code=400, detail=f"Invalid sweep: {e}")
+    return sweep_manager.summary(sweep)
+
+@app.get("/sweeps/{sweep_id}")
+async def get_sweep(sweep_id: str, sort_by: str = "best_val_loss", descending: bool = False):
+    """Sweep summary with its leaderboard, sorted by a metric or parameter"""
+    sweep = sweep_manager.sweeps.get(sweep_id)
+    if not sweep:
+        raise HTTPException(status_code=404, detail="Sweep not found")
+    try:
+        leaderboard = sweep_manager.leaderboard(sweep_id, sort_by, descending)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {**sweep_manager.summary(sweep), "leaderboard": leaderboard}
+
+@app.delete("/sweeps/{sweep_id}")
+async def cancel_sweep(sweep_id: str):
+    """Cancel the sweep's queued and running trials"""
+    if sweep_id not in sweep_manager.sweeps:
+        raise HTTPException(status_code=404, detail="Sweep not found")
+    return await sweep_manager.cancel(sweep_id)
+
 @app.post("/training/stop")
 async def stop_training():
     """Stop current training"""
@@ -662,39 +1225,141 @@ async def stop_training():
     return {"status": "stopped", "message": "Training stop requested"}
 
 @app.get("/training/logs")
-async def get_training_logs():
-    """Get training logs"""
+async def get_training_logs(lines: int = 100, offset: Optional[int] = None):
+    """Get training logs.
+
+    Without ``offset`` returns the last ``lines`` lines. With ``offset``
+    returns the lines appended since that byte cursor. Both include the
+    ``offset`` to pass on the next call.
+    """
     try:
-        if os.path.exists(training_manager.log_file):
-            with open(training_manager.log_file, 'r') as f:
-                logs = f.readlines()[-100:]  # Last 100 lines
-            return {"logs": logs}
-        else:
-            return {"logs": []}
+        if not os.path.exists(training_manager.log_file):
+            return {"logs": [], "offset": 0}
+        if offset is not None:
+            return read_from_offset(training_manager.log_file, offset)
+        return tail_lines(training_manager.log_file, max(0, lines))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.get("/training/logs/stream")
+async def stream_training_logs(request: Request, offset: Optional[int] = None):
+    """Follow the training log as Server-Sent Events.
+
+    Starts at ``offset`` (or the Last-Event-ID header on reconnect), else at
+    the current end of file. Each event's id is the cursor after its lines.
+    """
+    last_event_id = request.headers.get("last-event-id")
+    if offset is None and last_event_id and last_event_id.isdigit():
+        offset = int(last_event_id)
+    
+    async def follow():
+        cursor = offset
+        while not await request.is_disconnected():
+            log_file = training_manager.log_file
+            size = file_size(log_file)
+            if size is None:
+                await asyncio.sleep(LOG_FOLLOW_INTERVAL)
+                continue
+            if cursor is None:
+                cursor = size
+            if size == cursor:
+                await asyncio.sleep(LOG_FOLLOW_INTERVAL)
+                continue
+            
+            chunk = read_from_offset(log_file, cursor)
+            advanced = chunk["offset"] != cursor
+            cursor = chunk["offset"]
+            if chunk["logs"] or chunk["reset"]:
+                payload = json.dumps({"logs": chunk["logs"], "reset": chunk["reset"]})
+                yield f"id: {cursor}\ndata: {payload}\n\n"
+            # Keep draining a backlog; otherwise wait (also for partial lines)
+            if not (chunk["more"] and advanced):
+                await asyncio.sleep(LOG_FOLLOW_INTERVAL)
+    
+    return StreamingResponse(
+        follow(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache"}
+    )
+
+@app.get("/training/checkpoints")
+async def get_training_checkpoints():
+    """Step checkpoints of the current adapter, retention policy and disk usage"""
+    if not training_manager.current_config:
+        raise HTTPException(status_code=404, detail="No training session loaded")
+    adapter_dir = os.path.join(training_manager.output_dir, training_manager.current_config.adapter_name)
+    best_step = best_checkpoint_step(adapter_dir)
+    checkpoints = []
+    for step, path in list_step_checkpoints(adapter_dir):
+        try:
+            size = os.path.getsize(path)
+        except OSError:
+            continue
+        checkpoints.append({"step": step, "size": size, "best": step == best_step})
+    return {
+        "adapter_dir": adapter_dir,
+        "checkpoints": checkpoints,
+        "retention": training_manager.checkpoint_stats
+    }
+
+@app.post("/training/checkpoints/gc")
+async def collect_training_checkpoints():
+    """Apply the checkpoint retention policy now"""
+    if not training_manager.current_config:
+        raise HTTPException(status_code=404, detail="No training session loaded")
+    training_manager._schedule_retention()
+    await training_manager.retention_task
+    training_manager.save_session()
+    return training_manager.checkpoint_stats
+
 @app.get("/sessions")
-async def get_sessions():
-    """Get list of all training sessions"""
-    sessions = training_manager.get_all_sessions()
-    return {"sessions": sessions}
+async def get_sessions(
+    limit: Optional[int] = None,
+    offset: int = 0,
+    state: Optional[str] = None,
+    model: Optional[str] = None,
+    adapter: Optional[str] = None,
+    search: Optional[str] = None,
+    sort: str = "timestamp",
+    order: str = "desc"
+):
+    """Get a page of training sessions, filtered and sorted"""
+    if order not in ("asc", "desc"):
+        raise HTTPException(status_code=400, detail="order must be 'asc' or 'desc'")
+    try:
+        sessions, total = training_manager.query_sessions(
+            limit=limit,
+            offset=offset,
+            state=state,
+            model_name=model,
+            adapter_name=adapter,
+            search=search,
+            sort_by=sort,
+            descending=order == "desc"
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"sessions": sessions, "total": total, "limit": limit, "offset": offset}
+
+@app.post("/sessions/catalog/rebuild")
+async def rebuild_session_catalog():
+    """Rebuild the session catalog from the session JSON files"""
+    try:
+        count = training_manager.session_catalog.rebuild()
+        return {"status": "success", "sessions": count}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
 
 @app.get("/sessions/{session_id}")
 async def get_session(session_id: str):
     """Get details of a specific training session"""
     try:
-        session_file = os.path.join(training_manager.sessions_dir, f"session_{session_id}.json")
-        if not os.path.exists(session_file):
-            raise HTTPException(status_code=404, detail="Session not found")
-        
-        with open(session_file, 'r') as f:
-            session_data = json.load(f)
-        
-        return session_data
-        
+        session_data = load_session_record(training_manager.sessions_dir, session_id)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+    if not session_data:
+        raise HTTPException(status_code=404, detail="Session not found")
+    return session_data
 
 @app.post("/sessions/{session_id}/load")
 async def load_session(session_id: str):
@@ -748,71 +1413,19 @@ async def test_base_model(request_data: dict):
         config = training_manager.current_config
         model_path = config.model_path
         
-        # Use MLX to generate text with the base model only (no adapter)
-        python_path = '/Users/macbook2024/Library/CloudStorage/Dropbox/AAA Backup/A Working/Arjun LLM Writing/local_qwen/.venv/bin/python'
-        
-        # Create a simple inference command using mlx-lm for base model only
-        cmd = [
-            python_path, '-c', f'''
-import mlx.core as mx
-from mlx_lm import load, generate
-
-# Load the base model WITHOUT adapter
-model, tokenizer = load("{model_path}")
-
-# Generate text
-prompt = """{prompt}"""
-
-# Try different parameter combinations based on MLX version
-response = None
-try:
-    # Try with temp parameter
-    response = generate(model, tokenizer, prompt=prompt, max_tokens={max_tokens})
-except TypeError:
-    try:
-        # Try with temperature parameter  
-        response = generate(model, tokenizer, prompt=prompt, max_tokens={max_tokens})
-    except TypeError:
+        # Generate on the resident worker for the base model only (no adapter)
         try:
-            # Try with just basic parameters
-            response = generate(model, tokenizer, prompt=prompt, max_tokens={max_tokens})
-        except Exception as e:
-            print("RESPONSE_START")
-            print(f"Error: Could not generate response - {{str(e)}}")
-            print("RESPONSE_END")
-            exit(1)
-
-print("RESPONSE_START")
-print(response)
-print("RESPONSE_END")
-'''
-        ]
-        
-        # Run the inference
-        process = subprocess.run(
-            cmd,
-            capture_output=True,
-            text=True,
-            timeout=300  # 5 minute timeout for large models
-        )
-        
-        if process.returncode != 0:
-            logger.error(f"Base model test failed: {process.stderr}")
-            raise HTTPException(status_code=500, detail=f"Base model inference failed: {process.stderr}")
-        
-        # Parse the response
-        output = process.stdout
-        if "RESPONSE_START" in output and "RESPONSE_END" in output:
-            response_start = output.find("RESPONSE_START") + len("RESPONSE_START\n")
-            response_end = output.find("RESPONSE_END")
-            generated_text = output[response_start:response_end].strip()
-        else:
-            generated_text = output.strip()
+            result = await generate_cached(model_path, None, prompt, max_tokens, temperature)
+        except InferenceError as e:
+            logger.error(f"Base model test failed: {e}")
+            raise HTTPException(status_code=500, detail=f"Base model inference failed: {e}")
+        generated_text = result["text"].strip()
         
         return {
             "success": True,
             "prompt": prompt,
             "response": generated_text,
+            "cached": result.get("cached", False),
             "model_info": {
                 "base_model": model_path.split('/')[-1],
                 "adapter": "none (base model)",
@@ -821,8 +1434,10 @@ print("RESPONSE_END")
             }
         }
         
-    except subprocess.TimeoutExpired:
+    except asyncio.TimeoutError:
         raise HTTPException(status_code=504, detail="Base model inference timed out")
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Base model test error: {e}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -846,91 +1461,31 @@ async def test_model(request_data: dict):
         model_path = config.model_path
         adapter_name = config.adapter_name
         
-        # Determine adapter path - MLX expects directory path, not file path
         adapter_dir = os.path.join("/Users/macbook2024/Library/CloudStorage/Dropbox/AAA Backup/A Working/Arjun LLM Writing/local_qwen/artifacts/lora_adapters", adapter_name)
-        best_adapter_file = os.path.join(adapter_dir, "best_adapters.safetensors")
-        latest_adapter_file = os.path.join(adapter_dir, "adapters.safetensors")
         
-        # Use best model if available, otherwise fall back to latest
-        if os.path.exists(best_adapter_file):
-            # Copy best model to adapters.safetensors so MLX can find it
-            import shutil
-            shutil.copy2(best_adapter_file, latest_adapter_file)
-            model_type = "best"
-        else:
+        # Use best model if available, otherwise fall back to latest; the
+        # worker loads the checkpoint file directly
+        adapter_path = resolve_checkpoint(adapter_dir, "best")
+        model_type = "best"
+        if not adapter_path:
+            adapter_path = resolve_checkpoint(adapter_dir, "latest")
             model_type = "latest"
+        if not adapter_path:
+            raise HTTPException(status_code=404, detail=f"Fine-tuned adapter not found at {adapter_dir}")
         
-        # MLX expects the directory path, not the file path
-        adapter_path = adapter_dir
-        if not os.path.exists(adapter_path):
-            raise HTTPException(status_code=404, detail=f"Fine-tuned adapter not found at {adapter_path}")
-        
-        # Use MLX to generate text with the fine-tuned model
-        # This is a simplified implementation - you might want to use a proper MLX inference script
-        python_path = '/Users/macbook2024/Library/CloudStorage/Dropbox/AAA Backup/A Working/Arjun LLM Writing/local_qwen/.venv/bin/python'
-        
-        # Create a simple inference command using mlx-lm
-        cmd = [
-            python_path, '-c', f'''
-import mlx.core as mx
-from mlx_lm import load, generate
-
-# Load the base model and adapter
-model, tokenizer = load("{model_path}", adapter_path="{adapter_path}")
-
-# Generate text
-prompt = """{prompt}"""
-
-# Try different parameter combinations based on MLX version
-response = None
-try:
-    # Try with temp parameter
-    response = generate(model, tokenizer, prompt=prompt, max_tokens={max_tokens})
-except TypeError:
-    try:
-        # Try with temperature parameter  
-        response = generate(model, tokenizer, prompt=prompt, max_tokens={max_tokens})
-    except TypeError:
+        # Generate on the resident worker for the fine-tuned model
         try:
-            # Try with just basic parameters
-            response = generate(model, tokenizer, prompt=prompt, max_tokens={max_tokens})
-        except Exception as e:
-            print("RESPONSE_START")
-            print(f"Error: Could not generate response - {{str(e)}}")
-            print("RESPONSE_END")
-            exit(1)
-
-print("RESPONSE_START")
-print(response)
-print("RESPONSE_END")
-'''
-        ]
-        
-        # Run the inference
-        process = subprocess.run(
-            cmd,
-            capture_output=True,
-            text=True,
-            timeout=300  # 5 minute timeout for large models
-        )
-        
-        if process.returncode != 0:
-            logger.error(f"Model test failed: {process.stderr}")
-            raise HTTPException(status_code=500, detail=f"Model inference failed: {process.stderr}")
-        
-        # Parse the response
-        output = process.stdout
-        if "RESPONSE_START" in output and "RESPONSE_END" in output:
-            response_start = output.find("RESPONSE_START") + len("RESPONSE_START\n")
-            response_end = output.find("RESPONSE_END")
-            generated_text = output[response_start:response_end].strip()
-        else:
-            generated_text = output.strip()
+            result = await generate_cached(model_path, adapter_path, prompt, max_tokens, temperature)
+        except InferenceError as e:
+            logger.error(f"Model test failed: {e}")
+            raise HTTPException(status_code=500, detail=f"Model inference failed: {e}")
+        generated_text = result["text"].strip()
         
         return {
             "success": True,
             "prompt": prompt,
             "response": generated_text,
+            "cached": result.get("cached", False),
             "model_info": {
                 "base_model": model_path.split('/')[-1],
                 "adapter": adapter_name,
@@ -940,191 +1495,322 @@ print("RESPONSE_END")
             }
         }
         
-    except subprocess.TimeoutExpired:
+    except asyncio.TimeoutError:
         raise HTTPException(status_code=504, detail="Model inference timed out")
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Model test error: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 # WebSocket endpoint for real-time updates
 @app.get("/models/available")
-async def get_available_models():
+async def get_available_models(request: Request):
     """Get all available models and their adapters"""
-    try:
-        base_model_dir = "/Users/macbook2024/Library/CloudStorage/Dropbox/AAA Backup/A Working/Arjun LLM Writing/local_qwen/artifacts/base_model"
-        adapter_base_dir = "/Users/macbook2024/Library/CloudStorage/Dropbox/AAA Backup/A Working/Arjun LLM Writing/local_qwen/artifacts/lora_adapters"
-        
-        models = []
-        
-        # Scan for available base models
-        if os.path.exists(base_model_dir):
-            for item in os.listdir(base_model_dir):
-                model_path = os.path.join(base_model_dir, item)
-                if os.path.isdir(model_path):
-                    # Check for adapters for this model
-                    adapters = []
-                    if os.path.exists(adapter_base_dir):
-                        for adapter_name in os.listdir(adapter_base_dir):
-                            adapter_dir = os.path.join(adapter_base_dir, adapter_name)
-                            if os.path.isdir(adapter_dir):
-                                # Check if this adapter has weights
-                                adapter_file = os.path.join(adapter_dir, "adapters.safetensors")
-                                best_adapter_file = os.path.join(adapter_dir, "best_adapters.safetensors")
-                                if os.path.exists(adapter_file) or os.path.exists(best_adapter_file):
-                                    adapters.append({
-                                        "name": adapter_name,
-                                        "has_best": os.path.exists(best_adapter_file),
-                                        "has_latest": os.path.exists(adapter_file),
-                                        "path": adapter_dir
-                                    })
-                    
-                    models.append({
-                        "name": item,
-                        "path": model_path,
-                        "adapters": adapters
-                    })
-        
-        return {"models": models}
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+    payload, etag = model_registry.list_available()
+    return registry_response(request, payload, etag)
 
-@app.post("/models/inference")
-async def model_inference(request_data: dict):
-    """Model-agnostic inference endpoint"""
-    try:
-        prompt = request_data.get("prompt", "").strip()
-        model_name = request_data.get("model_name")
-        adapter_name = request_data.get("adapter_name")  # Optional
-        max_tokens = request_data.get("max_tokens", 100)
-        temperature = request_data.get("temperature", 0.7)
-        
-        if not prompt:
-            raise HTTPException(status_code=400, detail="Prompt is required")
-        if not model_name:
-            raise HTTPException(status_code=400, detail="Model name is required")
-        
-        # Build model path
+def resolve_base_model(model_name: Optional[str]) -> Tuple[str, str]:
+    """Path and name of a named base model, or of the current session's model"""
+    if model_name:
         base_model_dir = "/Users/macbook2024/Library/CloudStorage/Dropbox/AAA Backup/A Working/Arjun LLM Writing/local_qwen/artifacts/base_model"
         model_path = os.path.join(base_model_dir, model_name)
-        
         if not os.path.exists(model_path):
             raise HTTPException(status_code=404, detail=f"Model not found: {model_name}")
-        
-        # Build adapter path if specified
-        adapter_path = None
-        adapter_type = "none"
-        if adapter_name:
-            adapter_base_dir = "/Users/macbook2024/Library/CloudStorage/Dropbox/AAA Backup/A Working/Arjun LLM Writing/local_qwen/artifacts/lora_adapters"
-            adapter_dir = os.path.join(adapter_base_dir, adapter_name)
-            
-            if os.path.exists(adapter_dir):
-                best_adapter_file = os.path.join(adapter_dir, "best_adapters.safetensors")
-                latest_adapter_file = os.path.join(adapter_dir, "adapters.safetensors")
-                
-                # Use best model if available, otherwise latest
-                if os.path.exists(best_adapter_file):
-                    import shutil
-                    shutil.copy2(best_adapter_file, latest_adapter_file)
-                    adapter_type = "best"
-                elif os.path.exists(latest_adapter_file):
-                    adapter_type = "latest"
-                
-                if os.path.exists(latest_adapter_file):
-                    adapter_path = adapter_dir
-        
-        # Use MLX to generate text
-        python_path = '/Users/macbook2024/Library/CloudStorage/Dropbox/AAA Backup/A Working/Arjun LLM Writing/local_qwen/.venv/bin/python'
-        
-        if adapter_path:
-            # Fine-tuned model inference
-            cmd = [
-                python_path, '-c', f'''
-import mlx.core as mx
-from mlx_lm import load, generate
-
-try:
-    model, tokenizer = load("{model_path}", adapter_path="{adapter_path}")
-    prompt = """{prompt}"""
+        return model_path, model_name
     
-    response = generate(model, tokenizer, prompt=prompt, max_tokens={max_tokens})
-    print("RESPONSE_START")
-    print(response)
-    print("RESPONSE_END")
-except Exception as e:
-    print(f"Error: {{e}}")
-    import traceback
-    traceback.print_exc()
-'''
-            ]
-        else:
-            # Base model inference
-            cmd = [
-                python_path, '-c', f'''
-import mlx.core as mx
-from mlx_lm import load, generate
+    if not training_manager.current_config:
+        raise HTTPException(status_code=400, detail="No training session found. Please complete a training session first.")
+    model_path = training_manager.current_config.model_path
+    return model_path, model_path.split('/')[-1]
+
+def resolve_inference_target(request_data: dict) -> Dict[str, Any]:
+    """Validate an inference request body and resolve model/adapter paths.
 
-try:
-    model, tokenizer = load("{model_path}")
-    prompt = """{prompt}"""
+    Uses ``model_name``/``adapter_name`` when given; otherwise the current
+    session's base model and, unless ``use_adapter`` is false, its adapter.
+    """
+    prompt = (request_data.get("prompt") or "").strip()
+    if not prompt:
+        raise HTTPException(status_code=400, detail="Prompt is required")
     
-    response = generate(model, tokenizer, prompt=prompt, max_tokens={max_tokens})
-    print("RESPONSE_START")
-    print(response)
-    print("RESPONSE_END")
-except Exception as e:
-    print(f"Error: {{e}}")
-    import traceback
-    traceback.print_exc()
-'''
-            ]
+    model_path, model_name = resolve_base_model(request_data.get("model_name"))
+    adapter_name = request_data.get("adapter_name")  # Optional
+    if not request_data.get("model_name") and adapter_name is None and request_data.get("use_adapter", True):
+        adapter_name = training_manager.current_config.adapter_name
+    
+    # Build adapter path if specified
+    adapter_path = None
+    adapter_type = "none"
+    if adapter_name:
+        adapter_base_dir = "/Users/macbook2024/Library/CloudStorage/Dropbox/AAA Backup/A Working/Arjun LLM Writing/local_qwen/artifacts/lora_adapters"
+        adapter_dir = os.path.join(adapter_base_dir, adapter_name)
         
-        process = subprocess.run(
-            cmd,
-            capture_output=True,
-            text=True,
-            timeout=300  # 5 minute timeout for large models
+        # Use best model if available, otherwise latest
+        for kind in CHECKPOINT_KINDS:
+            adapter_path = resolve_checkpoint(adapter_dir, kind)
+            if adapter_path:
+                adapter_type = kind
+                break
+    
+    max_tokens = request_data.get("max_tokens", 100)
+    temperature = request_data.get("temperature", 0.7)
+    return {
+        "prompt": prompt,
+        "model_path": model_path,
+        "adapter_path": adapter_path,
+        "max_tokens": max_tokens,
+        "temperature": temperature,
+        "model_info": {
+            "base_model": model_name,
+            "adapter": adapter_name if adapter_path else "none (base model)",
+            "adapter_type": adapter_type,
+            "max_tokens": max_tokens,
+            "temperature": temperature
+        }
+    }
+
+async def stream_inference_frames(target: Dict[str, Any]):
+    """Token frames for a resolved target, ending in a done or error frame"""
+    cache_key = None
+    if is_deterministic(target["temperature"]):
+        cache_key = await response_cache.key(
+            target["model_path"], target["adapter_path"], target["prompt"],
+            {"max_tokens": target["max_tokens"], "temperature": 0.0}
         )
+        cached = response_cache.get(cache_key, target["adapter_path"])
+        if cached is not None:
+            # Replay the whole completion as one token frame
+            yield "token", {"token": cached["text"]}
+            yield "done", {
+                "done": True,
+                "text": cached["text"].strip(),
+                "cached": True,
+                "ttft": 0.0,
+                "generation_time": 0.0,
+                "tokens_per_sec": None,
+                "model_info": target["model_info"]
+            }
+            return
+    
+    frames = inference_pool.stream(
+        target["model_path"], target["adapter_path"], target["prompt"],
+        target["max_tokens"], target["temperature"]
+    )
+    try:
+        async for frame in frames:
+            if frame.get("done"):
+                if cache_key:
+                    response_cache.put(cache_key, target["adapter_path"], {"text": frame["text"]})
+                yield "done", {**frame, "text": frame["text"].strip(), "model_info": target["model_info"]}
+            else:
+                yield "token", frame
+    except InferenceError as e:
+        yield "error", {"error": f"Model inference failed: {e}"}
+    except asyncio.TimeoutError:
+        yield "error", {"error": "Model inference timed out"}
+    finally:
+        await frames.aclose()
+
+@app.post("/models/inference")
+async def model_inference(request_data: dict):
+    """Model-agnostic inference endpoint"""
+    try:
+        if not request_data.get("model_name"):
+            raise HTTPException(status_code=400, detail="Model name is required")
+        target = resolve_inference_target(request_data)
         
-        if process.returncode != 0:
-            raise HTTPException(status_code=500, detail=f"Model inference failed: {process.stderr}")
-        
-        # Extract the response between markers
-        output = process.stdout
-        if "RESPONSE_START" in output and "RESPONSE_END" in output:
-            start_idx = output.find("RESPONSE_START") + len("RESPONSE_START")
-            end_idx = output.find("RESPONSE_END")
-            response_text = output[start_idx:end_idx].strip()
-        else:
-            response_text = output.strip()
+        # Generate on the resident worker for this model/adapter
+        try:
+            result = await generate_cached(
+                target["model_path"], target["adapter_path"], target["prompt"],
+                target["max_tokens"], target["temperature"]
+            )
+        except InferenceError as e:
+            raise HTTPException(status_code=500, detail=f"Model inference failed: {e}")
+        response_text = result["text"].strip()
         
         return {
             "success": True,
-            "prompt": prompt,
+            "prompt": target["prompt"],
             "response": response_text,
-            "model_info": {
-                "base_model": model_name,
-                "adapter": adapter_name if adapter_name else "none (base model)",
-                "adapter_type": adapter_type,
-                "max_tokens": max_tokens,
-                "temperature": temperature
-            }
+            "cached": result.get("cached", False),
+            "model_info": target["model_info"]
         }
         
+    except asyncio.TimeoutError:
+        raise HTTPException(status_code=504, detail="Model inference timed out")
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Model inference error: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.post("/models/inference/stream")
+async def model_inference_stream(request_data: dict):
+    """Stream inference tokens as Server-Sent Events.
+
+    Emits ``token`` events as they are generated and one final ``done``
+    event with the full text, ttft and tokens_per_sec (or an ``error``
+    event). Disconnecting cancels generation on the worker.
+    """
+    target = resolve_inference_target(request_data)
+    
+    async def events():
+        async for event, data in stream_inference_frames(target):
+            yield f"event: {event}\ndata: {json.dumps(data)}\n\n"
+    
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache"}
+    )
+
+@app.post("/models/compare")
+async def compare_models(request_data: dict):
+    """Run one prompt across several adapters on a single resident base model.
+
+    ``adapters`` is a list of ``{"adapter_name": str | null, "checkpoint":
+    "best" | "latest"}``; null is the base model. Defaults to base, best and
+    latest of the current session's adapter.
+    """
+    prompt = (request_data.get("prompt") or "").strip()
+    if not prompt:
+        raise HTTPException(status_code=400, detail="Prompt is required")
+    model_path, model_name = resolve_base_model(request_data.get("model_name"))
+    max_tokens = request_data.get("max_tokens", 100)
+    temperature = request_data.get("temperature", 0.7)
+    
+    specs = request_data.get("adapters")
+    if specs is None:
+        specs = [{"adapter_name": None}]
+        if training_manager.current_config:
+            adapter_name = training_manager.current_config.adapter_name
+            specs += [{"adapter_name": adapter_name, "checkpoint": "best"},
+                      {"adapter_name": adapter_name, "checkpoint": "latest"}]
+    
+    variants = []
+    for spec in specs:
+        adapter_name = spec.get("adapter_name")
+        checkpoint = spec.get("checkpoint", "best") if adapter_name else None
+        adapter_path = None
+        if adapter_name:
+            if checkpoint not in CHECKPOINT_KINDS:
+                raise HTTPException(status_code=400, detail=f"checkpoint must be one of: {', '.join(CHECKPOINT_KINDS)}")
+            adapter_path = resolve_checkpoint(os.path.join(training_manager.output_dir, adapter_name), checkpoint)
+            if not adapter_path:
+                # Not every adapter has a best checkpoint yet; skip what doesn't exist
+                continue
+        variants.append({
+            "adapter": adapter_name or "none (base model)",
+            "checkpoint": checkpoint,
+            "adapter_path": adapter_path
+        })
+    if not variants:
+        raise HTTPException(status_code=404, detail="None of the requested adapters exist")
+    
+    # Deterministic variants already generated are served from the cache
+    cache_keys: Dict[int, str] = {}
+    results: Dict[int, Dict[str, Any]] = {}
+    if is_deterministic(temperature):
+        for i, variant in enumerate(variants):
+            cache_keys[i] = await response_cache.key(
+                model_path, variant["adapter_path"], prompt,
+                {"max_tokens": max_tokens, "temperature": 0.0}
+            )
+            cached = response_cache.get(cache_keys[i], variant["adapter_path"])
+            if cached is not None:
+                results[i] = {**cached, "ok": True, "cached": True}
+    
+    pending = [i for i in range(len(variants)) if i not in results]
+    if pending:
+        try:
+            generated = await inference_pool.compare(
+                model_path, [variants[i]["adapter_path"] for i in pending],
+                prompt, max_tokens, temperature
+            )
+        except InferenceError as e:
+            raise HTTPException(status_code=500, detail=f"Model comparison failed: {e}")
+        except asyncio.TimeoutError:
+            raise HTTPException(status_code=504, detail="Model comparison timed out")
+        for i, result in zip(pending, generated):
+            results[i] = result
+            if i in cache_keys and result.get("ok"):
+                response_cache.put(cache_keys[i], variants[i]["adapter_path"], {"text": result["text"]})
+    
+    return {
+        "success": True,
+        "prompt": prompt,
+        "model_info": {
+            "base_model": model_name,
+            "max_tokens": max_tokens,
+            "temperature": temperature
+        },
+        "results": [
+            {
+                "adapter": variant["adapter"],
+                "checkpoint": variant["checkpoint"],
+                "response": results[i].get("text", "").strip(),
+                "error": results[i].get("error"),
+                "cached": results[i].get("cached", False),
+                "tokens": results[i].get("tokens"),
+                "generation_time": results[i].get("generation_time"),
+                "adapter_swap_ms": results[i].get("adapter_swap_ms")
+            }
+            for i, variant in enumerate(variants)
+        ]
+    }
+
+async def stream_inference_to_websocket(websocket: WebSocket, request_id: Any, request_data: dict):
+    """Serve one WebSocket inference_request as inference_* messages"""
+    hub = training_manager.websocket_hub
+    try:
+        target = resolve_inference_target(request_data)
+    except HTTPException as e:
+        hub.send(websocket, {"type": "inference_error", "data": {"request_id": request_id, "error": e.detail}})
+        return
+    async for event, data in stream_inference_frames(target):
+        hub.send(websocket, {"type": f"inference_{event}", "data": {"request_id": request_id, **data}})
+
 @app.websocket("/ws")
 async def websocket_endpoint(websocket: WebSocket):
     """WebSocket endpoint for real-time training updates"""
     await websocket.accept()
     await training_manager.add_websocket(websocket)
+    # In-flight inference streams for this client, by client request_id
+    inference_tasks: Dict[Any, asyncio.Task] = {}
     
     try:
         while True:
-            # Keep connection alive
-            await websocket.receive_text()
+            try:
+                message = json.loads(await websocket.receive_text())
+            except json.JSONDecodeError:
+                continue
+            if not isinstance(message, dict):
+                continue
+            
+            message_type = message.get("type")
+            request_id = message.get("request_id")
+            if message_type == "inference_request":
+                task = asyncio.create_task(
+                    stream_inference_to_websocket(websocket, request_id, message.get("data") or {})
+                )
+                inference_tasks[request_id] = task
+                
+                def forget(done: asyncio.Task, request_id=request_id):
+                    if inference_tasks.get(request_id) is done:
+                        del inference_tasks[request_id]
+                task.add_done_callback(forget)
+            elif message_type == "inference_cancel":
+                task = inference_tasks.get(request_id)
+                if task:
+                    task.cancel()
     except WebSocketDisconnect:
+        pass
+    finally:
+        # Client went away: stop any generation it was waiting on
+        for task in inference_tasks.values():
+            task.cancel()
         training_manager.remove_websocket(websocket)
 
 if __name__ == "__main__":
@@ -0,0 +1,235 @@
+"""
+Columnar training metrics history
+
+Array-backed, growable per-session time series with server-side
+downsampling, so charts can render long runs from one small response.
+"""
+
+import os
+import logging
+from typing import Dict, List, Optional, Any
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Value columns tracked alongside the step column
+METRIC_COLUMNS = ("train_loss", "val_loss", "learning_rate", "tokens_per_sec")
+
+DOWNSAMPLE_METHODS = ("lttb", "minmax")
+
+
+def lttb_indices(x: np.ndarray, y: np.ndarray, threshold: int) -> np.ndarray:
+    """
+    Largest-Triangle-Three-Buckets downsampling.
+
+    Returns the indices of ``threshold`` points that best preserve the
+    visual shape of the series. First and last points are always kept.
+    """
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+
+    # Bucket boundaries for the n-2 interior points
+    edges = np.linspace(1, n - 1, threshold - 1).astype(np.int64)
+    selected = np.empty(threshold, dtype=np.int64)
+    selected[0] = 0
+    selected[-1] = n - 1
+
+    a = 0
+    for i in range(threshold - 2):
+        start, end = edges[i], edges[i + 1]
+        # Average of the next bucket (or the last point)
+        next_start, next_end = end, edges[i + 2] if i + 2 < len(edges) else n
+        if next_end <= next_start:
+            next_end = next_start + 1
+        avg_x = x[next_start:next_end].mean()
+        avg_y = y[next_start:next_end].mean()
+
+        bx = x[start:end]
+        by = y[start:end]
+        area = np.abs((x[a] - avg_x) * (by - y[a]) - (x[a] - bx) * (avg_y - y[a]))
+        a = start + int(np.argmax(area))
+        selected[i + 1] = a
+
+    return selected
+
+
+def minmax_indices(y: np.ndarray, threshold: int) -> np.ndarray:
+    """
+    Min-max downsampling: keep the extreme points of each bucket.
+
+    Cheaper than LTTB and guarantees spikes survive. Returns at most
+    ``threshold`` indices, first and last included.
+    """
+    n = len(y)
+    if threshold >= n or threshold < 2:
+        return np.arange(n)
+
+    # Two picks per bucket plus the two endpoints stay within threshold
+    buckets = (threshold - 2) // 2
+    edges = np.linspace(0, n, buckets + 1).astype(np.int64)
+    picks = []
+    for start, end in zip(edges[:-1], edges[1:]):
+        if end <= start:
+            continue
+        chunk = y[start:end]
+        picks.append(start + int(np.argmin(chunk)))
+        picks.append(start + int(np.argmax(chunk)))
+    picks.append(0)
+    picks.append(n - 1)
+    return np.unique(np.asarray(picks, dtype=np.int64))
+
+
+class MetricsSeries:
+    """Growable columnar store of metric points keyed by training step"""
+
+    def __init__(self, capacity: int = 1024):
+        self._capacity = max(16, capacity)
+        self._steps = np.empty(self._capacity, dtype=np.int64)
+        self._values = np.full((len(METRIC_COLUMNS), self._capacity), np.nan, dtype=np.float64)
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    @property
+    def last_step(self) -> Optional[int]:
+        return int(self._steps[self._size - 1]) if self._size else None
+
+    def _grow(self):
+        self._capacity *= 2
+        steps = np.empty(self._capacity, dtype=np.int64)
+        steps[:self._size] = self._steps[:self._size]
+        values = np.full((len(METRIC_COLUMNS), self._capacity), np.nan, dtype=np.float64)
+        values[:, :self._size] = self._values[:, :self._size]
+        self._steps, self._values = steps, values
+
+    def append(self, step: int, **values: Optional[float]):
+        """
+        Record metric values at a step.
+
+        Values reported for the same step as the last point (e.g. the train
+        and val lines of one iteration) are merged into that row.
+        """
+        if self._size == 0 or step != self._steps[self._size - 1]:
+            if self._size and step < self._steps[self._size - 1]:
+                # Step regressed: a restarted run, drop the stale tail
+                self._size = int(np.searchsorted(self._steps[:self._size], step))
+            if self._size == self._capacity:
+                self._grow()
+            self._steps[self._size] = step
+            self._values[:, self._size] = np.nan
+            self._size += 1
+
+        row = self._size - 1
+        for i, column in enumerate(METRIC_COLUMNS):
+            value = values.get(column)
+            if value is not None:
+                self._values[i, row] = value
+
+    def truncate(self, step: int):
+        """Drop points after a step, e.g. when a run resumes from a checkpoint"""
+        self._size = int(np.searchsorted(self._steps[:self._size], step, side="right"))
+
+    def query(self, since_step: Optional[int] = None, max_points: Optional[int] = None,
+              method: str = "lttb") -> Dict[str, Any]:
+        """
+        Return each metric as its own (step, value) series, downsampled
+        independently so sparse columns like val_loss are not thinned by
+        the dense ones.
+        """
+        steps = self._steps[:self._size]
+        start = int(np.searchsorted(steps, since_step, side="right")) if since_step is not None else 0
+        steps = steps[start:]
+
+        series = {}
+        for i, column in enumerate(METRIC_COLUMNS):
+            values = self._values[i, start:self._size]
+            mask = ~np.isnan(values)
+            x, y = steps[mask], values[mask]
+            if max_points and len(x) > max_points:
+                if method == "minmax":
+                    keep = minmax_indices(y, max_points)
+                else:
+                    keep = lttb_indices(x.astype(np.float64), y, max_points)
+                x, y = x[keep], y[keep]
+            series[column] = {"step": x.tolist(), "value": y.tolist()}
+
+        return {
+            "total_points": int(len(steps)),
+            "last_step": self.last_step,
+            "series": series,
+        }
+
+    def save(self, path: str):
+        """Persist the populated part of the series as a compressed .npz"""
+        tmp_path = f"{path}.tmp.npz"
+        np.savez_compressed(
+            tmp_path,
+            step=self._steps[:self._size],
+            **{column: self._values[i, :self._size] for i, column in enumerate(METRIC_COLUMNS)}
+        )
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str) -> "MetricsSeries":
+        with np.load(path) as data:
+            steps = data["step"]
+            series = cls(capacity=len(steps) * 2)
+            series._size = len(steps)
+            series._steps[:series._size] = steps
+            for i, column in enumerate(METRIC_COLUMNS):
+                if column in data:
+                    series._values[i, :series._size] = data[column]
+        return series
+
+
+class MetricsStore:
+    """Per-session metric series, persisted as .npz next to the session JSON"""
+
+    def __init__(self, sessions_dir: str):
+        self.sessions_dir = sessions_dir
+        self._series: Dict[str, MetricsSeries] = {}
+
+    def _path(self, session_id: str) -> str:
+        return os.path.join(self.sessions_dir, f"session_{session_id}_metrics.npz")
+
+    def get(self, session_id: str) -> MetricsSeries:
+        """Return the series for a session, loading it from disk on first use"""
+        series = self._series.get(session_id)
+        if series is None:
+            path = self._path(session_id)
+            series = None
+            if os.path.exists(path):
+                try:
+                    series = MetricsSeries.load(path)
+                except Exception as e:
+                    logger.error(f"Failed to load metrics history {path}: {e}")
+            if series is None:
+                series = MetricsSeries()
+            self._series[session_id] = series
+        return series
+
+    def reset(self, session_id: str) -> MetricsSeries:
+        series = MetricsSeries()
+        self._series[session_id] = series
+        return series
+
+    def save(self, session_id: str):
+        series = self._series.get(session_id)
+        if series is None or len(series) == 0:
+            return
+        try:
+            series.save(self._path(session_id))
+        except Exception as e:
+            logger.error(f"Failed to save metrics history for {session_id}: {e}")
+
+    def delete(self, session_id: str):
+        self._series.pop(session_id, None)
+        path = self._path(session_id)
+        if os.path.exists(path):
+            os.remove(path)
+
+    def session_ids(self) -> List[str]:
+        return list(self._series)
@@ -0,0 +1,294 @@
+"""
+Cached registry of base models and LoRA adapters
+
+Listings are built once and served from memory. The base-model and adapter
+directories are watched with watchdog when it is installed; otherwise a
+background task polls directory mtimes. Only the entry that changed is
+rescanned. Each listing carries an ETag so unchanged responses can be
+answered with 304 Not Modified.
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+import repo_root  # noqa: F401  (puts the repository root on sys.path)
+from checkpoint_manifest import resolve_checkpoint
+from cli.safetensors_header import inspect_path, SafetensorsHeaderError
+
+logger = logging.getLogger(__name__)
+
+try:
+    from watchdog.events import FileSystemEventHandler
+    from watchdog.observers import Observer
+    WATCHDOG_AVAILABLE = True
+except ImportError:
+    FileSystemEventHandler = object
+    WATCHDOG_AVAILABLE = False
+
+# Watchdog events that can change a listing. inotify also reports opens and
+# closes, and a rescan opens the files it reads, so reacting to those would
+# make every rescan trigger the next one.
+CHANGE_EVENT_TYPES = frozenset({"created", "modified", "deleted", "moved"})
+
+# Seconds between mtime polls when watchdog is unavailable
+POLL_INTERVAL = float(os.environ.get("MLX_GUI_REGISTRY_POLL_INTERVAL", "2"))
+
+
+def weights_summary(path: Optional[str]) -> Optional[Dict[str, Any]]:
+    """Header-only parameter/dtype/LoRA summary, or None if unreadable"""
+    if not path:
+        return None
+    try:
+        return inspect_path(path)
+    except (OSError, SafetensorsHeaderError) as e:
+        logger.warning(f"Could not inspect weights in {path}: {e}")
+        return None
+
+
+def scan_model(model_path: str) -> Optional[Dict[str, Any]]:
+    """Listing entry for a base model directory, or None if it isn't one"""
+    if not os.path.isdir(model_path):
+        return None
+    entry = {
+        "name": os.path.basename(model_path),
+        "path": model_path,
+        "model_type": "unknown",
+        "vocab_size": 0,
+        "has_config": False,
+    }
+    config_path = os.path.join(model_path, "config.json")
+    if os.path.exists(config_path):
+        entry["has_config"] = True
+        try:
+            with open(config_path, 'r') as f:
+                config = json.load(f)
+            entry["model_type"] = config.get("model_type", "unknown")
+            entry["vocab_size"] = config.get("vocab_size", 0)
+        except Exception as e:
+            logger.warning(f"Could not read config for {entry['name']}: {e}")
+    entry["weights"] = weights_summary(model_path)
+    return entry
+
+
+def scan_adapter(adapter_dir: str) -> Optional[Dict[str, Any]]:
+    """Listing entry for an adapter directory, or None if it has no weights"""
+    if not os.path.isdir(adapter_dir):
+        return None
+    best_adapter_file = resolve_checkpoint(adapter_dir, "best")
+    adapter_file = resolve_checkpoint(adapter_dir, "latest")
+    if not (adapter_file or best_adapter_file):
+        return None
+    return {
+        "name": os.path.basename(adapter_dir),
+        "has_best": best_adapter_file is not None,
+        "has_latest": adapter_file is not None,
+        "path": adapter_dir,
+        "weights": weights_summary(best_adapter_file or adapter_file),
+    }
+
+
+def _mtime(path: str) -> Optional[int]:
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+
+
+class _ChangeHandler(FileSystemEventHandler):
+    """Forwards watchdog events to the registry"""
+
+    def __init__(self, registry: "ModelRegistry"):
+        super().__init__()
+        self.registry = registry
+
+    def on_any_event(self, event):
+        if event.event_type not in CHANGE_EVENT_TYPES:
+            return
+        paths = [event.src_path, getattr(event, "dest_path", None)]
+        for path in filter(None, paths):
+            self.registry.path_changed(os.fsdecode(path))
+
+
+class ModelRegistry:
+    """In-memory model/adapter listings kept current by watching the filesystem"""
+
+    def __init__(self, base_model_dir: str, adapter_base_dir: str):
+        self.base_model_dir = base_model_dir
+        self.adapter_base_dir = adapter_base_dir
+        self.models: Dict[str, Dict[str, Any]] = {}
+        self.adapters: Dict[str, Dict[str, Any]] = {}
+        self.version = 0
+        self.rescans = 0
+        self.mode = "idle"
+        self._lock = threading.Lock()
+        self._views: Dict[str, Tuple[int, Any, str]] = {}
+        self._signatures: Dict[str, Optional[int]] = {}
+        self._observer = None
+        self._poll_task: Optional[asyncio.Task] = None
+        self.rebuild()
+
+    # Scanning
+
+    def rebuild(self):
+        """Rescan both directories from scratch"""
+        models = {}
+        for name in self._list_dir(self.base_model_dir):
+            entry = scan_model(os.path.join(self.base_model_dir, name))
+            if entry:
+                models[name] = entry
+        adapters = {}
+        for name in self._list_dir(self.adapter_base_dir):
+            entry = scan_adapter(os.path.join(self.adapter_base_dir, name))
+            if entry:
+                adapters[name] = entry
+        with self._lock:
+            self.models = models
+            self.adapters = adapters
+            self.version += 1
+        self._signatures = self._poll_signatures()
+
+    @staticmethod
+    def _list_dir(path: str) -> List[str]:
+        try:
+            return sorted(os.listdir(path))
+        except OSError:
+            return []
+
+    def refresh_model(self, name: str):
+        entry = scan_model(os.path.join(self.base_model_dir, name))
+        self._update(self.models, name, entry)
+
+    def refresh_adapter(self, name: str):
+        entry = scan_adapter(os.path.join(self.adapter_base_dir, name))
+        self._update(self.adapters, name, entry)
+
+    def _update(self, entries: Dict[str, Dict[str, Any]], name: str, entry: Optional[Dict[str, Any]]):
+        with self._lock:
+            self.rescans += 1
+            if entries.get(name) == entry:
+                return
+            if entry is None:
+                entries.pop(name, None)
+            else:
+                entries[name] = entry
+            self.version += 1
+
+    def path_changed(self, path: str):
+        """Rescan the model or adapter entry that contains path"""
+        for root, refresh in ((self.base_model_dir, self.refresh_model),
+                              (self.adapter_base_dir, self.refresh_adapter)):
+            relative = os.path.relpath(path, root)
+            if relative.startswith(os.pardir) or relative == os.curdir:
+                continue
+            refresh(relative.split(os.sep)[0])
+
+    # Watching
+
+    def start(self):
+        """Begin watching for changes (watchdog if available, else polling)"""
+        if WATCHDOG_AVAILABLE:
+            try:
+                observer = Observer()
+                handler = _ChangeHandler(self)
+                for root in (self.base_model_dir, self.adapter_base_dir):
+                    if os.path.isdir(root):
+                        observer.schedule(handler, root, recursive=True)
+                observer.daemon = True
+                observer.start()
+                self._observer = observer
+                self.mode = "watchdog"
+                return
+            except Exception as e:
+                logger.warning(f"Filesystem watching unavailable, polling instead: {e}")
+        self._poll_task = asyncio.create_task(self._poll())
+        self.mode = "polling"
+
+    def stop(self):
+        if self._observer is not None:
+            self._observer.stop()
+            self._observer = None
+        if self._poll_task is not None:
+            self._poll_task.cancel()
+            self._poll_task = None
+        self.mode = "idle"
+
+    def _poll_signatures(self) -> Dict[str, Optional[int]]:
+        """mtimes that change whenever a listing could: top-level dirs,
+        each entry dir, and each model's config.json"""
+        signatures = {
+            self.base_model_dir: _mtime(self.base_model_dir),
+            self.adapter_base_dir: _mtime(self.adapter_base_dir),
+        }
+        for name in self._list_dir(self.base_model_dir):
+            path = os.path.join(self.base_model_dir, name)
+            signatures[path] = _mtime(path)
+            signatures[os.path.join(path, "config.json")] = _mtime(os.path.join(path, "config.json"))
+        for name in self._list_dir(self.adapter_base_dir):
+            path = os.path.join(self.adapter_base_dir, name)
+            signatures[path] = _mtime(path)
+        return signatures
+
+    async def _poll(self):
+        while True:
+            await asyncio.sleep(POLL_INTERVAL)
+            try:
+                signatures = await asyncio.to_thread(self._poll_signatures)
+                changed = {
+                    path for path in set(signatures) | set(self._signatures)
+                    if signatures.get(path) != self._signatures.get(path)
+                }
+                self._signatures = signatures
+                for path in changed:
+                    if path in (self.base_model_dir, self.adapter_base_dir):
+                        # Entries added or removed
+                        await asyncio.to_thread(self.rebuild)
+                        break
+                    self.path_changed(path)
+            except Exception as e:
+                logger.error(f"Model registry poll failed: {e}")
+
+    # Views
+
+    def _view(self, name: str, build) -> Tuple[Any, str]:
+        with self._lock:
+            cached = self._views.get(name)
+            if cached and cached[0] == self.version:
+                return cached[1], cached[2]
+            version = self.version
+            payload = build()
+        body = json.dumps(payload, sort_keys=True).encode("utf-8")
+        etag = f'"{hashlib.sha1(body).hexdigest()}"'
+        with self._lock:
+            self._views[name] = (version, payload, etag)
+        return payload, etag
+
+    def list_models(self) -> Tuple[Dict[str, Any], str]:
+        """Base models with a config.json, and the listing's ETag"""
+        return self._view("models", lambda: {"models": [
+            {key: entry[key] for key in ("name", "path", "model_type", "vocab_size")}
+            for entry in self.models.values() if entry["has_config"]
+        ]})
+
+    def list_available(self) -> Tuple[Dict[str, Any], str]:
+        """All base models with the adapters available to them, and the ETag"""
+        def build():
+            adapters = list(self.adapters.values())
+            return {"models": [
+                {"name": entry["name"], "path": entry["path"], "weights": entry["weights"], "adapters": adapters}
+                for entry in self.models.values()
+            ]}
+        return self._view("available", build)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "mode": self.mode,
+            "version": self.version,
+            "rescans": self.rescans,
+            "models": len(self.models),
+            "adapters": len(self.adapters),
+        }
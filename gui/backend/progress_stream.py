@@ -0,0 +1,115 @@
+"""
+Rate-limited, delta-encoded training progress stream
+
+Coalesces metric updates and log lines and publishes at most
+``max_rate_hz`` messages per second. Each message carries only the metric
+fields that changed since the previous one, the batched log lines, and a
+monotonically increasing version so clients can detect gaps and resync.
+The first message after a reset is flagged ``replace``: it carries the full
+metrics dict and clients replace their state with it instead of merging.
+"""
+
+import asyncio
+import copy
+import logging
+import os
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Default publish rate; override with MLX_GUI_PROGRESS_HZ
+PROGRESS_MAX_RATE_HZ = float(os.environ.get("MLX_GUI_PROGRESS_HZ", "5"))
+
+# Log lines kept per message; older lines in a burst are dropped and counted
+MAX_LOG_LINES_PER_MESSAGE = 500
+
+
+class ProgressStream:
+    """Coalescer that turns per-line updates into periodic deltas"""
+
+    def __init__(self, publish: Callable[[Dict[str, Any]], None],
+                 max_rate_hz: float = PROGRESS_MAX_RATE_HZ,
+                 max_log_lines: int = MAX_LOG_LINES_PER_MESSAGE):
+        self.publish = publish
+        self.min_interval = 1.0 / max_rate_hz if max_rate_hz > 0 else 0.0
+        self.max_log_lines = max_log_lines
+        self.version = 0
+        self._metrics: Dict[str, Any] = {}
+        self._last_sent: Dict[str, Any] = {}
+        self._logs: List[str] = []
+        self._dropped_logs = 0
+        self._replace = False
+        self._last_flush = 0.0
+        self._timer: Optional[asyncio.TimerHandle] = None
+
+    def reset(self):
+        """Start a new run: the next message replaces the client's metrics"""
+        self._cancel_timer()
+        self._last_sent = {}
+        self._logs = []
+        self._dropped_logs = 0
+        self._replace = True
+
+    def update(self, metrics: Dict[str, Any], log_line: Optional[str] = None):
+        """Record the latest metrics (and optional log line); never publishes inline"""
+        self._metrics = metrics
+        if log_line:
+            self._logs.append(log_line)
+            if len(self._logs) > self.max_log_lines:
+                overflow = len(self._logs) - self.max_log_lines
+                del self._logs[:overflow]
+                self._dropped_logs += overflow
+        self._schedule()
+
+    def _schedule(self):
+        if self._timer is not None:
+            return
+        delay = max(0.0, self._last_flush + self.min_interval - time.monotonic())
+        self._timer = asyncio.get_running_loop().call_later(delay, self._on_timer)
+
+    def _on_timer(self):
+        self._timer = None
+        self.flush()
+
+    def _cancel_timer(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+    def flush(self):
+        """Publish pending changes now (used before terminal events)"""
+        self._cancel_timer()
+        delta = {
+            key: value for key, value in self._metrics.items()
+            if key not in self._last_sent or self._last_sent[key] != value
+        }
+        if not delta and not self._logs:
+            return
+
+        self.version += 1
+        data: Dict[str, Any] = {
+            "version": self.version,
+            "metrics": delta,
+            "logs": self._logs,
+        }
+        if self._dropped_logs:
+            data["dropped_logs"] = self._dropped_logs
+        if self._replace:
+            # _last_sent was cleared, so delta already holds every metric
+            data["replace"] = True
+
+        self._last_sent.update(copy.deepcopy(delta))
+        self._logs = []
+        self._dropped_logs = 0
+        self._replace = False
+        self._last_flush = time.monotonic()
+
+        try:
+            self.publish({"type": "training_delta", "data": data})
+        except Exception as e:
+            logger.error(f"Failed to publish progress delta: {e}")
+
+    def snapshot(self, metrics: Dict[str, Any]) -> Dict[str, Any]:
+        """Full metrics plus the version they correspond to"""
+        return {"version": self.version, "metrics": metrics}
@@ -0,0 +1,15 @@
+"""
+Repository root on sys.path
+
+Backend modules that use the ``cli`` package at the repository root import
+this module before importing from ``cli``, so they work regardless of
+which backend module was imported first.
+"""
+
+import sys
+from pathlib import Path
+
+REPO_ROOT = str(Path(__file__).resolve().parent.parent.parent)
+
+if REPO_ROOT not in sys.path:
+    sys.path.insert(0, REPO_ROOT)
@@ -0,0 +1,283 @@
+"""
+Content-addressed response cache for deterministic inference
+
+Greedy (temperature 0) completions depend only on the weights, the prompt
+and the generation parameters, so they are cached under a hash of all of
+them: base-model fingerprint, adapter content hash, prompt and params.
+Recent entries are kept in an in-memory LRU; every entry is also written
+to an on-disk tier that evicts least recently used files past a size budget.
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import shutil
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+from inference_worker import adapter_files
+from session_journal import atomic_write_json
+
+logger = logging.getLogger(__name__)
+
+# Defaults, overridable through the environment
+DEFAULT_CACHE_DIR = os.environ.get(
+    "MLX_GUI_RESPONSE_CACHE_DIR",
+    "/Users/macbook2024/Library/CloudStorage/Dropbox/AAA Backup/A Working/Arjun LLM Writing/local_qwen/cache/responses"
+)
+DEFAULT_MEMORY_ENTRIES = int(os.environ.get("MLX_GUI_RESPONSE_CACHE_ENTRIES", "1024"))
+DEFAULT_DISK_BUDGET_MB = int(os.environ.get("MLX_GUI_RESPONSE_CACHE_MB", "256"))
+
+HASH_CHUNK_SIZE = 1024 * 1024
+
+# Files whose identity defines a base model
+MODEL_FILE_SUFFIXES = (".safetensors", ".npz", ".bin", ".gguf", ".json", ".model", ".tiktoken")
+
+BASE_MODEL_TAG = "base"
+
+
+def is_deterministic(temperature: Optional[float]) -> bool:
+    """Only greedy decoding gives a reproducible completion worth caching"""
+    try:
+        return temperature is not None and float(temperature) <= 0
+    except (TypeError, ValueError):
+        return False
+
+
+def adapter_tag(adapter_path: Optional[str]) -> str:
+    """Directory name grouping all entries generated with one adapter directory"""
+    if not adapter_path:
+        return BASE_MODEL_TAG
+    if adapter_path.endswith(".safetensors"):
+        # A specific checkpoint file belongs with its adapter directory
+        adapter_path = os.path.dirname(adapter_path)
+    return hashlib.sha1(os.path.abspath(adapter_path).encode("utf-8")).hexdigest()[:16]
+
+
+class ResponseCache:
+    """Two-tier (memory LRU + size-bounded disk) cache of generated responses"""
+
+    def __init__(self, cache_dir: str = DEFAULT_CACHE_DIR,
+                 memory_entries: int = DEFAULT_MEMORY_ENTRIES,
+                 disk_budget_mb: int = DEFAULT_DISK_BUDGET_MB):
+        self.cache_dir = cache_dir
+        self.memory_entries = memory_entries
+        self.disk_budget_bytes = disk_budget_mb * 1024 * 1024
+        os.makedirs(cache_dir, exist_ok=True)
+
+        # key -> (adapter tag, response)
+        self._memory: "OrderedDict[str, Tuple[str, Dict[str, Any]]]" = OrderedDict()
+        # Disk entry path -> size, least recently used first
+        self._disk: "OrderedDict[str, int]" = OrderedDict()
+        self.disk_bytes = 0
+        # Adapter path -> (stat signature, content hash), so unchanged files aren't re-read
+        self._adapter_hashes: Dict[str, Tuple[Any, str]] = {}
+        # (adapter path, stat signature) -> hash running on a worker thread
+        self._hashing: Dict[Tuple[str, Tuple], "asyncio.Future[str]"] = {}
+
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self._load_disk_index()
+
+    def _load_disk_index(self):
+        entries = []
+        for root, _, files in os.walk(self.cache_dir):
+            for name in files:
+                if not name.endswith(".json"):
+                    continue
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime, path, stat.st_size))
+        for _, path, size in sorted(entries):
+            self._disk[path] = size
+            self.disk_bytes += size
+        self._evict_disk()
+
+    def _entry_path(self, key: str, tag: str) -> str:
+        return os.path.join(self.cache_dir, tag, f"{key}.json")
+
+    def model_fingerprint(self, model_path: str) -> str:
+        """Hash of the names, sizes and mtimes of a model's weight/config files"""
+        signature = []
+        try:
+            for entry in sorted(os.scandir(model_path), key=lambda e: e.name):
+                if entry.is_file() and entry.name.endswith(MODEL_FILE_SUFFIXES):
+                    stat = entry.stat()
+                    signature.append([entry.name, stat.st_size, stat.st_mtime_ns])
+        except OSError:
+            pass
+        payload = json.dumps([os.path.abspath(model_path), signature])
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def _adapter_signature(files) -> List[Optional[Tuple[int, int, int]]]:
+        """(size, mtime, inode) per file; atomic saves change the inode"""
+        signature = []
+        for path in files:
+            try:
+                stat = os.stat(path)
+                signature.append((stat.st_size, stat.st_mtime_ns, stat.st_ino))
+            except OSError:
+                signature.append(None)
+        return signature
+
+    @staticmethod
+    def _hash_adapter_files(files, signature) -> str:
+        digest = hashlib.sha256()
+        for path, stat in zip(files, signature):
+            if stat is None:
+                continue
+            digest.update(os.path.basename(path).encode("utf-8"))
+            with open(path, 'rb') as f:
+                for block in iter(lambda: f.read(HASH_CHUNK_SIZE), b""):
+                    digest.update(block)
+        return digest.hexdigest()
+
+    async def adapter_hash(self, adapter_path: Optional[str]) -> str:
+        """SHA-256 of the adapter's weights and config.
+
+        Training rewrites the weights at every save and they can be hundreds
+        of MB, so a changed file is hashed on a worker thread to keep the
+        event loop serving; concurrent requests share one read.
+        """
+        if not adapter_path:
+            return "none"
+        files = list(adapter_files(adapter_path))
+        signature = self._adapter_signature(files)
+        memo = self._adapter_hashes.get(adapter_path)
+        if memo and memo[0] == signature:
+            return memo[1]
+
+        flight = (adapter_path, tuple(signature))
+        task = self._hashing.get(flight)
+        if task is None:
+            task = asyncio.ensure_future(asyncio.to_thread(self._hash_adapter_files, files, signature))
+            self._hashing[flight] = task
+            task.add_done_callback(lambda _: self._hashing.pop(flight, None))
+        # Shielded so one cancelled request doesn't abort the read for the others
+        content_hash = await asyncio.shield(task)
+        self._adapter_hashes[adapter_path] = (signature, content_hash)
+        return content_hash
+
+    async def key(self, model_path: str, adapter_path: Optional[str], prompt: str,
+                  params: Dict[str, Any]) -> str:
+        """Content address of a request"""
+        payload = json.dumps({
+            "model": self.model_fingerprint(model_path),
+            "adapter": await self.adapter_hash(adapter_path),
+            "prompt": prompt,
+            "params": params,
+        }, sort_keys=True)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get(self, key: str, adapter_path: Optional[str]) -> Optional[Dict[str, Any]]:
+        entry = self._memory.get(key)
+        if entry is not None:
+            self._memory.move_to_end(key)
+            self.memory_hits += 1
+            return entry[1]
+
+        tag = adapter_tag(adapter_path)
+        path = self._entry_path(key, tag)
+        if path in self._disk:
+            try:
+                with open(path, 'r') as f:
+                    response = json.load(f)["response"]
+                os.utime(path)
+            except (OSError, ValueError, KeyError):
+                self._drop_disk_entry(path)
+            else:
+                self._disk.move_to_end(path)
+                self._remember(key, tag, response)
+                self.disk_hits += 1
+                return response
+
+        self.misses += 1
+        return None
+
+    def put(self, key: str, adapter_path: Optional[str], response: Dict[str, Any]):
+        tag = adapter_tag(adapter_path)
+        self._remember(key, tag, response)
+
+        path = self._entry_path(key, tag)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            atomic_write_json(path, {
+                "key": key,
+                "adapter_path": adapter_path,
+                "created": time.time(),
+                "response": response
+            })
+            size = os.path.getsize(path)
+        except OSError as e:
+            logger.warning(f"Failed to write response cache entry: {e}")
+            return
+        self.disk_bytes += size - self._disk.pop(path, 0)
+        self._disk[path] = size
+        self._evict_disk()
+
+    def _remember(self, key: str, tag: str, response: Dict[str, Any]):
+        self._memory[key] = (tag, response)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+
+    def _drop_disk_entry(self, path: str):
+        self.disk_bytes -= self._disk.pop(path, 0)
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+    def _evict_disk(self):
+        while self.disk_bytes > self.disk_budget_bytes and self._disk:
+            path = next(iter(self._disk))
+            self._drop_disk_entry(path)
+            self.evictions += 1
+
+    def invalidate_adapter(self, adapter_path: str) -> int:
+        """Drop every entry generated with this adapter; returns entries removed"""
+        tag = adapter_tag(adapter_path)
+        stale = [key for key, (entry_tag, _) in self._memory.items() if entry_tag == tag]
+        for key in stale:
+            del self._memory[key]
+
+        directory = os.path.join(self.cache_dir, tag)
+        prefix = directory + os.sep
+        on_disk = [path for path in self._disk if path.startswith(prefix)]
+        for path in on_disk:
+            self.disk_bytes -= self._disk.pop(path)
+        shutil.rmtree(directory, ignore_errors=True)
+        for path in [path for path in self._adapter_hashes if adapter_tag(path) == tag]:
+            del self._adapter_hashes[path]
+
+        removed = len(set(stale) | {os.path.basename(path)[:-5] for path in on_disk})
+        if removed:
+            self.invalidations += 1
+            logger.info(f"Invalidated {removed} cached responses for adapter {adapter_path}")
+        return removed
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.memory_hits + self.disk_hits + self.misses
+        return {
+            "hits": self.memory_hits + self.disk_hits,
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_rate": (self.memory_hits + self.disk_hits) / lookups if lookups else None,
+            "memory_entries": len(self._memory),
+            "disk_entries": len(self._disk),
+            "disk_bytes": self.disk_bytes,
+            "disk_budget_bytes": self.disk_budget_bytes,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+        }
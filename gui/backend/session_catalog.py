@@ -0,0 +1,184 @@
+"""
+Indexed session catalog
+
+SQLite (WAL) table of session summaries, kept in step with the session
+JSON files so listing sessions never has to open every file.
+"""
+
+import json
+import logging
+import os
+import sqlite3
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+CATALOG_FILENAME = "catalog.sqlite3"
+
+# Columns clients may sort by
+SORTABLE_COLUMNS = (
+    "timestamp", "training_state", "model_name", "adapter_name",
+    "final_train_loss", "final_val_loss", "best_val_loss", "steps_completed",
+)
+
+SUMMARY_COLUMNS = (
+    "session_id", "timestamp", "training_state", "model_name", "adapter_name",
+    "final_train_loss", "final_val_loss", "best_val_loss", "steps_completed", "total_steps",
+)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    session_id TEXT PRIMARY KEY,
+    timestamp TEXT NOT NULL,
+    training_state TEXT,
+    model_name TEXT,
+    adapter_name TEXT,
+    final_train_loss REAL,
+    final_val_loss REAL,
+    best_val_loss REAL,
+    steps_completed INTEGER,
+    total_steps INTEGER
+);
+CREATE INDEX IF NOT EXISTS idx_sessions_timestamp ON sessions (timestamp);
+CREATE INDEX IF NOT EXISTS idx_sessions_state ON sessions (training_state);
+CREATE INDEX IF NOT EXISTS idx_sessions_model ON sessions (model_name);
+CREATE INDEX IF NOT EXISTS idx_sessions_adapter ON sessions (adapter_name);
+"""
+
+
+def summarize_session(session_data: Dict[str, Any]) -> Dict[str, Any]:
+    """Extract the catalog row for a full session record"""
+    config = session_data.get("config") or {}
+    metrics = session_data.get("metrics") or {}
+    best_model = session_data.get("best_model") or {}
+    return {
+        "session_id": session_data["session_id"],
+        "timestamp": session_data["timestamp"],
+        "training_state": session_data.get("training_state"),
+        "model_name": (config.get("model_path") or "").split('/')[-1],
+        "adapter_name": config.get("adapter_name"),
+        "final_train_loss": metrics.get("train_loss"),
+        "final_val_loss": metrics.get("val_loss"),
+        "best_val_loss": best_model.get("val_loss"),
+        "steps_completed": metrics.get("current_step", 0),
+        "total_steps": metrics.get("total_steps", 0),
+    }
+
+
+class SessionCatalog:
+    """Paginated, filterable index over the sessions directory"""
+
+    def __init__(self, sessions_dir: str):
+        self.sessions_dir = sessions_dir
+        self.db_path = os.path.join(sessions_dir, CATALOG_FILENAME)
+        is_new = not os.path.exists(self.db_path)
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+
+        if is_new:
+            # One-shot migration from the existing JSON files
+            count = self.rebuild()
+            if count:
+                logger.info(f"Migrated {count} sessions into {self.db_path}")
+
+    def upsert(self, session_data: Dict[str, Any]):
+        row = summarize_session(session_data)
+        placeholders = ", ".join("?" for _ in SUMMARY_COLUMNS)
+        with self._lock, self._conn:
+            self._conn.execute(
+                f"INSERT OR REPLACE INTO sessions ({', '.join(SUMMARY_COLUMNS)}) VALUES ({placeholders})",
+                [row[column] for column in SUMMARY_COLUMNS]
+            )
+
+    def delete(self, session_id: str):
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM sessions WHERE session_id = ?", (session_id,))
+
+    def latest_session_id(self) -> Optional[str]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT session_id FROM sessions ORDER BY timestamp DESC LIMIT 1"
+            ).fetchone()
+        return row["session_id"] if row else None
+
+    def query(
+        self,
+        limit: Optional[int] = None,
+        offset: int = 0,
+        state: Optional[str] = None,
+        model_name: Optional[str] = None,
+        adapter_name: Optional[str] = None,
+        search: Optional[str] = None,
+        sort_by: str = "timestamp",
+        descending: bool = True,
+    ) -> Tuple[List[Dict[str, Any]], int]:
+        """Return one page of session summaries and the total match count"""
+        if sort_by not in SORTABLE_COLUMNS:
+            raise ValueError(f"sort_by must be one of: {', '.join(SORTABLE_COLUMNS)}")
+
+        clauses, params = [], []
+        if state:
+            clauses.append("training_state = ?")
+            params.append(state)
+        if model_name:
+            clauses.append("model_name = ?")
+            params.append(model_name)
+        if adapter_name:
+            clauses.append("adapter_name = ?")
+            params.append(adapter_name)
+        if search:
+            clauses.append("(model_name LIKE ? OR adapter_name LIKE ? OR session_id LIKE ?)")
+            params.extend([f"%{search}%"] * 3)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+
+        order = "DESC" if descending else "ASC"
+        # Keep NULL losses at the end regardless of direction
+        order_by = f"{sort_by} IS NULL, {sort_by} {order}, timestamp DESC"
+        page = ""
+        page_params: List[Any] = []
+        if limit is not None:
+            page = "LIMIT ? OFFSET ?"
+            page_params = [limit, offset]
+        elif offset:
+            page = "LIMIT -1 OFFSET ?"
+            page_params = [offset]
+
+        with self._lock:
+            total = self._conn.execute(f"SELECT COUNT(*) FROM sessions {where}", params).fetchone()[0]
+            rows = self._conn.execute(
+                f"SELECT {', '.join(SUMMARY_COLUMNS)} FROM sessions {where} ORDER BY {order_by} {page}",
+                params + page_params
+            ).fetchall()
+        return [dict(row) for row in rows], total
+
+    def rebuild(self) -> int:
+        """Recreate the catalog from the session JSON files on disk"""
+        rows = []
+        for filename in os.listdir(self.sessions_dir):
+            if not (filename.startswith("session_") and filename.endswith(".json")):
+                continue
+            session_file = os.path.join(self.sessions_dir, filename)
+            try:
+                with open(session_file, 'r') as f:
+                    rows.append(summarize_session(json.load(f)))
+            except Exception as e:
+                logger.error(f"Error reading session file {filename}: {e}")
+
+        placeholders = ", ".join("?" for _ in SUMMARY_COLUMNS)
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM sessions")
+            self._conn.executemany(
+                f"INSERT OR REPLACE INTO sessions ({', '.join(SUMMARY_COLUMNS)}) VALUES ({placeholders})",
+                [[row[column] for column in SUMMARY_COLUMNS] for row in rows]
+            )
+        return len(rows)
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,163 @@
+"""
+Append-only session journal with atomic snapshots
+
+Session state is persisted as a compact snapshot (``session_<id>.json``)
+plus a JSON-lines journal of the events since that snapshot
+(``session_<id>.journal``). Appends are cheap regardless of session size;
+snapshots are written to a temp file and renamed into place, so a crash
+never leaves a half-written session behind.
+"""
+
+import json
+import logging
+import os
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+# Event types recorded in the journal
+EVENT_CONFIG = "config"
+EVENT_METRICS = "metrics"
+EVENT_STATE = "state"
+EVENT_BEST_MODEL = "best_model"
+EVENT_CHECKPOINTS = "checkpoints"
+
+# Journal events accumulated before a compacted snapshot is due
+DEFAULT_COMPACT_EVERY = 500
+
+
+def atomic_write_json(path: str, data: Any):
+    """Write JSON via temp file + fsync + rename"""
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump(data, f, separators=(",", ":"))
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def snapshot_path(sessions_dir: str, session_id: str) -> str:
+    return os.path.join(sessions_dir, f"session_{session_id}.json")
+
+
+def journal_path(sessions_dir: str, session_id: str) -> str:
+    return os.path.join(sessions_dir, f"session_{session_id}.journal")
+
+
+def apply_event(session: Dict[str, Any], event: Dict[str, Any]):
+    """Apply one journal event to a session record in place"""
+    event_type = event.get("type")
+    data = event.get("data") or {}
+    if event_type == EVENT_CONFIG:
+        session["config"] = data.get("config")
+        session["adapter_path"] = data.get("adapter_path", session.get("adapter_path"))
+        session["metrics"] = dict(data.get("metrics") or {})
+    elif event_type == EVENT_METRICS:
+        session.setdefault("metrics", {}).update(data)
+    elif event_type == EVENT_STATE:
+        session["training_state"] = data.get("state")
+    elif event_type == EVENT_BEST_MODEL:
+        session["best_model"] = data
+    elif event_type == EVENT_CHECKPOINTS:
+        session["checkpoints"] = data
+    session["timestamp"] = event.get("timestamp", session.get("timestamp"))
+    session["journal_seq"] = event.get("seq", session.get("journal_seq", 0))
+
+
+def load_session_record(sessions_dir: str, session_id: str) -> Optional[Dict[str, Any]]:
+    """Load a session: snapshot plus replay of its journal tail"""
+    session: Optional[Dict[str, Any]] = None
+    path = snapshot_path(sessions_dir, session_id)
+    if os.path.exists(path):
+        with open(path, 'r') as f:
+            session = json.load(f)
+
+    journal = journal_path(sessions_dir, session_id)
+    if os.path.exists(journal):
+        if session is None:
+            session = {"session_id": session_id, "training_state": "idle", "metrics": {}, "best_model": None}
+        applied_seq = session.get("journal_seq", 0)
+        with open(journal, 'r') as f:
+            for line in f:
+                try:
+                    event = json.loads(line)
+                except json.JSONDecodeError:
+                    # Torn final write from a crash; everything before it is intact
+                    logger.warning(f"Ignoring truncated journal entry in {journal}")
+                    break
+                if event.get("seq", 0) > applied_seq:
+                    apply_event(session, event)
+
+    if session is not None and not session.get("config"):
+        # Journal without its config event is not a usable session
+        return None
+    return session
+
+
+class SessionJournal:
+    """Writer for one session's journal and snapshots"""
+
+    def __init__(self, sessions_dir: str, session_id: str, compact_every: int = DEFAULT_COMPACT_EVERY):
+        self.sessions_dir = sessions_dir
+        self.session_id = session_id
+        self.compact_every = compact_every
+        self.seq = 0
+        self.events_since_snapshot = 0
+        self._file = None
+
+        # Continue numbering after whatever is already on disk
+        existing = load_session_record(sessions_dir, session_id)
+        if existing:
+            self.seq = existing.get("journal_seq", 0)
+        self._drop_torn_tail()
+
+    def _drop_torn_tail(self):
+        """Cut a partial last line left by a crash so new events start clean"""
+        path = journal_path(self.sessions_dir, self.session_id)
+        if not os.path.exists(path):
+            return
+        with open(path, 'rb+') as f:
+            data = f.read()
+            if data and not data.endswith(b"\n"):
+                f.truncate(data.rfind(b"\n") + 1)
+
+    def _open(self):
+        if self._file is None:
+            self._file = open(journal_path(self.sessions_dir, self.session_id), 'a')
+        return self._file
+
+    def append(self, event_type: str, data: Dict[str, Any]) -> bool:
+        """Append an event; returns True when a compacted snapshot is due"""
+        self.seq += 1
+        event = {
+            "seq": self.seq,
+            "timestamp": datetime.now().isoformat(),
+            "type": event_type,
+            "data": data
+        }
+        f = self._open()
+        f.write(json.dumps(event, separators=(",", ":")) + "\n")
+        f.flush()
+        self.events_since_snapshot += 1
+        return self.events_since_snapshot >= self.compact_every
+
+    def snapshot(self, session: Dict[str, Any]):
+        """Write a compacted snapshot atomically, then start an empty journal"""
+        record = dict(session)
+        record["journal_seq"] = self.seq
+        atomic_write_json(snapshot_path(self.sessions_dir, self.session_id), record)
+
+        # Events up to seq are in the snapshot; replay skips them even if
+        # truncation below is interrupted
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        with open(journal_path(self.sessions_dir, self.session_id), 'w'):
+            pass
+        self.events_since_snapshot = 0
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
@@ -0,0 +1,133 @@
+"""
+Crash recovery for interrupted training sessions
+
+A session whose last recorded state is still "running" when the backend
+starts was cut short by a crash or reboot. Its adapter directory usually
+holds numbered step checkpoints; the newest one whose file is complete is
+the resume point. Resuming reuses the session id, so the journal, metric
+history and best-model pointer continue where they stopped instead of
+starting over at step 0.
+"""
+
+import json
+import logging
+import os
+from dataclasses import dataclass, asdict
+from typing import Any, Dict, Optional, Tuple
+
+import repo_root  # noqa: F401  (puts the repository root on sys.path)
+from checkpoint_manifest import list_step_checkpoints, read_manifest
+from cli.safetensors_header import read_header, SafetensorsHeaderError
+from metrics_store import MetricsSeries
+from session_journal import EVENT_METRICS, journal_path
+
+logger = logging.getLogger(__name__)
+
+# Resume interrupted sessions on startup without waiting for the user
+AUTO_RESUME = os.environ.get("MLX_GUI_AUTO_RESUME", "0").lower() in ("1", "true", "yes")
+
+# Last recorded states that mean the trainer never finished
+INTERRUPTED_STATES = ("running", "interrupted")
+
+
+@dataclass
+class ResumePoint:
+    """Where an interrupted session can pick up again"""
+    session_id: str
+    adapter_dir: str
+    step: int
+    checkpoint: str
+    total_steps: Optional[int] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+def checkpoint_is_complete(path: str) -> bool:
+    """True if a safetensors file has a readable header and all of the tensor
+    data it declares. A crash mid-save leaves a file that fails this check."""
+    try:
+        header, data_start = read_header(path)
+        file_size = os.path.getsize(path)
+    except (OSError, SafetensorsHeaderError):
+        return False
+    data_end = 0
+    for name, info in header.items():
+        if name == "__metadata__":
+            continue
+        try:
+            data_end = max(data_end, int(info["data_offsets"][1]))
+        except (KeyError, IndexError, TypeError, ValueError):
+            return False
+    return data_start + data_end <= file_size
+
+
+def latest_valid_checkpoint(adapter_dir: str) -> Optional[Tuple[int, str]]:
+    """(step, path) of the newest complete step checkpoint, skipping torn ones"""
+    for step, path in reversed(list_step_checkpoints(adapter_dir)):
+        if checkpoint_is_complete(path):
+            return step, path
+        logger.warning(f"Skipping incomplete checkpoint {path}")
+    return None
+
+
+def find_resume_point(session: Dict[str, Any]) -> Optional[ResumePoint]:
+    """Resume point of an interrupted session, or None if it can't resume"""
+    if session.get("training_state") not in INTERRUPTED_STATES:
+        return None
+    adapter_path = session.get("adapter_path")
+    if not adapter_path:
+        return None
+    adapter_dir = os.path.dirname(adapter_path)
+    latest = latest_valid_checkpoint(adapter_dir)
+    if latest is None:
+        return None
+    step, checkpoint = latest
+    total_steps = (session.get("metrics") or {}).get("total_steps")
+    if total_steps and step >= total_steps:
+        # Final checkpoint written; only the completion was lost
+        return None
+    return ResumePoint(session["session_id"], adapter_dir, step, checkpoint, total_steps)
+
+
+def restore_best_model(session: Dict[str, Any], resume: ResumePoint) -> Optional[Dict[str, Any]]:
+    """Best-model record still valid at the resume step.
+
+    Prefers the adapter's checkpoint manifest, which names a file that
+    exists; falls back to the session's own record. A best model from after
+    the resume step is dropped, since training will redo those steps.
+    """
+    best = read_manifest(resume.adapter_dir).get("best") or {}
+    if best.get("step") is not None and best["step"] <= resume.step and best.get("file"):
+        path = os.path.join(resume.adapter_dir, best["file"])
+        if os.path.exists(path):
+            return {"val_loss": best.get("val_loss"), "step": best["step"], "path": path}
+    recorded = session.get("best_model") or {}
+    if recorded.get("step") is not None and recorded["step"] <= resume.step and recorded.get("val_loss") is not None:
+        return recorded
+    return None
+
+
+def replay_metric_journal(series: MetricsSeries, sessions_dir: str, session_id: str):
+    """Append metric points journaled after the last saved history.
+
+    The .npz history is only written with each snapshot; points reported
+    between the last snapshot and the crash survive only in the journal.
+    """
+    path = journal_path(sessions_dir, session_id)
+    if not os.path.exists(path):
+        return
+    last_step = series.last_step
+    with open(path, 'r') as f:
+        for line in f:
+            try:
+                event = json.loads(line)
+            except json.JSONDecodeError:
+                break
+            if event.get("type") != EVENT_METRICS:
+                continue
+            data = dict(event.get("data") or {})
+            step = data.pop("current_step", None)
+            if step is None or (last_step is not None and step < last_step):
+                continue
+            series.append(int(step), **data)
@@ -0,0 +1,405 @@
+"""
+Persistent training job queue with a memory-budget scheduler
+
+Jobs are training configurations with an estimated memory footprint. The
+scheduler launches queued jobs in order (priority first, then submission or
+manual position) for as long as the sum of running estimates fits the
+memory budget, so several small runs can train side by side while a large
+one waits for room. Two jobs writing to the same adapter directory never
+run at once. The queue is written to disk on every change; jobs that were
+running when the server stopped are put back at the front of the queue.
+"""
+
+import asyncio
+import json
+import logging
+import math
+import os
+import time
+import uuid
+from dataclasses import dataclass, asdict, field, fields
+from datetime import datetime, timedelta
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set, Tuple
+
+import repo_root  # noqa: F401  (puts the repository root on sys.path)
+from inference_pool import estimate_memory_mb
+from session_journal import atomic_write_json
+
+logger = logging.getLogger(__name__)
+
+QUEUE_FILENAME = "training_queue.json"
+
+# Used when neither MLX_GUI_TRAINING_MEMORY_MB nor HardwareConfig sets a budget
+DEFAULT_TRAINING_MEMORY_MB = 16384
+
+# Seconds between scheduling passes when nothing wakes the scheduler
+SCHEDULER_POLL_INTERVAL = 5.0
+
+# Finished jobs kept for display
+MAX_FINISHED_JOBS = 50
+
+# Fallback seconds per step when no run of the model has finished yet
+DEFAULT_SECONDS_PER_STEP = float(os.environ.get("MLX_GUI_TRAINING_SECONDS_PER_STEP", "1.0"))
+
+FINISHED_STATES = ("completed", "failed", "cancelled")
+
+
+def default_memory_budget_mb() -> int:
+    """Training memory budget: env override, else HardwareConfig.max_memory_mb"""
+    env_budget = os.environ.get("MLX_GUI_TRAINING_MEMORY_MB")
+    if env_budget:
+        return int(env_budget)
+    try:
+        from cli.config import ConfigManager
+        max_memory_mb = ConfigManager().create_default_config().hardware.max_memory_mb
+    except Exception as e:
+        logger.debug(f"Hardware detection unavailable: {e}")
+        max_memory_mb = None
+    return max_memory_mb or DEFAULT_TRAINING_MEMORY_MB
+
+
+def estimate_training_memory_mb(model_path: str, batch_size: int, max_seq_length: int) -> int:
+    """Weights plus activations kept under gradient checkpointing"""
+    weights_mb = estimate_memory_mb(model_path)
+    try:
+        with open(os.path.join(model_path, "config.json"), 'r') as f:
+            model_config = json.load(f)
+    except (OSError, ValueError):
+        model_config = {}
+    hidden = model_config.get("hidden_size", 4096)
+    layers = model_config.get("num_hidden_layers", 32)
+    vocab = model_config.get("vocab_size", 32000)
+    tokens = max(1, batch_size) * max(1, max_seq_length)
+    # Layer inputs (fp16) for every layer, one layer's recomputed
+    # intermediates, and fp32 logits with their gradient
+    activation_bytes = tokens * hidden * 2 * layers + tokens * hidden * 2 * 16 + tokens * vocab * 4 * 2
+    return weights_mb + int(activation_bytes / (1024 * 1024))
+
+
+@dataclass
+class TrainingJob:
+    """One queued training run"""
+    job_id: str
+    config: Dict[str, Any]
+    memory_mb: int
+    priority: int = 0
+    state: str = "queued"
+    submitted_at: str = field(default_factory=lambda: datetime.now().isoformat())
+    started_at: Optional[str] = None
+    finished_at: Optional[str] = None
+    session_id: Optional[str] = None
+    error: Optional[str] = None
+    sweep_id: Optional[str] = None
+
+    @property
+    def adapter_name(self) -> str:
+        return self.config.get("adapter_name", "")
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "TrainingJob":
+        known = {f.name for f in fields(cls)}
+        return cls(**{key: value for key, value in data.items() if key in known})
+
+
+# Starts a job and returns its runner: an object with monitor_task,
+# training_state, training_metrics, current_session_id and stop_training()
+# (a TrainingManager)
+Launcher = Callable[[TrainingJob], Awaitable[Any]]
+
+
+class TrainingScheduler:
+    """Runs queued jobs concurrently within a memory budget"""
+
+    def __init__(self, state_dir: str, launch: Launcher,
+                 budget_mb: Optional[int] = None,
+                 external_load: Optional[Callable[[], Tuple[int, Set[str]]]] = None,
+                 on_change: Optional[Callable[[Dict[str, Any]], None]] = None):
+        self.path = os.path.join(state_dir, QUEUE_FILENAME)
+        self.launch = launch
+        self.budget_mb = budget_mb or default_memory_budget_mb()
+        # Memory and adapter names of runs started outside the queue
+        self.external_load = external_load or (lambda: (0, set()))
+        self.on_change = on_change
+        # Queued job ids in scheduling order
+        self.order: List[str] = []
+        self.jobs: Dict[str, TrainingJob] = {}
+        self.runners: Dict[str, Any] = {}
+        # Observed seconds per training step, per base model
+        self.step_seconds: Dict[str, float] = {}
+        self._wake = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self._load()
+
+    # Persistence
+
+    def _load(self):
+        try:
+            with open(self.path, 'r') as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError) as e:
+            logger.error(f"Could not read training queue: {e}")
+            return
+        self.step_seconds = data.get("step_seconds", {})
+        interrupted = []
+        for item in data.get("jobs", []):
+            job = TrainingJob.from_dict(item)
+            if job.state == "running":
+                # The server stopped under it; run it again first
+                job.state = "queued"
+                job.started_at = None
+                interrupted.append(job.job_id)
+            self.jobs[job.job_id] = job
+        queued = [job_id for job_id in data.get("order", []) if job_id in self.jobs and job_id not in interrupted]
+        self.order = interrupted + queued
+        if interrupted:
+            logger.info(f"Requeued {len(interrupted)} training jobs interrupted by a restart")
+
+    def _save(self):
+        finished = sorted(
+            (job for job in self.jobs.values() if job.state in FINISHED_STATES),
+            key=lambda job: job.finished_at or ""
+        )
+        for job in finished[:-MAX_FINISHED_JOBS]:
+            del self.jobs[job.job_id]
+        try:
+            atomic_write_json(self.path, {
+                "order": self.order,
+                "jobs": [asdict(job) for job in self.jobs.values()],
+                "step_seconds": self.step_seconds,
+            })
+        except OSError as e:
+            logger.error(f"Failed to save training queue: {e}")
+
+    def _changed(self):
+        self._save()
+        self._wake.set()
+        if self.on_change:
+            self.on_change(self.snapshot())
+
+    # Queue operations
+
+    def submit(self, config: Dict[str, Any], memory_mb: int, priority: int = 0,
+               sweep_id: Optional[str] = None) -> TrainingJob:
+        job = TrainingJob(job_id=uuid.uuid4().hex[:12], config=config, memory_mb=memory_mb,
+                          priority=priority, sweep_id=sweep_id)
+        self.jobs[job.job_id] = job
+        self._insert(job)
+        logger.info(f"Queued training job {job.job_id} ({job.adapter_name}, {memory_mb}MB, priority {priority})")
+        self._changed()
+        return job
+
+    def _insert(self, job: TrainingJob):
+        """Place a job after every queued job of equal or higher priority"""
+        position = len(self.order)
+        for index, job_id in enumerate(self.order):
+            if self.jobs[job_id].priority < job.priority:
+                position = index
+                break
+        self.order.insert(position, job.job_id)
+
+    def get(self, job_id: str) -> Optional[TrainingJob]:
+        return self.jobs.get(job_id)
+
+    def update(self, job_id: str, priority: Optional[int] = None, position: Optional[int] = None) -> TrainingJob:
+        """Change a queued job's priority and/or move it to a queue position"""
+        job = self.jobs[job_id]
+        if job.state != "queued":
+            raise ValueError(f"Job {job_id} is {job.state}, only queued jobs can be reordered")
+        if priority is not None:
+            job.priority = priority
+            self.order.remove(job_id)
+            self._insert(job)
+        if position is not None:
+            self.order.remove(job_id)
+            self.order.insert(max(0, min(position, len(self.order))), job_id)
+        self._changed()
+        return job
+
+    async def cancel(self, job_id: str) -> TrainingJob:
+        """Remove a queued job, or stop a running one"""
+        job = self.jobs[job_id]
+        if job.state == "queued":
+            self.order.remove(job_id)
+            self._finish(job, "cancelled")
+        elif job.state == "running":
+            await self.runners[job_id].stop_training()
+        return job
+
+    def _finish(self, job: TrainingJob, state: str, error: Optional[str] = None):
+        job.state = state
+        job.error = error
+        job.finished_at = datetime.now().isoformat()
+        self._changed()
+
+    # Scheduling
+
+    def start(self):
+        self._task = asyncio.create_task(self._run())
+
+    async def close(self):
+        if self._task:
+            self._task.cancel()
+            self._task = None
+
+    async def _run(self):
+        while True:
+            self._wake.clear()
+            try:
+                await self._schedule()
+            except Exception as e:
+                logger.error(f"Training scheduler error: {e}")
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=SCHEDULER_POLL_INTERVAL)
+            except asyncio.TimeoutError:
+                pass
+
+    def usage(self) -> Tuple[int, Set[str]]:
+        """Memory in use and adapter names being written, queue and manual runs"""
+        used, adapters = self.external_load()
+        adapters = set(adapters)
+        for job_id in self.runners:
+            used += self.jobs[job_id].memory_mb
+            adapters.add(self.jobs[job_id].adapter_name)
+        return used, adapters
+
+    async def _schedule(self):
+        used, busy_adapters = self.usage()
+        while self.order:
+            job = self.jobs[self.order[0]]
+            if job.adapter_name in busy_adapters:
+                break
+            # A job larger than the whole budget still runs, alone
+            if used + job.memory_mb > self.budget_mb and used > 0:
+                break
+            self.order.pop(0)
+            await self._launch(job)
+            if job.state == "running":
+                used += job.memory_mb
+                busy_adapters.add(job.adapter_name)
+
+    async def _launch(self, job: TrainingJob):
+        try:
+            runner = await self.launch(job)
+        except Exception as e:
+            logger.error(f"Failed to launch training job {job.job_id}: {e}")
+            self._finish(job, "failed", str(e))
+            return
+        job.state = "running"
+        job.started_at = datetime.now().isoformat()
+        job.session_id = runner.current_session_id
+        self.runners[job.job_id] = runner
+        logger.info(f"Started training job {job.job_id} ({job.adapter_name})")
+        asyncio.create_task(self._watch(job, runner))
+        self._changed()
+
+    async def _watch(self, job: TrainingJob, runner: Any):
+        started = time.monotonic()
+        try:
+            if runner.monitor_task:
+                await runner.monitor_task
+        except Exception as e:
+            logger.error(f"Training job {job.job_id} monitor failed: {e}")
+        self.runners.pop(job.job_id, None)
+
+        steps = runner.training_metrics.get("current_step") or 0
+        if steps > 0:
+            observed = (time.monotonic() - started) / steps
+            model = job.config.get("model_path", "")
+            previous = self.step_seconds.get(model)
+            self.step_seconds[model] = observed if previous is None else 0.5 * previous + 0.5 * observed
+
+        state = {"completed": "completed", "stopped": "cancelled"}.get(runner.training_state, "failed")
+        error = None if state != "failed" else f"Training ended in state {runner.training_state}"
+        logger.info(f"Training job {job.job_id} {state}")
+        self._finish(job, state, error)
+
+    # Reporting
+
+    def _job_duration(self, job: TrainingJob) -> Optional[float]:
+        """Expected seconds for a whole run, from observed step times"""
+        steps = job.config.get("iterations") or 0
+        seconds = self.step_seconds.get(job.config.get("model_path", ""), DEFAULT_SECONDS_PER_STEP)
+        return steps * seconds if steps else None
+
+    def _remaining(self, job: TrainingJob) -> Optional[float]:
+        metrics = self.runners[job.job_id].training_metrics
+        if metrics.get("estimated_time_remaining") is not None:
+            return metrics["estimated_time_remaining"]
+        duration = self._job_duration(job)
+        if duration is None:
+            return None
+        started = datetime.fromisoformat(job.started_at) if job.started_at else datetime.now()
+        return max(0.0, duration - (datetime.now() - started).total_seconds())
+
+    def estimate_starts(self) -> Dict[str, Optional[float]]:
+        """Seconds until each queued job is expected to start.
+
+        Replays the scheduler against expected finish times: each job starts
+        once earlier jobs have started and enough running jobs have finished
+        to fit it. None when it waits behind a run of unknown length.
+        """
+        # (seconds until finished, memory, adapter names); manual runs never finish here
+        used, busy_adapters = self.external_load()
+        running = [(math.inf, used, set(busy_adapters))] if used or busy_adapters else []
+        for job_id in self.runners:
+            job = self.jobs[job_id]
+            remaining = self._remaining(job)
+            running.append((math.inf if remaining is None else remaining, job.memory_mb, {job.adapter_name}))
+
+        starts: Dict[str, Optional[float]] = {}
+        now = 0.0
+        for job_id in self.order:
+            job = self.jobs[job_id]
+
+            def blocked():
+                in_use = sum(memory for _, memory, _ in running)
+                adapter_busy = any(job.adapter_name in adapters for _, _, adapters in running)
+                return adapter_busy or (in_use + job.memory_mb > self.budget_mb and in_use > 0)
+
+            while blocked() and running:
+                now = max(now, min(finish for finish, _, _ in running))
+                running = [entry for entry in running if entry[0] > now]
+            if math.isinf(now):
+                starts[job_id] = None
+                continue
+            starts[job_id] = now
+            duration = self._job_duration(job)
+            running.append((math.inf if duration is None else now + duration, job.memory_mb, {job.adapter_name}))
+        return starts
+
+    def snapshot(self) -> Dict[str, Any]:
+        starts = self.estimate_starts()
+        positions = {job_id: index for index, job_id in enumerate(self.order)}
+        now = datetime.now()
+        running = [job for job in self.jobs.values() if job.state == "running"]
+        queued = [self.jobs[job_id] for job_id in self.order]
+        finished = sorted((job for job in self.jobs.values() if job.state in FINISHED_STATES),
+                          key=lambda job: job.finished_at or "", reverse=True)
+        jobs = []
+        for job in running + queued + finished:
+            entry = asdict(job)
+            if job.state == "queued":
+                wait = starts.get(job.job_id)
+                entry["position"] = positions[job.job_id] + 1
+                entry["estimated_wait_seconds"] = wait
+                entry["estimated_start"] = (now + timedelta(seconds=wait)).isoformat() if wait is not None else None
+            elif job.state == "running":
+                metrics = self.runners[job.job_id].training_metrics
+                entry["progress"] = {
+                    "current_step": metrics.get("current_step"),
+                    "total_steps": metrics.get("total_steps"),
+                    "train_loss": metrics.get("train_loss"),
+                    "val_loss": metrics.get("val_loss"),
+                }
+                entry["estimated_time_remaining"] = self._remaining(job)
+            jobs.append(entry)
+        used, _ = self.usage()
+        return {
+            "budget_mb": self.budget_mb,
+            "used_mb": used,
+            "queued": len(self.order),
+            "running": len(self.runners),
+            "jobs": jobs,
+        }
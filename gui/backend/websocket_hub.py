@@ -0,0 +1,202 @@
+"""
+WebSocket fan-out hub
+
+Each client gets its own bounded outbound queue and writer task, so a slow
+or half-dead client never delays updates to the others or the caller.
+"""
+
+import asyncio
+import logging
+from collections import deque
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from fastapi import WebSocket
+
+from progress_stream import MAX_LOG_LINES_PER_MESSAGE
+
+logger = logging.getLogger(__name__)
+
+
+def merge_training_deltas(older: Dict[str, Any], newer: Dict[str, Any]) -> Dict[str, Any]:
+    """One delta equivalent to applying older then newer.
+
+    ``from_version`` keeps the version the merged delta builds on, so a
+    client can still tell a merge (no gap) from a missed message. A
+    ``replace`` delta drops the metrics merged before it, and the result
+    stays a replace.
+    """
+    old, new = older["data"], newer["data"]
+    logs = old.get("logs", []) + new.get("logs", [])
+    dropped = old.get("dropped_logs", 0) + new.get("dropped_logs", 0)
+    if len(logs) > MAX_LOG_LINES_PER_MESSAGE:
+        dropped += len(logs) - MAX_LOG_LINES_PER_MESSAGE
+        logs = logs[-MAX_LOG_LINES_PER_MESSAGE:]
+    if new.get("replace"):
+        metrics = dict(new.get("metrics", {}))
+    else:
+        metrics = {**old.get("metrics", {}), **new.get("metrics", {})}
+    data: Dict[str, Any] = {
+        "version": new["version"],
+        "from_version": old.get("from_version", old["version"] - 1),
+        "metrics": metrics,
+        "logs": logs,
+    }
+    if dropped:
+        data["dropped_logs"] = dropped
+    if old.get("replace") or new.get("replace"):
+        data["replace"] = True
+    return {**newer, "data": data}
+
+
+# Message types folded into the unsent copy when a client falls behind.
+# Messages are shared by every client, so merges build new dicts.
+COALESCE_TYPES: Dict[str, Callable[[Dict[str, Any], Dict[str, Any]], Dict[str, Any]]] = {
+    "training_delta": merge_training_deltas,
+}
+
+
+def coalesce_key(message: Dict[str, Any]) -> Tuple[Any, Any]:
+    """Messages merge only with the same type from the same run (queued
+    jobs tag theirs with a job id)"""
+    return message.get("type"), message.get("job_id")
+
+
+class ClientChannel:
+    """Outbound queue and writer task for a single WebSocket client"""
+
+    def __init__(self, websocket: WebSocket, max_queue: int, send_timeout: float):
+        self.websocket = websocket
+        self.max_queue = max_queue
+        self.send_timeout = send_timeout
+        # Each entry is a one-item list so coalesced messages can be swapped in place
+        self.queue: deque = deque()
+        self.pending: Dict[Tuple[Any, Any], List[Dict[str, Any]]] = {}
+        self.wakeup = asyncio.Event()
+        self.task: Optional[asyncio.Task] = None
+        self.closed = False
+        self.sent = 0
+        self.coalesced = 0
+
+    def enqueue(self, message: Dict[str, Any]) -> bool:
+        """Queue a message without blocking; returns False if the client overflowed"""
+        if self.closed:
+            return False
+
+        message_type = message.get("type")
+        pending_key = coalesce_key(message)
+        if message_type in COALESCE_TYPES:
+            slot = self.pending.get(pending_key)
+            if slot is not None:
+                # Client is behind: fold the message into the unsent one
+                slot[0] = COALESCE_TYPES[message_type](slot[0], message)
+                self.coalesced += 1
+                return True
+
+        if len(self.queue) >= self.max_queue:
+            return False
+
+        slot = [message]
+        if message_type in COALESCE_TYPES:
+            self.pending[pending_key] = slot
+        self.queue.append(slot)
+        self.wakeup.set()
+        return True
+
+    async def run(self, on_evict):
+        """Drain the queue, evicting the client if a send stalls past the deadline"""
+        try:
+            while not self.closed:
+                if not self.queue:
+                    self.wakeup.clear()
+                    await self.wakeup.wait()
+                    continue
+
+                slot = self.queue.popleft()
+                message = slot[0]
+                pending_key = coalesce_key(message)
+                if self.pending.get(pending_key) is slot:
+                    del self.pending[pending_key]
+
+                await asyncio.wait_for(self.websocket.send_json(message), timeout=self.send_timeout)
+                self.sent += 1
+        except asyncio.CancelledError:
+            pass
+        except asyncio.TimeoutError:
+            logger.warning(f"WebSocket client stuck for over {self.send_timeout}s, evicting")
+            await on_evict(self)
+        except Exception:
+            await on_evict(self)
+
+
+class WebSocketHub:
+    """Concurrent fan-out to all connected WebSocket clients"""
+
+    def __init__(self, max_queue: int = 256, send_timeout: float = 10.0):
+        self.max_queue = max_queue
+        self.send_timeout = send_timeout
+        self.clients: Dict[WebSocket, ClientChannel] = {}
+        self.evicted = 0
+
+    def __len__(self) -> int:
+        return len(self.clients)
+
+    def register(self, websocket: WebSocket, initial: Optional[Dict[str, Any]] = None) -> ClientChannel:
+        """Start a writer for a newly accepted client"""
+        channel = ClientChannel(websocket, self.max_queue, self.send_timeout)
+        self.clients[websocket] = channel
+        if initial is not None:
+            channel.enqueue(initial)
+        channel.task = asyncio.create_task(channel.run(self._evict))
+        return channel
+
+    def unregister(self, websocket: WebSocket):
+        """Forget a client and stop its writer"""
+        channel = self.clients.pop(websocket, None)
+        if channel is None:
+            return
+        channel.closed = True
+        if channel.task and channel.task is not asyncio.current_task():
+            channel.task.cancel()
+
+    def publish(self, message: Dict[str, Any]):
+        """Queue a message for every client; never waits on the network"""
+        overflowed = [
+            channel for channel in self.clients.values()
+            if not channel.enqueue(message)
+        ]
+        for channel in overflowed:
+            logger.warning("WebSocket client queue overflowed, evicting")
+            asyncio.create_task(self._evict(channel))
+
+    def send(self, websocket: WebSocket, message: Dict[str, Any]) -> bool:
+        """Queue a message for one client; returns False if it is gone"""
+        channel = self.clients.get(websocket)
+        if channel is None:
+            return False
+        if not channel.enqueue(message):
+            logger.warning("WebSocket client queue overflowed, evicting")
+            asyncio.create_task(self._evict(channel))
+            return False
+        return True
+
+    async def _evict(self, channel: ClientChannel):
+        if channel.closed and channel.websocket not in self.clients:
+            return
+        self.evicted += 1
+        self.unregister(channel.websocket)
+        try:
+            await asyncio.wait_for(channel.websocket.close(), timeout=1.0)
+        except Exception:
+            pass
+
+    async def close(self):
+        """Stop all writers (used on shutdown)"""
+        for websocket in list(self.clients):
+            self.unregister(websocket)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "clients": len(self.clients),
+            "evicted": self.evicted,
+            "queued": sum(len(channel.queue) for channel in self.clients.values()),
+        }
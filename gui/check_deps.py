@@ -67,7 +67,7 @@ def main():
     issues = []
     
     # Check backend Python dependencies
-    backend_modules = ["fastapi", "uvicorn", "websockets", "pydantic", "yaml"]
+    backend_modules = ["fastapi", "uvicorn", "websockets", "pydantic", "yaml", "numpy"]
     
     for module in backend_modules:
         success, error = check_python_module(module)
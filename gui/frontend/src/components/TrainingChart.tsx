@@ -1,4 +1,4 @@
-import React, { useEffect, useRef } from 'react';
+import React, { useEffect, useRef, useState } from 'react';
 import { useSelector } from 'react-redux';
 import {
   Chart as ChartJS,
@@ -29,64 +29,79 @@ interface DataPoint {
   step: number;
   trainLoss: number | null;
   valLoss: number | null;
-  learningRate: number;
 }
 
+interface MetricSeries {
+  step: number[];
+  value: number[];
+}
+
+const METRICS_URL = 'http://localhost:8000/training/metrics';
+const MAX_CHART_POINTS = 500;
+const REFRESH_INTERVAL_MS = 2000;
+
+// Merge the independently downsampled loss series into one row per step
+const mergeSeries = (train?: MetricSeries, val?: MetricSeries): DataPoint[] => {
+  const byStep = new Map<number, DataPoint>();
+  const pointAt = (step: number) => {
+    let point = byStep.get(step);
+    if (!point) {
+      point = { step, trainLoss: null, valLoss: null };
+      byStep.set(step, point);
+    }
+    return point;
+  };
+  train?.step.forEach((step, i) => { pointAt(step).trainLoss = train.value[i]; });
+  val?.step.forEach((step, i) => { pointAt(step).valLoss = val.value[i]; });
+  return Array.from(byStep.values()).sort((a, b) => a.step - b.step);
+};
+
 export const TrainingChart: React.FC = () => {
   const { metrics, state: trainingState } = useSelector((state: RootState) => state.training);
-  const dataPointsRef = useRef<DataPoint[]>([]);
+  const [dataPoints, setDataPoints] = useState<DataPoint[]>([]);
+  const lastFetchRef = useRef<number>(0);
 
+  // Fetch the whole (server-downsampled) history in one request, throttled
   useEffect(() => {
-    if (metrics && (trainingState === 'running' || trainingState === 'completed')) {
-      // Only add data points when we have actual loss values (not null)
-      if (metrics.train_loss != null || metrics.val_loss != null) {
-        const newPoint: DataPoint = {
-          step: metrics.current_step,
-          trainLoss: metrics.train_loss,
-          valLoss: metrics.val_loss,
-          learningRate: metrics.learning_rate
-        };
-
-        // Avoid duplicate points
-        const lastPoint = dataPointsRef.current[dataPointsRef.current.length - 1];
-        if (!lastPoint || lastPoint.step !== newPoint.step) {
-          dataPointsRef.current.push(newPoint);
-          
-          // Keep only last 1000 points for performance
-          if (dataPointsRef.current.length > 1000) {
-            dataPointsRef.current = dataPointsRef.current.slice(-1000);
-          }
-        }
-      }
+    if (trainingState !== 'running' && trainingState !== 'completed' && trainingState !== 'stopped') {
+      return;
     }
-    
-    // For completed training sessions with no chart data, create a synthetic final point
-    if (trainingState === 'completed' && metrics && dataPointsRef.current.length === 0 && 
-        (metrics.train_loss != null || metrics.val_loss != null)) {
-      const finalPoint: DataPoint = {
-        step: metrics.current_step,
-        trainLoss: metrics.train_loss,
-        valLoss: metrics.val_loss,
-        learningRate: metrics.learning_rate
-      };
-      dataPointsRef.current = [finalPoint];
+    const now = Date.now();
+    if (trainingState === 'running' && now - lastFetchRef.current < REFRESH_INTERVAL_MS) {
+      return;
     }
-  }, [metrics, trainingState]);
+    lastFetchRef.current = now;
+
+    let cancelled = false;
+    fetch(`${METRICS_URL}?max_points=${MAX_CHART_POINTS}`)
+      .then(response => (response.ok ? response.json() : null))
+      .then(history => {
+        if (!cancelled && history && history.series) {
+          setDataPoints(mergeSeries(history.series.train_loss, history.series.val_loss));
+        }
+      })
+      .catch(() => {
+        // Silent - chart keeps its last data
+      });
+    return () => {
+      cancelled = true;
+    };
+  }, [metrics?.current_step, trainingState]);
 
   // Reset data when training starts fresh
   useEffect(() => {
     if (trainingState === 'idle') {
-      dataPointsRef.current = [];
+      setDataPoints([]);
     }
   }, [trainingState]);
 
   const data = {
-    labels: dataPointsRef.current.map(point => point.step.toString()),
+    labels: dataPoints.map(point => point.step.toString()),
     datasets: [
       // Only include training loss dataset if we have non-null training loss data
-      ...(dataPointsRef.current.some(point => point.trainLoss != null) ? [{
+      ...(dataPoints.some(point => point.trainLoss != null) ? [{
         label: 'Training Loss',
-        data: dataPointsRef.current.map(point => point.trainLoss),
+        data: dataPoints.map(point => point.trainLoss),
         borderColor: 'rgb(59, 130, 246)', // blue-500
         backgroundColor: 'rgba(59, 130, 246, 0.1)',
         fill: true,
@@ -94,12 +109,12 @@ export const TrainingChart: React.FC = () => {
         pointRadius: 0,
         pointHoverRadius: 4,
         borderWidth: 2,
-        spanGaps: false,  // Don't connect null values
+        spanGaps: true,  // Steps with only a val point leave gaps in train loss
       }] : []),
       // Only include validation loss dataset if we have non-null validation loss data
-      ...(dataPointsRef.current.some(point => point.valLoss != null) ? [{
+      ...(dataPoints.some(point => point.valLoss != null) ? [{
         label: 'Validation Loss',
-        data: dataPointsRef.current.map(point => point.valLoss),
+        data: dataPoints.map(point => point.valLoss),
         borderColor: 'rgb(16, 185, 129)', // green-500
         backgroundColor: 'rgba(16, 185, 129, 0.1)',
         fill: false,
@@ -107,7 +122,7 @@ export const TrainingChart: React.FC = () => {
         pointRadius: 0,
         pointHoverRadius: 4,
         borderWidth: 2,
-        spanGaps: false,  // Don't connect null values
+        spanGaps: true,  // Sparse eval points share the step axis with train loss
       }] : []),
     ],
   };
@@ -191,7 +206,7 @@ export const TrainingChart: React.FC = () => {
     },
   };
 
-  if (dataPointsRef.current.length === 0) {
+  if (dataPoints.length === 0) {
     return (
       <div className="h-64 flex items-center justify-center text-gray-500 dark:text-gray-400">
         <div className="text-center">
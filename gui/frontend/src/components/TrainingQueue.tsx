@@ -0,0 +1,128 @@
+import React from 'react';
+import { useDispatch, useSelector } from 'react-redux';
+import { ListOrdered, ChevronUp, ChevronDown, X } from 'lucide-react';
+import { RootState } from '../store/store';
+import { setQueue, type QueueJob } from '../store/slices/trainingSlice';
+import { addNotification } from '../store/slices/uiSlice';
+import axios from 'axios';
+
+const BACKEND_URL = 'http://localhost:8000';
+
+const formatDuration = (seconds: number | null | undefined) => {
+  if (seconds == null) return 'unknown';
+  if (seconds < 60) return 'now';
+  const hrs = Math.floor(seconds / 3600);
+  const mins = Math.floor((seconds % 3600) / 60);
+  return hrs > 0 ? `${hrs}h ${mins}m` : `${mins}m`;
+};
+
+const formatStart = (job: QueueJob) => {
+  if (!job.estimated_start) return 'Start time unknown';
+  const start = new Date(job.estimated_start);
+  return `Starts ~${start.toLocaleTimeString([], { hour: '2-digit', minute: '2-digit' })} (in ${formatDuration(job.estimated_wait_seconds)})`;
+};
+
+export const TrainingQueue: React.FC = () => {
+  const dispatch = useDispatch();
+  const { queue, jobMetrics } = useSelector((state: RootState) => state.training);
+
+  if (!queue || (queue.queued === 0 && queue.running === 0)) {
+    return null;
+  }
+
+  const activeJobs = queue.jobs.filter(job => job.state === 'queued' || job.state === 'running');
+
+  const handleMove = async (job: QueueJob, offset: number) => {
+    if (!job.position) return;
+    try {
+      const response = await axios.patch(`${BACKEND_URL}/training/queue/${job.job_id}`, {
+        position: job.position + offset
+      });
+      dispatch(setQueue(response.data));
+    } catch (error) {
+      dispatch(addNotification({
+        type: 'error',
+        title: 'Reorder Failed',
+        message: 'Failed to move the queued job.',
+      }));
+    }
+  };
+
+  const handleCancel = async (job: QueueJob) => {
+    try {
+      await axios.delete(`${BACKEND_URL}/training/queue/${job.job_id}`);
+    } catch (error) {
+      dispatch(addNotification({
+        type: 'error',
+        title: 'Cancel Failed',
+        message: 'Failed to cancel the training job.',
+      }));
+    }
+  };
+
+  return (
+    <div className="card">
+      <div className="card-header flex items-center justify-between">
+        <div className="flex items-center space-x-2">
+          <ListOrdered className="h-5 w-5 text-primary-600" />
+          <h3 className="text-lg font-semibold">Training Queue</h3>
+        </div>
+        <span className="text-sm text-gray-500 dark:text-gray-400">
+          {(queue.used_mb / 1024).toFixed(1)} / {(queue.budget_mb / 1024).toFixed(1)} GB in use
+        </span>
+      </div>
+      <div className="card-body p-0">
+        <ul className="divide-y divide-gray-200 dark:divide-gray-700">
+          {activeJobs.map(job => (
+            <li key={job.job_id} className="flex items-center justify-between px-6 py-3">
+              <div className="flex items-center space-x-4">
+                <span className="w-8 text-center text-sm font-semibold text-gray-500 dark:text-gray-400">
+                  {job.state === 'running' ? '▶' : `#${job.position}`}
+                </span>
+                <div>
+                  <p className="font-medium">{job.config.adapter_name}</p>
+                  <p className="text-xs text-gray-500 dark:text-gray-400">
+                    {job.state === 'running'
+                      ? `Step ${jobMetrics[job.job_id]?.current_step ?? job.progress?.current_step ?? 0} / ${job.progress?.total_steps ?? job.config.iterations} · ${formatDuration(jobMetrics[job.job_id]?.estimated_time_remaining ?? job.estimated_time_remaining)} remaining`
+                      : formatStart(job)}
+                    {' · '}{(job.memory_mb / 1024).toFixed(1)} GB
+                    {job.priority !== 0 && ` · priority ${job.priority}`}
+                  </p>
+                </div>
+              </div>
+              <div className="flex items-center space-x-1">
+                {job.state === 'queued' && (
+                  <>
+                    <button
+                      onClick={() => handleMove(job, -1)}
+                      disabled={job.position === 1}
+                      className="p-1 rounded hover:bg-gray-100 dark:hover:bg-gray-800 disabled:opacity-30"
+                      title="Move up"
+                    >
+                      <ChevronUp className="h-4 w-4" />
+                    </button>
+                    <button
+                      onClick={() => handleMove(job, 1)}
+                      disabled={job.position === queue.queued}
+                      className="p-1 rounded hover:bg-gray-100 dark:hover:bg-gray-800 disabled:opacity-30"
+                      title="Move down"
+                    >
+                      <ChevronDown className="h-4 w-4" />
+                    </button>
+                  </>
+                )}
+                <button
+                  onClick={() => handleCancel(job)}
+                  className="p-1 rounded text-error-600 hover:bg-error-50 dark:hover:bg-error-900/20"
+                  title={job.state === 'running' ? 'Stop' : 'Remove from queue'}
+                >
+                  <X className="h-4 w-4" />
+                </button>
+              </div>
+            </li>
+          ))}
+        </ul>
+      </div>
+    </div>
+  );
+};
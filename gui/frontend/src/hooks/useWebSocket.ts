@@ -6,11 +6,14 @@ import {
   setTrainingConfig,
   trainingStarted,
   trainingProgress,
+  trainingDelta,
   trainingCompleted,
   trainingStopped,
   trainingError,
-  addLogLine,
   clearLogs,
+  setQueue,
+  jobDelta,
+  setRecovery,
 } from '../store/slices/trainingSlice';
 import { addNotification } from '../store/slices/uiSlice';
 
@@ -20,8 +23,40 @@ export const useWebSocket = () => {
   const dispatch = useDispatch();
   const { isConnected } = useSelector((state: RootState) => state.training);
   const socketRef = useRef<WebSocket | null>(null);
-  const lastLoggedStep = useRef<number>(-1);
-  const lastRunStartTime = useRef<string | null>(null);
+  // Version of the last applied progress message; deltas build on it
+  const lastVersion = useRef<number>(-1);
+
+  // One-off snapshot of the training status (initial load and resync)
+  const fetchStatus = useCallback(async () => {
+    try {
+      const response = await fetch('http://localhost:8000/training/status');
+      if (response.ok) {
+        const status = await response.json();
+        
+        // Load the training config and state
+        if (status.config) {
+          dispatch(setTrainingConfig(status.config));
+        }
+        // A delta applied while the request was in flight may be newer
+        lastVersion.current = Math.max(lastVersion.current, status.version ?? -1);
+        dispatch(setRecovery(status.recovery ?? null));
+        
+        if (status.state === 'running' && status.metrics) {
+          dispatch(trainingProgress({ metrics: status.metrics, log_line: '' }));
+        } else if (status.state === 'completed') {
+          dispatch(trainingCompleted({ final_metrics: status.metrics }));
+        } else if (status.state === 'error') {
+          dispatch(trainingError({ error: 'Training failed' }));
+        }
+      }
+      const queueResponse = await fetch('http://localhost:8000/training/queue');
+      if (queueResponse.ok) {
+        dispatch(setQueue(await queueResponse.json()));
+      }
+    } catch (error) {
+      console.error('Error fetching training status:', error);
+    }
+  }, [dispatch]);
 
   const connect = useCallback(() => {
     if (socketRef.current && socketRef.current.readyState === WebSocket.OPEN) {
@@ -54,16 +89,39 @@ export const useWebSocket = () => {
       try {
         const data = JSON.parse(event.data);
         
+        if (data.job_id) {
+          // A queued job on a background runner: its progress belongs to its
+          // queue entry, not to the run shown on the Training page
+          if (data.type === 'training_delta' && data.data.metrics) {
+            dispatch(jobDelta({ job_id: data.job_id, metrics: data.data.metrics, replace: data.data.replace }));
+          }
+          return;
+        }
+        
         switch (data.type) {
+          case 'training_state':
+            // Full snapshot sent on connect
+            lastVersion.current = data.data.version;
+            if (data.data.state === 'running' && data.data.metrics) {
+              dispatch(trainingProgress({ metrics: data.data.metrics, log_line: '' }));
+            }
+            break;
           case 'training_started':
             dispatch(clearLogs()); // Clear previous logs when new training starts
-            lastLoggedStep.current = -1; // Reset step tracking
-            // Run boundary will be confirmed via polling using metrics.start_time
             dispatch(trainingStarted());
             break;
-          case 'training_progress':
-            // Ignore WebSocket training progress - using polling instead
+          case 'training_delta': {
+            // A delta merged for a slow client builds on from_version
+            const baseVersion = data.data.from_version ?? data.data.version - 1;
+            // A replace carries the full metrics of a new run, so needs no base
+            if (!data.data.replace && lastVersion.current !== -1 && baseVersion !== lastVersion.current) {
+              // Missed a delta (e.g. evicted and reconnected) - resync from a snapshot
+              fetchStatus();
+            }
+            lastVersion.current = data.data.version;
+            dispatch(trainingDelta(data.data));
             break;
+          }
           case 'training_completed':
             dispatch(trainingCompleted(data.data));
             break;
@@ -73,6 +131,9 @@ export const useWebSocket = () => {
           case 'training_error':
             dispatch(trainingError(data.data));
             break;
+          case 'queue_updated':
+            dispatch(setQueue(data.data));
+            break;
         }
       } catch (error) {
         console.error('Error parsing WebSocket message:', error);
@@ -88,7 +149,7 @@ export const useWebSocket = () => {
       }));
     };
 
-  }, [dispatch]);
+  }, [dispatch, fetchStatus]);
 
   const disconnect = useCallback(() => {
     if (socketRef.current) {
@@ -106,108 +167,18 @@ export const useWebSocket = () => {
     }
   }, []);
 
-  // Removed fetchLogs - using polling for real-time updates only
-
-  // Auto-connect on mount and start polling for training status
+  // Auto-connect on mount; progress arrives as WebSocket deltas, no polling
   useEffect(() => {
+    // Clear logs when page loads - force complete reset
+    dispatch(clearLogs());
+    fetchStatus();
     connect();
     
-    // Initial status and logs fetch
-    const fetchInitialData = async () => {
-      try {
-        // Clear logs when page loads - force complete reset
-        dispatch(clearLogs());
-        lastLoggedStep.current = -1;
-        
-        const response = await fetch('http://localhost:8000/training/status');
-        if (response.ok) {
-          const status = await response.json();
-          
-          // Load the training config and state
-          if (status.config) {
-            dispatch(setTrainingConfig(status.config));
-          }
-          // Track current run start time if available
-          if (status.metrics && status.metrics.start_time) {
-            lastRunStartTime.current = status.metrics.start_time as string;
-          }
-          
-          if (status.state === 'completed') {
-            dispatch(trainingCompleted({ final_metrics: status.metrics }));
-          } else if (status.state === 'error') {
-            dispatch(trainingError({ error: 'Training failed' }));
-          } else if (status.state === 'running') {
-            // If training is running, start fresh
-            lastLoggedStep.current = -1;
-          }
-        }
-      } catch (error) {
-        console.error('Error fetching initial data:', error);
-      }
-    };
-    
-    fetchInitialData();
-    
-    // Poll training status every 2 seconds as fallback
-    const pollInterval = setInterval(async () => {
-      try {
-        const response = await fetch('http://localhost:8000/training/status');
-        if (response.ok) {
-          const status = await response.json();
-          
-          // Update training state based on API status 
-          if (status.state === 'running') {
-            const metrics = status.metrics || {};
-            const currentStep: number = metrics.current_step ?? 0;
-            const runStartTime: string | null = metrics.start_time ?? null;
-
-            // Detect a new run by start_time change (preferred) or step regression (fallback)
-            const startTimeChanged = runStartTime && runStartTime !== lastRunStartTime.current;
-            const stepRegressed = lastLoggedStep.current !== -1 && currentStep < lastLoggedStep.current;
-
-            if (startTimeChanged || stepRegressed) {
-              dispatch(clearLogs());
-              lastLoggedStep.current = -1;
-              if (runStartTime) {
-                lastRunStartTime.current = runStartTime;
-              }
-              dispatch(trainingStarted());
-            }
-
-            // Only log when step changes - show iter, train loss, val loss
-            let logLine = '';
-            if (currentStep !== lastLoggedStep.current) {
-              const trainLoss = metrics.train_loss != null ? Number(metrics.train_loss).toFixed(4) : 'N/A';
-              const valLoss = metrics.val_loss != null ? Number(metrics.val_loss).toFixed(4) : 'N/A';
-              logLine = `Iter ${currentStep}: Train loss ${trainLoss}, Val loss ${valLoss}`;
-              lastLoggedStep.current = currentStep;
-            }
-
-            dispatch(trainingProgress({
-              metrics: status.metrics,
-              log_line: logLine
-            }));
-          } else if (status.state === 'completed') {
-            // Ensure we set the training config if we don't have it
-            if (status.config) {
-              dispatch(setTrainingConfig(status.config));
-            }
-            dispatch(trainingCompleted({ final_metrics: status.metrics }));
-          } else if (status.state === 'error') {
-            dispatch(trainingError({ error: 'Training failed' }));
-          }
-        }
-      } catch (error) {
-        // Silent - don't spam console with polling errors
-      }
-    }, 2000);
-    
     // Cleanup on unmount
     return () => {
       disconnect();
-      clearInterval(pollInterval);
     };
-  }, [connect, disconnect, dispatch]);
+  }, [connect, disconnect, dispatch, fetchStatus]);
 
   return {
     connect,
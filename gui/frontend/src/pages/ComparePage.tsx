@@ -1,4 +1,4 @@
-import React, { useState } from 'react';
+import React, { useEffect, useRef, useState } from 'react';
 import { useSelector } from 'react-redux';
 import { 
   Send, 
@@ -11,7 +11,6 @@ import {
 } from 'lucide-react';
 import { RootState } from '../store/store';
 import { LoadSessionModal } from '../components/LoadSessionModal';
-import axios from 'axios';
 
 interface Comparison {
   id: string;
@@ -22,6 +21,51 @@ interface Comparison {
   timestamp: Date;
 }
 
+const BACKEND_URL = 'http://localhost:8000';
+
+// Stream tokens from /models/inference/stream; resolves with the final "done" frame
+const streamInference = async (
+  body: Record<string, any>,
+  onToken: (token: string) => void,
+  signal: AbortSignal
+): Promise<any> => {
+  const response = await fetch(`${BACKEND_URL}/models/inference/stream`, {
+    method: 'POST',
+    headers: { 'Content-Type': 'application/json' },
+    body: JSON.stringify(body),
+    signal,
+  });
+  if (!response.ok || !response.body) {
+    const detail = await response.json().catch(() => null);
+    throw new Error(detail?.detail || `Request failed with status ${response.status}`);
+  }
+
+  const reader = response.body.getReader();
+  const decoder = new TextDecoder();
+  let buffer = '';
+  while (true) {
+    const { done, value } = await reader.read();
+    if (done) break;
+    buffer += decoder.decode(value, { stream: true });
+
+    let boundary;
+    while ((boundary = buffer.indexOf('\n\n')) !== -1) {
+      const raw = buffer.slice(0, boundary);
+      buffer = buffer.slice(boundary + 2);
+      const event = raw.match(/^event: (.*)$/m)?.[1];
+      const data = JSON.parse(raw.match(/^data: (.*)$/m)?.[1] || '{}');
+      if (event === 'token') {
+        onToken(data.token);
+      } else if (event === 'done') {
+        return data;
+      } else if (event === 'error') {
+        throw new Error(data.error);
+      }
+    }
+  }
+  throw new Error('Stream ended before generation finished');
+};
+
 export const ComparePage: React.FC = () => {
   const { config } = useSelector((state: RootState) => state.training);
   const [prompt, setPrompt] = useState('');
@@ -31,74 +75,58 @@ export const ComparePage: React.FC = () => {
   const [isLoadSessionOpen, setIsLoadSessionOpen] = useState(false);
   const [loadedSession, setLoadedSession] = useState<any>(null);
 
-  // Real model inference function
+  const abortRef = useRef<AbortController | null>(null);
+
+  // Cancel in-flight generations when leaving the page
+  useEffect(() => () => abortRef.current?.abort(), []);
+
+  const updateComparison = (id: string, update: (comp: Comparison) => Partial<Comparison>) => {
+    setComparisons(prev => prev.map(comp => (comp.id === id ? { ...comp, ...update(comp) } : comp)));
+  };
+
+  // Real model inference function, streamed token by token
   const generateResponses = async (inputPrompt: string) => {
     setIsGenerating(true);
+    const controller = new AbortController();
+    abortRef.current = controller;
     
-    try {
-      // Get the current configuration (could be from current training or loaded session)
-      const currentConfig = loadedSession || config;
-      
-      if (!currentConfig) {
-        throw new Error('No model configuration available. Please complete a training session first.');
-      }
-      
-      // Generate responses from both models in parallel
-      const [baseResponse, fineTunedResponse] = await Promise.all([
-        axios.post('http://localhost:8000/model/test-base', {
-          prompt: inputPrompt,
-          max_tokens: 1024,
-          temperature: 0.7
-        }),
-        axios.post('http://localhost:8000/model/test', {
-          prompt: inputPrompt,
-          max_tokens: 1024,
-          temperature: 0.7
-        })
-      ]);
-
-      const baseData = baseResponse.data;
-      const fineTunedData = fineTunedResponse.data;
-      
-      const newComparison: Comparison = {
-        id: Math.random().toString(36).substr(2, 9),
-        prompt: inputPrompt,
-        baseResponse: baseData.response,
-        fineTunedResponse: fineTunedData.response,
-        timestamp: new Date()
-      };
-      
-      setComparisons(prev => [newComparison, ...prev]);
-      setSelectedComparison(newComparison.id);
-    } catch (error: any) {
-      console.error('Failed to generate responses:', error);
-      
-      let baseErrorMessage = 'Error: Failed to generate base model response';
-      let fineTunedErrorMessage = 'Error: Failed to generate fine-tuned response';
-      
-      if (error.response?.data?.detail) {
-        const detail = error.response.data.detail;
-        baseErrorMessage = `Error: ${detail}`;
-        fineTunedErrorMessage = `Error: ${detail}`;
-      } else if (error.message) {
-        baseErrorMessage = `Error: ${error.message}`;
-        fineTunedErrorMessage = `Error: ${error.message}`;
+    const id = Math.random().toString(36).substr(2, 9);
+    setComparisons(prev => [{
+      id,
+      prompt: inputPrompt,
+      baseResponse: '',
+      fineTunedResponse: '',
+      timestamp: new Date()
+    }, ...prev]);
+    setSelectedComparison(id);
+    
+    const run = async (field: 'baseResponse' | 'fineTunedResponse', useAdapter: boolean) => {
+      try {
+        // Get the current configuration (could be from current training or loaded session)
+        const currentConfig = loadedSession || config;
+        if (!currentConfig) {
+          throw new Error('No model configuration available. Please complete a training session first.');
+        }
+        
+        const result = await streamInference(
+          { prompt: inputPrompt, max_tokens: 1024, temperature: 0.7, use_adapter: useAdapter },
+          (token) => updateComparison(id, comp => ({ [field]: comp[field] + token } as Partial<Comparison>)),
+          controller.signal
+        );
+        updateComparison(id, () => ({ [field]: result.text } as Partial<Comparison>));
+      } catch (error: any) {
+        if (controller.signal.aborted) return;
+        console.error('Failed to generate response:', error);
+        const label = useAdapter ? 'fine-tuned' : 'base model';
+        updateComparison(id, () => ({
+          [field]: `Error: ${error.message || `Failed to generate ${label} response`}`
+        } as Partial<Comparison>));
       }
-      
-      // Show error in the comparison
-      const errorComparison: Comparison = {
-        id: Math.random().toString(36).substr(2, 9),
-        prompt: inputPrompt,
-        baseResponse: baseErrorMessage,
-        fineTunedResponse: fineTunedErrorMessage,
-        timestamp: new Date()
-      };
-      
-      setComparisons(prev => [errorComparison, ...prev]);
-      setSelectedComparison(errorComparison.id);
-    } finally {
-      setIsGenerating(false);
-    }
+    };
+    
+    // Generate responses from both models in parallel
+    await Promise.all([run('baseResponse', false), run('fineTunedResponse', true)]);
+    setIsGenerating(false);
   };
 
   const handleSubmit = (e: React.FormEvent) => {
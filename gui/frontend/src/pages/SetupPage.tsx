@@ -1,6 +1,6 @@
 import React, { useEffect, useState } from 'react';
 import { useDispatch, useSelector } from 'react-redux';
-import { Upload, Settings, Play, Database, Cpu } from 'lucide-react';
+import { Upload, Settings, Play, Database, Cpu, ListPlus } from 'lucide-react';
 import { RootState } from '../store/store';
 import { setModels, setSelectedModel, setLoading, setError } from '../store/slices/modelsSlice';
 import { setTrainingConfig, type TrainingConfig } from '../store/slices/trainingSlice';
@@ -20,6 +20,7 @@ export const SetupPage: React.FC = () => {
     val_data_path: '',
     learning_rate: 1e-5,
     batch_size: 1,
+    gradient_accumulation_steps: 1,
     max_seq_length: 1024,
     iterations: 7329,
     steps_per_report: 25,
@@ -106,24 +107,23 @@ export const SetupPage: React.FC = () => {
     }
   };
 
-  const handleSubmit = async (e: React.FormEvent) => {
-    e.preventDefault();
-    
+  const buildTrainingConfig = (): TrainingConfig | null => {
     if (!formData.model_path || !formData.train_data_path) {
       dispatch(addNotification({
         type: 'warning',
         title: 'Incomplete Setup',
         message: 'Please select a model and training data file.',
       }));
-      return;
+      return null;
     }
 
-    const trainingConfig: TrainingConfig = {
+    return {
       model_path: formData.model_path!,
       train_data_path: formData.train_data_path!,
       val_data_path: formData.val_data_path || '',
       learning_rate: formData.learning_rate!,
       batch_size: formData.batch_size!,
+      gradient_accumulation_steps: formData.gradient_accumulation_steps!,
       max_seq_length: formData.max_seq_length!,
       iterations: formData.iterations!,
       steps_per_report: formData.steps_per_report!,
@@ -133,6 +133,13 @@ export const SetupPage: React.FC = () => {
       patience: formData.patience!,
       adapter_name: formData.adapter_name!
     };
+  };
+
+  const handleSubmit = async (e: React.FormEvent) => {
+    e.preventDefault();
+    
+    const trainingConfig = buildTrainingConfig();
+    if (!trainingConfig) return;
 
     dispatch(setTrainingConfig(trainingConfig));
     
@@ -153,6 +160,31 @@ export const SetupPage: React.FC = () => {
     }
   };
 
+  // Queue the run; the scheduler starts it once it fits the memory budget
+  const handleQueue = async () => {
+    const trainingConfig = buildTrainingConfig();
+    if (!trainingConfig) return;
+
+    try {
+      const response = await axios.post(`${BACKEND_URL}/training/queue`, trainingConfig);
+      const job = response.data.queue.jobs.find((j: any) => j.job_id === response.data.job_id);
+      dispatch(addNotification({
+        type: 'success',
+        title: 'Training Queued',
+        message: job?.position
+          ? `Queued at position ${job.position}.`
+          : 'The job will start as soon as memory is available.',
+        autoHide: true,
+      }));
+    } catch (error) {
+      dispatch(addNotification({
+        type: 'error',
+        title: 'Queue Failed',
+        message: 'Failed to queue training. Check configuration and try again.',
+      }));
+    }
+  };
+
   return (
     <div className="space-y-8">
       {/* Page header */}
@@ -314,6 +346,25 @@ export const SetupPage: React.FC = () => {
                 </select>
               </div>
 
+              <div>
+                <label className="block text-sm font-medium mb-2">Gradient Accumulation</label>
+                <select
+                  className="select-field"
+                  value={formData.gradient_accumulation_steps}
+                  onChange={(e) => setFormData(prev => ({ ...prev, gradient_accumulation_steps: parseInt(e.target.value) }))}
+                >
+                  <option value={1}>1 (off)</option>
+                  <option value={2}>2</option>
+                  <option value={4}>4</option>
+                  <option value={8}>8</option>
+                  <option value={16}>16</option>
+                  <option value={32}>32</option>
+                </select>
+                <p className="text-sm text-gray-600 dark:text-gray-400 mt-1">
+                  Effective batch {(formData.batch_size || 1) * (formData.gradient_accumulation_steps || 1)} at the memory cost of batch {formData.batch_size || 1}
+                </p>
+              </div>
+
               <div>
                 <label className="block text-sm font-medium mb-2">Max Sequence Length</label>
                 <select
@@ -393,7 +444,16 @@ export const SetupPage: React.FC = () => {
         </div>
 
         {/* Submit */}
-        <div className="flex justify-end">
+        <div className="flex justify-end space-x-3">
+          <button
+            type="button"
+            onClick={handleQueue}
+            disabled={!formData.model_path || !formData.train_data_path}
+            className="btn-secondary flex items-center space-x-2 disabled:opacity-50 disabled:cursor-not-allowed"
+          >
+            <ListPlus className="h-4 w-4" />
+            <span>Add to Queue</span>
+          </button>
           <button
             type="submit"
             disabled={trainingState === 'running' || !formData.model_path || !formData.train_data_path}
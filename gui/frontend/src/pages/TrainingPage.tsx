@@ -9,19 +9,21 @@ import {
   TrendingDown, 
   Cpu,
   Eye,
-  EyeOff
+  EyeOff,
+  RotateCcw
 } from 'lucide-react';
 import { RootState } from '../store/store';
 import { setShowLogs, addNotification } from '../store/slices/uiSlice';
 import { TrainingChart } from '../components/TrainingChart';
 import { LogViewer } from '../components/LogViewer';
+import { TrainingQueue } from '../components/TrainingQueue';
 import axios from 'axios';
 
 const BACKEND_URL = 'http://localhost:8000';
 
 export const TrainingPage: React.FC = () => {
   const dispatch = useDispatch();
-  const { state: trainingState, metrics, config, logs } = useSelector((state: RootState) => state.training);
+  const { state: trainingState, metrics, config, logs, recovery } = useSelector((state: RootState) => state.training);
   const { showLogs } = useSelector((state: RootState) => state.ui);
 
   const handleStopTraining = async () => {
@@ -42,6 +44,25 @@ export const TrainingPage: React.FC = () => {
     }
   };
 
+  const handleResumeTraining = async () => {
+    if (!recovery) return;
+    try {
+      await axios.post(`${BACKEND_URL}/training/resume`, { session_id: recovery.session_id });
+      dispatch(addNotification({
+        type: 'success',
+        title: 'Training Resumed',
+        message: `Continuing from step ${recovery.step}.`,
+        autoHide: true,
+      }));
+    } catch (error) {
+      dispatch(addNotification({
+        type: 'error',
+        title: 'Resume Failed',
+        message: 'Failed to resume the interrupted training run.',
+      }));
+    }
+  };
+
   const formatTime = (seconds: number | null) => {
     if (!seconds) return '--:--:--';
     const hrs = Math.floor(seconds / 3600);
@@ -61,17 +82,40 @@ export const TrainingPage: React.FC = () => {
 
   if (trainingState === 'idle') {
     return (
-      <div className="flex items-center justify-center h-96">
-        <div className="text-center">
-          <div className="w-16 h-16 bg-gray-100 dark:bg-gray-800 rounded-full flex items-center justify-center mx-auto mb-4">
-            <Play className="h-8 w-8 text-gray-400" />
+      <div className="space-y-6">
+        {recovery && (
+          <div className="card">
+            <div className="card-body flex items-center justify-between">
+              <div>
+                <h3 className="text-lg font-semibold">Interrupted Training Run</h3>
+                <p className="text-sm text-gray-500 dark:text-gray-400">
+                  The last run stopped unexpectedly. It can continue from step {recovery.step}
+                  {recovery.total_steps ? ` of ${recovery.total_steps}` : ''} with its metrics and best model intact.
+                </p>
+              </div>
+              <button
+                onClick={handleResumeTraining}
+                className="btn-primary flex items-center space-x-2"
+              >
+                <RotateCcw className="h-4 w-4" />
+                <span>Resume</span>
+              </button>
+            </div>
+          </div>
+        )}
+        <TrainingQueue />
+        <div className="flex items-center justify-center h-96">
+          <div className="text-center">
+            <div className="w-16 h-16 bg-gray-100 dark:bg-gray-800 rounded-full flex items-center justify-center mx-auto mb-4">
+              <Play className="h-8 w-8 text-gray-400" />
+            </div>
+            <h2 className="text-xl font-semibold text-gray-900 dark:text-gray-100 mb-2">
+              No Training Session
+            </h2>
+            <p className="text-gray-500 dark:text-gray-400">
+              Configure your model and start training from the Setup page.
+            </p>
           </div>
-          <h2 className="text-xl font-semibold text-gray-900 dark:text-gray-100 mb-2">
-            No Training Session
-          </h2>
-          <p className="text-gray-500 dark:text-gray-400">
-            Configure your model and start training from the Setup page.
-          </p>
         </div>
       </div>
     );
@@ -214,6 +258,8 @@ export const TrainingPage: React.FC = () => {
         </div>
       </div>
 
+      <TrainingQueue />
+
       {/* Training Configuration */}
       {config && (
         <div className="card">
@@ -228,7 +274,10 @@ export const TrainingPage: React.FC = () => {
               </div>
               <div>
                 <span className="text-gray-500 dark:text-gray-400">Batch Size:</span>
-                <p className="font-medium">{config.batch_size}</p>
+                <p className="font-medium">
+                  {config.batch_size}
+                  {(config.gradient_accumulation_steps || 1) > 1 && ` × ${config.gradient_accumulation_steps} accumulated`}
+                </p>
               </div>
               <div>
                 <span className="text-gray-500 dark:text-gray-400">Max Seq Length:</span>
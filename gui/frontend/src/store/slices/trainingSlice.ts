@@ -16,6 +16,7 @@ export interface TrainingConfig {
   val_data_path: string;
   learning_rate: number;
   batch_size: number;
+  gradient_accumulation_steps: number;
   max_seq_length: number;
   iterations: number;
   steps_per_report: number;
@@ -26,6 +27,39 @@ export interface TrainingConfig {
   adapter_name: string;
 }
 
+export interface QueueJob {
+  job_id: string;
+  config: TrainingConfig;
+  memory_mb: number;
+  priority: number;
+  state: 'queued' | 'running' | 'completed' | 'failed' | 'cancelled';
+  submitted_at: string;
+  started_at: string | null;
+  finished_at: string | null;
+  error: string | null;
+  position?: number;
+  estimated_wait_seconds?: number | null;
+  estimated_start?: string | null;
+  estimated_time_remaining?: number | null;
+  progress?: { current_step: number | null; total_steps: number | null };
+}
+
+export interface TrainingQueue {
+  budget_mb: number;
+  used_mb: number;
+  queued: number;
+  running: number;
+  jobs: QueueJob[];
+}
+
+export interface ResumePoint {
+  session_id: string;
+  adapter_dir: string;
+  step: number;
+  checkpoint: string;
+  total_steps: number | null;
+}
+
 export type TrainingState = 'idle' | 'running' | 'paused' | 'completed' | 'error' | 'stopped';
 
 interface TrainingSliceState {
@@ -35,6 +69,10 @@ interface TrainingSliceState {
   logs: string[];
   error: string | null;
   isConnected: boolean;
+  queue: TrainingQueue | null;
+  // Live metrics of queued jobs running on background runners, by job id
+  jobMetrics: Record<string, Partial<TrainingMetrics>>;
+  recovery: ResumePoint | null;
 }
 
 const initialState: TrainingSliceState = {
@@ -44,6 +82,9 @@ const initialState: TrainingSliceState = {
   logs: [],
   error: null,
   isConnected: false,
+  queue: null,
+  jobMetrics: {},
+  recovery: null,
 };
 
 export const trainingSlice = createSlice({
@@ -90,6 +131,7 @@ export const trainingSlice = createSlice({
     },
     trainingStarted: (state) => {
       state.state = 'running';
+      state.recovery = null;
       state.error = null;
       state.metrics = null; // Clear old metrics
       state.logs = []; // Clear logs
@@ -115,6 +157,28 @@ export const trainingSlice = createSlice({
         }
       }
     },
+    trainingDelta: (state, action: PayloadAction<{ metrics: Partial<TrainingMetrics>; logs: string[]; replace?: boolean }>) => {
+      // Apply only the fields that changed since the previous delta; the
+      // first delta of a new run replaces the metrics outright
+      const { metrics, logs, replace } = action.payload;
+      if (replace) {
+        state.metrics = metrics as TrainingMetrics;
+        state.state = 'running';
+      } else if (metrics && Object.keys(metrics).length > 0) {
+        if (state.metrics && typeof metrics.current_step === 'number' && metrics.current_step < state.metrics.current_step) {
+          state.logs = [];
+        }
+        state.metrics = { ...(state.metrics ?? {}), ...metrics } as TrainingMetrics;
+        state.state = 'running';
+      }
+      if (logs && logs.length > 0) {
+        state.logs.push(...logs);
+        // Keep only last 1000 lines
+        if (state.logs.length > 1000) {
+          state.logs = state.logs.slice(-1000);
+        }
+      }
+    },
     trainingCompleted: (state, action: PayloadAction<{ final_metrics: TrainingMetrics }>) => {
       state.state = 'completed';
       state.metrics = action.payload.final_metrics;
@@ -126,6 +190,23 @@ export const trainingSlice = createSlice({
       state.state = 'error';
       state.error = action.payload.error;
     },
+    setQueue: (state, action: PayloadAction<TrainingQueue>) => {
+      state.queue = action.payload;
+      // Forget jobs that are no longer running
+      const running = new Set(action.payload.jobs.filter(job => job.state === 'running').map(job => job.job_id));
+      for (const jobId of Object.keys(state.jobMetrics)) {
+        if (!running.has(jobId)) {
+          delete state.jobMetrics[jobId];
+        }
+      }
+    },
+    jobDelta: (state, action: PayloadAction<{ job_id: string; metrics: Partial<TrainingMetrics>; replace?: boolean }>) => {
+      const { job_id, metrics, replace } = action.payload;
+      state.jobMetrics[job_id] = replace ? metrics : { ...(state.jobMetrics[job_id] ?? {}), ...metrics };
+    },
+    setRecovery: (state, action: PayloadAction<ResumePoint | null>) => {
+      state.recovery = action.payload;
+    },
   },
 });
 
@@ -141,7 +222,11 @@ export const {
   resetTraining,
   trainingStarted,
   trainingProgress,
+  trainingDelta,
   trainingCompleted,
   trainingStopped,
   trainingError,
+  setQueue,
+  jobDelta,
+  setRecovery,
 } = trainingSlice.actions;
\ No newline at end of file
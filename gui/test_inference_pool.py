@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+"""
+Residency checks for the backend inference worker pool.
+
+Runs real worker processes on the stub backend and verifies LRU eviction
+under the memory budget, idle-timeout shutdown, restart after a failed
+health check, and that a worker handed out by the pool is never evicted
+before its request finishes with it.
+"""
+
+import asyncio
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent / "backend"))
+
+import inference_pool
+from inference_pool import InferencePool, estimate_memory_mb
+
+# Stub models have no weight files, so each is estimated at the minimum
+MODEL_MB = estimate_memory_mb("stub-a")
+MONITOR_INTERVAL = 0.1
+
+
+def make_pool(models: int, **kwargs) -> InferencePool:
+    """Stub-backend pool with room for this many resident models"""
+    return InferencePool(backend="stub", memory_budget_mb=MODEL_MB * models, **kwargs)
+
+
+async def fast_monitor(run):
+    """Await run() with the health monitor checking every MONITOR_INTERVAL"""
+    interval = inference_pool.HEALTH_CHECK_INTERVAL
+    inference_pool.HEALTH_CHECK_INTERVAL = MONITOR_INTERVAL
+    try:
+        return await run()
+    finally:
+        inference_pool.HEALTH_CHECK_INTERVAL = interval
+
+
+def check_lru_eviction():
+    async def run():
+        pool = make_pool(2)
+        try:
+            await pool.generate("stub-a", None, "one", max_tokens=4)
+            await pool.generate("stub-b", None, "two", max_tokens=4)
+            # Touch a so b is the least recently used
+            await pool.generate("stub-a", None, "three", max_tokens=4)
+            await pool.generate("stub-c", None, "four", max_tokens=4)
+            return list(pool.workers), pool.loads, pool.evictions, pool.resident_mb
+        finally:
+            await pool.close()
+
+    resident, loads, evictions, resident_mb = asyncio.run(run())
+    assert resident == ["stub-a", "stub-c"], resident
+    assert (loads, evictions) == (3, 1)
+    assert resident_mb <= MODEL_MB * 2
+    return resident, evictions
+
+
+def check_idle_timeout():
+    async def run():
+        pool = make_pool(2, idle_timeout=0.2)
+        try:
+            await pool.generate("stub-a", None, "one", max_tokens=4)
+            process = pool.workers["stub-a"].process
+            deadline = asyncio.get_running_loop().time() + 5
+            while pool.workers and asyncio.get_running_loop().time() < deadline:
+                await asyncio.sleep(MONITOR_INTERVAL)
+            return dict(pool.workers), process.returncode
+        finally:
+            await pool.close()
+
+    workers, returncode = asyncio.run(fast_monitor(run))
+    assert workers == {}, workers
+    # The idle worker was shut down, not just forgotten
+    assert returncode is not None
+    return returncode
+
+
+def check_restart_after_failed_health_check():
+    async def run():
+        pool = make_pool(2)
+        try:
+            await pool.generate("stub-a", None, "one", max_tokens=4)
+            crashed = pool.workers["stub-a"]
+            crashed.process.kill()
+            await crashed.process.wait()
+
+            # The monitor drops the dead worker on its next ping
+            deadline = asyncio.get_running_loop().time() + 5
+            while "stub-a" in pool.workers and asyncio.get_running_loop().time() < deadline:
+                await asyncio.sleep(MONITOR_INTERVAL)
+            dropped = "stub-a" not in pool.workers
+
+            reply = await pool.generate("stub-a", None, "two", max_tokens=4)
+            restarted = pool.workers["stub-a"]
+            return dropped, reply, crashed, restarted, pool.loads
+        finally:
+            await pool.close()
+
+    dropped, reply, crashed, restarted, loads = asyncio.run(fast_monitor(run))
+    assert dropped
+    assert reply["ok"]
+    assert restarted is not crashed
+    assert restarted.process.pid != crashed.process.pid
+    assert loads == 2
+    return crashed.process.pid, restarted.process.pid
+
+
+def check_leased_worker_not_evicted():
+    async def run():
+        pool = make_pool(1)
+        try:
+            async with pool._lease("stub-a") as held:
+                # Not locked yet: only the lease marks the worker in use
+                assert not held.lock.locked()
+                await pool.generate("stub-b", None, "one", max_tokens=4)
+                during = (list(pool.workers), pool.evictions, held.alive)
+            # Released, a over budget is the least recently used and goes next
+            await pool.generate("stub-c", None, "two", max_tokens=4)
+            after = (list(pool.workers), pool.evictions, held.alive)
+            return during, after
+        finally:
+            await pool.close()
+
+    during, after = asyncio.run(run())
+    assert during == (["stub-a", "stub-b"], 0, True), during
+    assert after[0] == ["stub-c"] and not after[2], after
+    return during, after
+
+
+def test_lru_eviction_under_budget():
+    check_lru_eviction()
+
+
+def test_idle_worker_stopped():
+    check_idle_timeout()
+
+
+def test_restart_after_failed_health_check():
+    check_restart_after_failed_health_check()
+
+
+def test_leased_worker_not_evicted():
+    check_leased_worker_not_evicted()
+
+
+if __name__ == "__main__":
+    print("🧪 Testing inference worker pool")
+    print("=" * 50)
+    try:
+        resident, evictions = check_lru_eviction()
+        returncode = check_idle_timeout()
+        old_pid, new_pid = check_restart_after_failed_health_check()
+        check_leased_worker_not_evicted()
+    except AssertionError as e:
+        print(f"❌ Pool check failed: {e!r}")
+        sys.exit(1)
+    print(f"✅ LRU eviction kept {resident} ({evictions} eviction)")
+    print(f"✅ Idle worker stopped (exit code {returncode})")
+    print(f"✅ Dead worker {old_pid} replaced by {new_pid}")
+    print("✅ Leased worker survived a load over budget")
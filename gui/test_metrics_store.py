@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""
+Downsampling checks for the backend metrics store.
+
+Min-max downsampling must never return more points than requested, must
+keep the first and last points, and must keep spikes.
+"""
+
+import sys
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).parent / "backend"))
+
+from metrics_store import minmax_indices
+
+LENGTHS = (3, 10, 101, 1000, 5003)
+THRESHOLDS = (2, 3, 4, 5, 7, 50, 499, 500)
+
+
+def check_minmax_within_threshold():
+    rng = np.random.default_rng(0)
+    largest = 0
+    for n in LENGTHS:
+        y = rng.normal(size=n)
+        for threshold in THRESHOLDS:
+            result = minmax_indices(y, threshold)
+            assert len(result) <= min(threshold, n), (n, threshold, len(result))
+            assert result[0] == 0 and result[-1] == n - 1
+            assert np.all(np.diff(result) > 0)
+            if threshold < n:
+                largest = max(largest, len(result))
+    return largest
+
+
+def check_minmax_keeps_spikes():
+    y = np.zeros(1000)
+    y[317] = 50.0
+    y[642] = -50.0
+    result = minmax_indices(y, 20)
+    assert len(result) <= 20
+    assert 317 in result and 642 in result
+    return result
+
+
+def test_minmax_within_threshold():
+    check_minmax_within_threshold()
+
+
+def test_minmax_keeps_spikes():
+    check_minmax_keeps_spikes()
+
+
+if __name__ == "__main__":
+    print("🧪 Testing metrics downsampling")
+    print("=" * 50)
+    try:
+        largest = check_minmax_within_threshold()
+        check_minmax_keeps_spikes()
+    except AssertionError as e:
+        print(f"❌ Downsampling check failed: {e!r}")
+        sys.exit(1)
+    print(f"✅ Min-max stayed within threshold (largest result {largest} points)")
+    print("✅ Spikes survived min-max downsampling")
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Watch check for the backend model registry.
+
+Builds a temporary tree with one base model and one adapter, starts the
+registry's filesystem watcher and writes a single file. The registry must
+pick the change up and then settle: its own rescans open config.json and
+the safetensors headers, and those opens must not trigger further rescans.
+"""
+
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).parent / "backend"))
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from cli.safetensors_header import write_safetensors
+from model_registry import ModelRegistry
+
+SETTLE_SECONDS = 1.0
+
+
+def build_tree(root: str):
+    model_dir = os.path.join(root, "models", "tiny-model")
+    adapter_dir = os.path.join(root, "adapters", "tiny-adapter")
+    os.makedirs(model_dir)
+    os.makedirs(adapter_dir)
+    with open(os.path.join(model_dir, "config.json"), 'w') as f:
+        json.dump({"model_type": "llama", "vocab_size": 32}, f)
+    write_safetensors(os.path.join(model_dir, "model.safetensors"),
+                      {"embed.weight": np.zeros((32, 8), dtype=np.float32)})
+    write_safetensors(os.path.join(adapter_dir, "adapters.safetensors"),
+                      {"lm_head.lora_a": np.zeros((8, 4), dtype=np.float32)})
+    return model_dir
+
+
+async def run_watch(root: str):
+    model_dir = build_tree(root)
+    registry = ModelRegistry(os.path.join(root, "models"), os.path.join(root, "adapters"))
+    registry.start()
+    try:
+        await asyncio.sleep(0.2)
+        with open(os.path.join(model_dir, "config.json"), 'w') as f:
+            json.dump({"model_type": "qwen2", "vocab_size": 64}, f)
+
+        # Wait for the write to be picked up
+        deadline = time.monotonic() + 5
+        while registry.models["tiny-model"]["model_type"] != "qwen2" and time.monotonic() < deadline:
+            await asyncio.sleep(0.05)
+
+        await asyncio.sleep(SETTLE_SECONDS)
+        settled = registry.rescans
+        await asyncio.sleep(SETTLE_SECONDS)
+        return registry, registry.mode, settled
+    finally:
+        registry.stop()
+
+
+def check_registry_settles():
+    with tempfile.TemporaryDirectory() as root:
+        registry, mode, settled = asyncio.run(run_watch(root))
+
+    # The write was seen
+    assert registry.models["tiny-model"]["model_type"] == "qwen2"
+    assert registry.models["tiny-model"]["vocab_size"] == 64
+
+    # One write causes a handful of rescans, then nothing more
+    assert settled < 50, settled
+    assert registry.rescans == settled, (settled, registry.rescans)
+    return registry, mode
+
+
+def test_registry_settles_after_one_write():
+    check_registry_settles()
+
+
+if __name__ == "__main__":
+    print("🧪 Testing model registry watching")
+    print("=" * 50)
+    try:
+        registry, mode = check_registry_settles()
+    except AssertionError as e:
+        print(f"❌ Registry check failed: {e!r}")
+        sys.exit(1)
+    print(f"✅ Change picked up in {mode} mode")
+    print(f"✅ Settled after {registry.rescans} rescans")
@@ -0,0 +1,224 @@
+#!/usr/bin/env python3
+"""
+Fan-out check for the backend WebSocket hub.
+
+Connects 200 simulated clients (fast, slow and stuck) and verifies that
+slow clients get merged progress deltas, stuck ones are evicted, and nobody
+delays the publisher or the fast clients.
+"""
+
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent / "backend"))
+
+from progress_stream import ProgressStream
+from websocket_hub import WebSocketHub, merge_training_deltas
+
+CLIENTS = 200
+SLOW_EVERY = 10   # every 10th client is slow
+STUCK_EVERY = 25  # every 25th client never completes a send
+PROGRESS_MESSAGES = 2000
+
+
+class FakeWebSocket:
+    """Records messages; optionally slow or stuck on send"""
+
+    def __init__(self, delay: float = 0.0, stuck: bool = False):
+        self.delay = delay
+        self.stuck = stuck
+        self.messages = []
+        self.closed = False
+
+    async def send_json(self, message):
+        if self.stuck:
+            await asyncio.Event().wait()
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        self.messages.append(message)
+
+    async def close(self):
+        self.closed = True
+
+
+def delta(version, metrics, logs):
+    return {"type": "training_delta", "data": {"version": version, "metrics": metrics, "logs": logs}}
+
+
+def replay(messages):
+    """Apply a client's deltas as the frontend does; fails on a version gap"""
+    version = messages[0]["data"]["version"]
+    metrics, logs, dropped = {}, [], 0
+    for message in messages:
+        if message["type"] != "training_delta":
+            continue
+        data = message["data"]
+        if data.get("replace"):
+            metrics = {}
+        else:
+            assert data.get("from_version", data["version"] - 1) == version
+        version = data["version"]
+        metrics.update(data["metrics"])
+        logs += data["logs"]
+        dropped += data.get("dropped_logs", 0)
+    return version, metrics, logs, dropped
+
+
+async def run_fanout():
+    hub = WebSocketHub(max_queue=64, send_timeout=0.5)
+    sockets = []
+    for i in range(CLIENTS):
+        if i % STUCK_EVERY == 0:
+            ws = FakeWebSocket(stuck=True)
+        elif i % SLOW_EVERY == 0:
+            ws = FakeWebSocket(delay=0.05)
+        else:
+            ws = FakeWebSocket()
+        sockets.append(ws)
+        hub.register(ws, initial={"type": "training_state", "data": {"version": 0, "metrics": {}}})
+
+    start = time.perf_counter()
+    for step in range(PROGRESS_MESSAGES):
+        hub.publish(delta(step + 1, {"current_step": step}, [f"Iter {step}"]))
+        if step % 100 == 0:
+            # Let writers run, as the monitor loop would between reads
+            await asyncio.sleep(0)
+    hub.publish({"type": "training_completed", "data": {}})
+    publish_time = time.perf_counter() - start
+
+    # Allow slow clients to drain and stuck clients to hit their deadline
+    await asyncio.sleep(1.5)
+    await hub.close()
+    return hub, sockets, publish_time
+
+
+def check_fanout():
+    hub, sockets, publish_time = asyncio.run(run_fanout())
+
+    stuck = [ws for i, ws in enumerate(sockets) if i % STUCK_EVERY == 0]
+    slow = [ws for i, ws in enumerate(sockets) if i % STUCK_EVERY and i % SLOW_EVERY == 0]
+    fast = [ws for i, ws in enumerate(sockets) if i % STUCK_EVERY and i % SLOW_EVERY]
+
+    # Publishing never waits on the network
+    assert publish_time < 2.0
+
+    # Stuck clients are evicted and closed
+    assert hub.evicted == len(stuck)
+    assert all(ws.closed for ws in stuck)
+
+    # Every live client ends with the latest progress and the completion
+    # message, with no version gaps and every log line delivered or counted
+    for ws in fast + slow:
+        assert ws.messages[0]["type"] == "training_state"
+        assert ws.messages[-1]["type"] == "training_completed"
+        version, metrics, logs, dropped = replay(ws.messages)
+        assert version == PROGRESS_MESSAGES
+        assert metrics["current_step"] == PROGRESS_MESSAGES - 1
+        assert logs[-1] == f"Iter {PROGRESS_MESSAGES - 1}"
+        assert len(logs) + dropped == PROGRESS_MESSAGES
+
+    # Slow clients were coalesced instead of receiving every message
+    for ws in slow:
+        assert len(ws.messages) < PROGRESS_MESSAGES // 10
+
+    return hub, fast, slow, stuck, publish_time
+
+
+def test_fanout_with_slow_clients():
+    check_fanout()
+
+
+def test_merged_delta_matches_applying_both():
+    older = delta(4, {"current_step": 10, "train_loss": 1.5}, ["a", "b"])
+    newer = delta(5, {"current_step": 20, "val_loss": 1.2}, ["c"])
+    merged = merge_training_deltas(older, newer)
+    assert merged["type"] == "training_delta"
+    assert merged["data"] == {
+        "version": 5,
+        "from_version": 3,
+        "metrics": {"current_step": 20, "train_loss": 1.5, "val_loss": 1.2},
+        "logs": ["a", "b", "c"],
+    }
+    # Messages are shared between clients and must not be modified
+    assert older["data"]["logs"] == ["a", "b"] and "from_version" not in older["data"]
+
+    # A chain of merges still builds on the first delta's base version
+    assert merge_training_deltas(merged, delta(6, {}, []))["data"]["from_version"] == 3
+
+
+
+def test_job_deltas_merge_per_run():
+    async def run():
+        hub = WebSocketHub(max_queue=64, send_timeout=0.5)
+        ws = FakeWebSocket(delay=0.05)
+        hub.register(ws, initial={"type": "training_state", "data": {"version": 0, "metrics": {}}})
+        for step in range(50):
+            hub.publish(delta(step + 1, {"current_step": step}, []))
+            job = delta(step + 1, {"current_step": 1000 + step}, [])
+            hub.publish({**job, "job_id": "job1"})
+        await asyncio.sleep(0.5)
+        await hub.close()
+        return ws
+
+    ws = asyncio.run(run())
+    primary = [m for m in ws.messages if "job_id" not in m]
+    job = [m for m in ws.messages if m.get("job_id") == "job1"]
+    # Each run's deltas chain on their own versions and end at their own step
+    assert replay(primary)[:2] == (50, {"current_step": 49})
+    assert replay([primary[0]] + job)[:2] == (50, {"current_step": 1049})
+
+
+def test_merged_replace_drops_earlier_metrics():
+    older = delta(4, {"current_step": 10, "resumed_from_step": 8}, ["a"])
+    replace = delta(5, {"current_step": 0}, ["b"])
+    replace["data"]["replace"] = True
+    merged = merge_training_deltas(older, replace)
+    assert merged["data"]["replace"] is True
+    assert merged["data"]["metrics"] == {"current_step": 0}
+    assert merged["data"]["logs"] == ["a", "b"]
+
+    # Deltas merged after a replace build on its full metrics and stay a replace
+    merged = merge_training_deltas(merged, delta(6, {"train_loss": 2.0}, []))
+    assert merged["data"]["replace"] is True
+    assert merged["data"]["metrics"] == {"current_step": 0, "train_loss": 2.0}
+
+
+def test_first_delta_after_reset_replaces():
+    async def run():
+        published = []
+        stream = ProgressStream(published.append, max_rate_hz=0)
+        stream.update({"current_step": 10, "resumed_from_step": 8})
+        stream.flush()
+        stream.reset()
+        stream.update({"current_step": 0, "train_loss": 3.0})
+        stream.flush()
+        stream.update({"current_step": 1, "train_loss": 3.0})
+        stream.flush()
+        return published
+
+    first, replace, after = asyncio.run(run())
+    assert "replace" not in first["data"]
+    assert replace["data"]["replace"] is True
+    assert replace["data"]["metrics"] == {"current_step": 0, "train_loss": 3.0}
+    assert "replace" not in after["data"]
+    assert after["data"]["metrics"] == {"current_step": 1}
+    # A client applying all three ends without the previous run's keys
+    state = {"type": "training_state", "data": {"version": 0, "metrics": {}}}
+    assert replay([state, first, replace, after])[1] == {"current_step": 1, "train_loss": 3.0}
+
+
+if __name__ == "__main__":
+    print("🧪 Testing WebSocket fan-out")
+    print("=" * 50)
+    try:
+        hub, fast, slow, stuck, publish_time = check_fanout()
+    except AssertionError as e:
+        print(f"❌ Fan-out check failed: {e!r}")
+        sys.exit(1)
+    print(f"✅ Published {PROGRESS_MESSAGES} messages to {CLIENTS} clients in {publish_time * 1000:.1f}ms")
+    print(f"✅ {len(fast)} fast clients received the latest state")
+    print(f"✅ {len(slow)} slow clients merged to "
+          f"{max(len(ws.messages) for ws in slow)} messages max")
+    print(f"✅ {len(stuck)} stuck clients evicted")